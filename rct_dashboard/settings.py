@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,10 +43,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'study.staticfiles.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'study.audit.AuditUserMiddleware',
+    'study.tenancy.StudyMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -56,12 +60,20 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'study.tenancy.studies',
+            ],
+            # Compiled templates are kept in memory, so each page is parsed
+            # once per process. The development server still picks up edits.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
             ],
         },
     },
@@ -72,13 +84,95 @@ WSGI_APPLICATION = 'rct_dashboard.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+#
+# DATABASE_PROFILE selects the backend:
+#   sqlite   (default) - single file, tuned for concurrent readers and writers
+#   postgres           - pooled connections, optional read replica for dashboards
+
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'sqlite')
+
+if DATABASE_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'rct_dashboard'),
+            'USER': os.environ.get('POSTGRES_USER', 'rct_dashboard'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    if os.environ.get('POSTGRES_POOL', '1') == '1':
+        # psycopg pool (psycopg[pool]); Django requires CONN_MAX_AGE = 0 with it.
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('POSTGRES_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('POSTGRES_POOL_MAX_SIZE', 10)),
+            'timeout': 10,
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('POSTGRES_CONN_MAX_AGE', 600))
+
+    if os.environ.get('POSTGRES_REPLICA_HOST'):
+        # Read-only dashboards are routed here by study.routers.ReadReplicaRouter.
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': os.environ['POSTGRES_REPLICA_HOST'],
+            'PORT': os.environ.get('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+            'OPTIONS': {**DATABASES['default']['OPTIONS']},
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': 600,
+            'OPTIONS': {
+                # Wait up to 20 s for a lock instead of failing with "database is locked".
+                'timeout': 20,
+                # Take the write lock at BEGIN, so a transaction never has to
+                # upgrade a read lock halfway through (which cannot be retried).
+                'transaction_mode': 'IMMEDIATE',
+                # WAL lets readers run alongside the single writer.
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA cache_size=-64000;'
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA mmap_size=268435456;'
+                ),
+            },
+        }
+    }
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+DATABASE_ROUTERS = ['study.routers.ReadReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# Holds the {% cache %} fragments of the navigation and the visit dashboard
+# tiles. Their keys include the relevant updated_at/completed_at values, so
+# an edit shows up immediately without explicit invalidation. The local-memory
+# cache is per process; set REDIS_URL (needs the `redis` package) to share it
+# between workers.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
     }
-}
 
 
 # Password validation
@@ -117,6 +211,38 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# `manage.py collectstatic` copies every asset here with a content hash in
+# its name plus a gzip copy; study.staticfiles.StaticFilesMiddleware serves them.
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'study.staticfiles.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Media files (uploaded MRI reports)
+
+MEDIA_URL = 'media/'
+
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Chunked uploads are assembled here until the last chunk arrives.
+UPLOAD_PARTIAL_DIR = MEDIA_ROOT / 'partial_uploads'
+
+# Chunk size suggested to upload clients (bytes).
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Set to 'X-Sendfile' (Apache) or 'X-Accel-Redirect' (nginx) to let the web
+# server send MRI reports. With X-Accel-Redirect, SENDFILE_URL_PREFIX must be
+# an internal location that maps to MEDIA_ROOT.
+SENDFILE_HEADER = None
+
+SENDFILE_URL_PREFIX = '/protected-media/'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -1,4 +1,7 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
 from .models import (
     Study,
     Participant,
@@ -12,8 +15,107 @@ from .models import (
     ClinicalAssessment,
     BiologicalSample,
     Neuroimaging, 
-    WearableDataPoint
+    WearableDataPoint,
+    ReportUpload,
+    ScheduledVisit,
+    VisitSummary,
+    AuditEntry,
+    DataQuery,
+    WearableDailyFeatures,
+    RandomizationScheme,
+    AllocationCounter,
 )
+from .tenancy import current_study_id
+
+# --- PAGINATION FOR LARGE TABLES ---
+
+def _fetch_stat(using, sql, params):
+    connection = connections[using]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    return row[0] if row else None
+
+
+def estimated_row_count(model, using='default'):
+    """
+    Returns the planner's row estimate for a table, or None when the backend
+    has no statistics for it (e.g. SQLite before ANALYZE has been run).
+    """
+    vendor = connections[using].vendor
+    table = model._meta.db_table
+    if vendor == 'postgresql':
+        stat = _fetch_stat(using, "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+    elif vendor == 'sqlite':
+        stat = _fetch_stat(using, "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+    else:
+        return None
+    if stat is None:
+        return None
+    estimate = int(str(stat).split()[0])
+    return estimate if estimate >= 0 else None
+
+
+def estimated_study_row_count(model, field_name, study_id, using='default'):
+    """
+    Returns the planner's estimate of one study's rows in a table with its
+    own study column: the value's frequency among the column's most common
+    values on PostgreSQL, the average rows per study of an index leading
+    with the column on SQLite. None without statistics.
+    """
+    vendor = connections[using].vendor
+    table = model._meta.db_table
+    if vendor == 'postgresql':
+        stat = _fetch_stat(
+            using,
+            "SELECT (c.reltuples * s.most_common_freqs["
+            "    array_position(s.most_common_vals::text::bigint[], %s::bigint)])::bigint "
+            "FROM pg_class c JOIN pg_stats s ON s.tablename = c.relname AND s.schemaname = current_schema() "
+            "WHERE c.oid = %s::regclass AND s.attname = %s",
+            [study_id, table, model._meta.get_field(field_name).column],
+        )
+        return int(stat) if stat is not None and stat >= 0 else None
+    if vendor == 'sqlite':
+        index = next((index.name for index in model._meta.indexes if index.fields[0] == field_name), None)
+        stat = index and _fetch_stat(using, "SELECT stat FROM sqlite_stat1 WHERE tbl = %s AND idx = %s", [table, index])
+        values = str(stat).split() if stat else []
+        return int(values[1]) if len(values) > 1 else None
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses the table statistics instead of a full COUNT(*) when the changelist
+    is unfiltered and the table is large. Filtered lists are counted exactly,
+    since they go through an index. Limiting the list to the current study
+    (see study/tenancy.py) does not count as a filter: the estimate is then
+    the study's share of the table.
+    """
+    exact_count_threshold = 100_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        estimate = None
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+        elif queryset.query.where == queryset.model._default_manager.get_queryset().query.where:
+            estimate = self._estimate_study_rows(queryset)
+        if estimate is not None and estimate > self.exact_count_threshold:
+            return estimate
+        return super().count
+
+    def _estimate_study_rows(self, queryset):
+        if Study.objects.count() == 1:
+            return estimated_row_count(queryset.model, queryset.db)
+        study_field = getattr(queryset.model._default_manager, 'study_field', None)
+        if study_field is None or '__' in study_field:
+            return None  # Scoped through a join; count exactly
+        return estimated_study_row_count(queryset.model, study_field, current_study_id(), queryset.db)
+
 
 # --- INLINES FOR BUILDING QUESTIONNAIRES ---
 # This section allows you to create your questionnaires, questions, and choices
@@ -36,6 +138,7 @@ class QuestionInline(admin.TabularInline):
 @admin.register(QuestionnaireTemplate)
 class QuestionnaireTemplateAdmin(admin.ModelAdmin):
     list_display = ('name', 'description')
+    search_fields = ('name',)
     inlines = [QuestionInline]
 
 
@@ -46,6 +149,11 @@ class VisitAssessmentInline(admin.TabularInline):
     """Allows assigning questionnaires directly on the Visit page in the admin."""
     model = VisitAssessment
     extra = 1
+    # An autocomplete widget avoids rendering every template once per inline row.
+    autocomplete_fields = ('questionnaire_template',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).for_list()
 
 # These are for the next step of data entry, but we can prepare them here
 class ClinicalAssessmentInline(admin.StackedInline):
@@ -64,6 +172,12 @@ class NeuroimagingInline(admin.StackedInline):
 class VisitAdmin(admin.ModelAdmin):
     """The main admin page for a visit, showing all related data."""
     list_display = ('participant', 'visit_type', 'visit_date', 'is_complete')
+    list_select_related = ('participant',)
+    list_filter = ('study', 'visit_type', 'is_complete')  # Backed by visit_study_type_idx
+    date_hierarchy = 'visit_date'
+    autocomplete_fields = ('participant',)
+    search_fields = ('^participant__participant_id',)
+    show_full_result_count = False
     inlines = [
         VisitAssessmentInline,
         ClinicalAssessmentInline,
@@ -79,16 +193,126 @@ class VisitInline(admin.TabularInline):
     readonly_fields = ('visit_type', 'visit_date', 'is_complete')
     show_change_link = True # Allows clicking to the full visit page
 
+    def get_queryset(self, request):
+        # Each inline row's title is Visit.__str__, which reads the participant.
+        return super().get_queryset(request).for_list()
+
 @admin.register(Participant)
 class ParticipantAdmin(admin.ModelAdmin):
     """The main admin page for a participant."""
     list_display = ('participant_id', 'status', 'study', 'enrollment_date')
-    list_filter = ('status', 'study')
-    search_fields = ('participant_id',)
+    list_select_related = ('study',)
+    list_filter = ('status', 'study', 'site')
+    search_fields = ('^participant_id',)
+    # Set by randomization; editing it by hand would desynchronize the balance counters.
+    readonly_fields = ('assigned_group_name',)
     inlines = [VisitInline]
+
+    def get_readonly_fields(self, request, obj=None):
+        # Moving a participant to another study moves all their data; not an everyday edit.
+        if obj is not None:
+            return self.readonly_fields + ('study',)
+        return self.readonly_fields
+
     # NOTE: Admin actions for eligibility/enrollment are removed,
     # as this is now handled by the main dashboard buttons.
 
+@admin.register(WearableDataPoint)
+class WearableDataPointAdmin(admin.ModelAdmin):
+    """Tuned for tables with millions of rows."""
+    list_display = ('participant', 'timestamp', 'heart_rate', 'spo2', 'blood_pressure_systolic', 'blood_pressure_diastolic', 'steps_count')
+    list_select_related = ('participant',)
+    date_hierarchy = 'timestamp'
+    raw_id_fields = ('participant',)
+    search_fields = ('=participant__participant_id',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(WearableDailyFeatures)
+class WearableDailyFeaturesAdmin(admin.ModelAdmin):
+    """Read-only: written by manage.py extract_wearable_features."""
+    list_display = ('participant', 'day', 'samples', 'resting_heart_rate', 'night_hrv', 'total_steps', 'step_bouts', 'desaturation_events', 'circadian_amplitude')
+    list_select_related = ('participant',)
+    date_hierarchy = 'day'
+    search_fields = ('=participant__participant_id',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(VisitSummary)
+class VisitSummaryAdmin(admin.ModelAdmin):
+    """Read-only view of the denormalized visit summaries."""
+    list_display = ('visit', 'visit_date', 'clinical_complete', 'biological_complete', 'neuroimaging_complete', 'questionnaires_completed')
+    list_select_related = ('visit__participant',)
+    list_filter = ('visit_type', 'is_complete')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(AuditEntry)
+class AuditEntryAdmin(admin.ModelAdmin):
+    """Read-only view of the append-only audit log."""
+    list_display = ('timestamp', 'action', 'content_type', 'object_id', 'visit_id', 'user')
+    list_select_related = ('content_type', 'user')
+    list_filter = ('action', 'content_type')
+    search_fields = ('=visit_id', '=object_id')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(DataQuery)
+class DataQueryAdmin(admin.ModelAdmin):
+    """Discrepancies raised by the validation sweep (manage.py validate_study_data)."""
+    list_display = ('rule', 'model_name', 'object_id', 'participant', 'value', 'status', 'last_seen_at')
+    list_select_related = ('participant',)
+    list_filter = ('status', 'rule', 'model_name')
+    search_fields = ('^participant__participant_id',)
+    readonly_fields = ('rule', 'model_name', 'object_id', 'participant', 'visit', 'description', 'value', 'first_seen_at', 'last_seen_at')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+
+# --- Randomization ---
+
+class AllocationCounterInline(admin.TabularInline):
+    model = AllocationCounter
+    fields = ('factor', 'level', 'arm', 'count')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+    ordering = ('factor', 'level', 'arm')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RandomizationScheme)
+class RandomizationSchemeAdmin(admin.ModelAdmin):
+    """Counters are shown read-only: they are maintained by study/randomization.py."""
+    list_display = ('study', 'method')
+    inlines = [AllocationCounterInline]
+
+
 # --- Simple registrations for other models ---
 admin.site.register(Study)
-admin.site.register(WearableDataPoint)
\ No newline at end of file
+admin.site.register(ReportUpload)
+admin.site.register(ScheduledVisit)
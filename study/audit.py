@@ -0,0 +1,223 @@
+# study/audit.py
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from weakref import WeakKeyDictionary
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import router, transaction
+from django.db.models import FileField
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+
+from .models import AuditEntry
+
+# The current request, set by AuditUserMiddleware. The request is stored
+# rather than its lazy `user`, which asgiref would evaluate (and query the
+# database for) while copying contexts into async views.
+_current_request = ContextVar('audit_request', default=None)
+
+# Entries collected inside batch(); None outside one.
+_pending = ContextVar('audit_pending', default=None)
+
+# connection -> (its run_on_commit list, savepoint ids, _OnCommit) for the
+# entries last queued in a transaction on that connection.
+_queued = WeakKeyDictionary()
+
+
+class AuditUserMiddleware:
+    """Remembers request.user so audit entries can name who made a change."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+
+@contextmanager
+def batch():
+    """
+    Runs the block in a transaction and writes every audit entry it produces
+    with a single INSERT just before the transaction commits. Nested batches
+    join the outer one.
+    """
+    if _pending.get() is not None:
+        yield
+        return
+    entries = []
+    token = _pending.set(entries)
+    try:
+        with transaction.atomic():
+            yield
+            AuditEntry.objects.bulk_create(entries)
+    finally:
+        _pending.reset(token)
+
+
+# --- Recording changes ---
+
+def _audited_fields(instance):
+    """Audited fields that are loaded; fields deferred with only()/defer() are left out."""
+    exclude = set(instance.audit_exclude) | {instance._meta.pk.attname} | instance.get_deferred_fields()
+    return [field for field in instance._meta.concrete_fields if field.attname not in exclude]
+
+
+def _value(field, value):
+    """
+    The value as logged. A file is logged by name, and an empty file field
+    (stored as '') as None, whether it comes from the database or the instance.
+    """
+    if isinstance(field, FileField):
+        value = value.name if isinstance(value, FieldFile) else value
+        return value or None
+    return value
+
+
+def _snapshot(instance):
+    return {field.attname: _value(field, getattr(instance, field.attname)) for field in _audited_fields(instance)}
+
+
+def _visit_id(instance):
+    if hasattr(instance, 'visit_id'):
+        return instance.visit_id
+    return instance.visit_assessment.visit_id  # Answer
+
+
+def _user_id():
+    user = getattr(_current_request.get(), 'user', None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def _record(instance, action, changes):
+    entry = AuditEntry(
+        content_type=ContentType.objects.get_for_model(instance),
+        object_id=instance.pk,
+        visit_id=_visit_id(instance),
+        action=action,
+        changes=changes,
+        timestamp=timezone.now(),
+        user_id=_user_id(),
+    )
+    pending = _pending.get()
+    if pending is not None:
+        pending.append(entry)
+    else:
+        _write_on_commit(entry)
+
+
+class _OnCommit:
+    """on_commit callback writing the entries queued in one savepoint with one INSERT."""
+
+    def __init__(self, using):
+        self.using = using
+        self.entries = []
+        self.written = False
+
+    def __call__(self):
+        AuditEntry.objects.using(self.using).bulk_create(self.entries)
+        self.written = True
+
+
+def _write_on_commit(entry):
+    """
+    Saves the entry now outside a transaction. Inside one, queues it to be
+    written with the other entries of the transaction once it commits.
+
+    Entries are grouped by savepoint so Django drops a group with its
+    callback when that savepoint rolls back. A rollback or commit replaces
+    the connection's run_on_commit list, which tells a queued group still
+    waiting for this transaction from one left over from an earlier one.
+    """
+    using = router.db_for_write(AuditEntry)
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        entry.save(using=using)
+        return
+    savepoints = tuple(connection.savepoint_ids)
+    run_on_commit, queued_savepoints, callback = _queued.get(connection, (None, None, None))
+    if run_on_commit is not connection.run_on_commit or queued_savepoints != savepoints or callback.written:
+        callback = _OnCommit(using)
+        connection.on_commit(callback)
+        _queued[connection] = (connection.run_on_commit, savepoints, callback)
+    callback.entries.append(entry)
+
+
+def record_save(instance, created):
+    """Logs the fields that changed since the instance was loaded (or all of them, for a new row)."""
+    current = _snapshot(instance)
+    previous = getattr(instance, '_audit_snapshot', None)
+    if created:
+        changes = {name: [None, value] for name, value in current.items() if value is not None}
+        action = AuditEntry.Action.CREATE
+    else:
+        previous = previous or {}
+        fields = {field.attname: field for field in _audited_fields(instance)}
+        previous = {name: _value(fields[name], value) for name, value in previous.items() if name in fields}
+        changes = {
+            name: [previous.get(name), value] for name, value in current.items()
+            if name not in previous or previous[name] != value
+        }
+        action = AuditEntry.Action.UPDATE
+    instance._audit_snapshot = current
+    if changes:
+        _record(instance, action, changes)
+
+
+def record_delete(instance):
+    current = _snapshot(instance)
+    _record(instance, AuditEntry.Action.DELETE, {name: [value, None] for name, value in current.items()})
+
+
+def record_bulk(instances, created):
+    """Logs rows written with bulk_create()/bulk_update(), which send no signals."""
+    for instance in instances:
+        record_save(instance, created)
+
+
+# --- Point-in-time queries ---
+
+def history(model, object_id):
+    """Audit entries of one row, oldest first (uses audit_object_ts_idx)."""
+    return AuditEntry.objects.filter(
+        content_type=ContentType.objects.get_for_model(model), object_id=object_id
+    ).order_by('timestamp', 'id')
+
+
+def _replay(entries):
+    state = None
+    for entry in entries:
+        if entry.action == AuditEntry.Action.DELETE:
+            state = None
+            continue
+        if entry.action == AuditEntry.Action.CREATE or state is None:
+            state = {}
+        state.update({name: new for name, (old, new) in entry.changes.items()})
+    return state
+
+
+def state_at(model, object_id, when):
+    """The audited field values of a row as of `when`, or None if it did not exist then."""
+    return _replay(history(model, object_id).filter(timestamp__lte=when).only('action', 'changes'))
+
+
+def visit_state_at(visit_id, when):
+    """
+    Every audited row of a visit as of `when`, as {model class: {object id: values}}.
+    Rows that had been deleted by then are left out (uses audit_visit_ts_idx).
+    """
+    entries = AuditEntry.objects.filter(visit_id=visit_id, timestamp__lte=when).order_by('timestamp', 'id')
+    grouped = {}
+    for entry in entries.only('content_type', 'object_id', 'action', 'changes'):
+        grouped.setdefault((entry.content_type_id, entry.object_id), []).append(entry)
+    result = {}
+    for (content_type_id, object_id), object_entries in grouped.items():
+        state = _replay(object_entries)
+        if state is not None:
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+            result.setdefault(model, {})[object_id] = state
+    return result
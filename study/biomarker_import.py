@@ -0,0 +1,130 @@
+# study/biomarker_import.py
+
+import csv
+import io
+
+from django.forms.models import model_to_dict
+from django.utils import timezone
+
+from . import audit, reports, search, summaries
+from .forms import BiologicalSampleForm
+from .models import Visit, BiologicalSample
+
+KEY_COLUMNS = ('participant_id', 'visit_type')
+RESULT_COLUMNS = ('gfap', 'nfl', 'abeta40_42_ratio', 'ptau217', 'initial_blood_screening_summary')
+
+# Keeps IN (...) lists well below the SQLite parameter limit.
+LOOKUP_CHUNK = 500
+
+
+class RowResult:
+    """Outcome of one spreadsheet row: 'create', 'update', 'unchanged' or 'error'."""
+    def __init__(self, line, participant_id, visit_type):
+        self.line = line
+        self.participant_id = participant_id
+        self.visit_type = visit_type
+        self.action = 'unchanged'
+        self.changes = {}  # field -> (old, new)
+        self.errors = []
+
+
+def read_rows(binary_file):
+    """Reads a CSV export of the lab spreadsheet into a list of dicts with lower-case headers."""
+    reader = csv.DictReader(io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline=''))
+    return [
+        {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+        for row in reader
+    ]
+
+
+def _visit_type_code(value):
+    labels = {label.lower(): code for code, label in Visit.VisitType.choices}
+    value = value.strip()
+    return value.upper() if value.upper() in Visit.VisitType.values else labels.get(value.lower(), value)
+
+
+def _blank_to_none(value):
+    # Text fields clean to '' while the database holds NULL.
+    return None if value == '' else value
+
+
+def import_biomarkers(rows, dry_run=False):
+    """
+    Validates every row with the BiologicalSampleForm rules and upserts the
+    results with one bulk_create and one bulk_update. Blank cells leave the
+    stored value unchanged. Nothing is written when any row fails validation
+    or when dry_run is set; the returned RowResults describe what would change.
+    """
+    results = [
+        RowResult(line, row.get('participant_id', '').upper(), _visit_type_code(row.get('visit_type', '')))
+        for line, row in enumerate(rows, start=2)  # Line 1 holds the headers.
+    ]
+
+    # Resolve every (participant_id, visit_type) key and its current sample up front.
+    participant_ids = sorted({result.participant_id for result in results})
+    visits, samples = {}, {}
+    for i in range(0, len(participant_ids), LOOKUP_CHUNK):
+        chunk = participant_ids[i:i + LOOKUP_CHUNK]
+        for visit_id, participant_id, visit_type in Visit.objects.filter(
+            participant__participant_id__in=chunk
+        ).values_list('id', 'participant__participant_id', 'visit_type'):
+            visits[participant_id, visit_type] = visit_id
+    visit_ids = list(visits.values())
+    for i in range(0, len(visit_ids), LOOKUP_CHUNK):
+        for sample in BiologicalSample.objects.filter(visit_id__in=visit_ids[i:i + LOOKUP_CHUNK]):
+            samples[sample.visit_id] = sample
+
+    to_create, to_update, seen = {}, {}, set()
+    for result, row in zip(results, rows):
+        key = (result.participant_id, result.visit_type)
+        visit_id = visits.get(key)
+        if visit_id is None:
+            result.action = 'error'
+            result.errors.append(f"No {result.visit_type or 'visit'} visit found for participant '{result.participant_id}'.")
+            continue
+        if key in seen:
+            result.action = 'error'
+            result.errors.append("This visit appears more than once in the file.")
+            continue
+        seen.add(key)
+
+        instance = samples.get(visit_id) or BiologicalSample(visit_id=visit_id)
+        before = model_to_dict(instance, fields=RESULT_COLUMNS)
+        data = dict(before)
+        data.update({column: row[column] for column in RESULT_COLUMNS if row.get(column)})
+        form = BiologicalSampleForm(data=data, instance=instance)
+        if not form.is_valid():
+            result.action = 'error'
+            result.errors.extend(f"{field}: {' '.join(errors)}" for field, errors in form.errors.items())
+            continue
+
+        result.changes = {
+            field: (before[field], form.cleaned_data[field])
+            for field in RESULT_COLUMNS if _blank_to_none(before[field]) != _blank_to_none(form.cleaned_data[field])
+        }
+        if instance.pk is None:
+            result.action = 'create'
+            to_create[visit_id] = form.instance
+        elif result.changes:
+            result.action = 'update'
+            to_update[visit_id] = form.instance
+
+    if dry_run or any(result.action == 'error' for result in results):
+        return results
+
+    now = timezone.now()
+    with audit.batch():
+        BiologicalSample.objects.bulk_create(to_create.values(), batch_size=LOOKUP_CHUNK)
+        for sample in to_update.values():
+            sample.updated_at = now  # bulk_update() does not apply auto_now.
+        BiologicalSample.objects.bulk_update(
+            to_update.values(), fields=[*RESULT_COLUMNS, 'updated_at'], batch_size=LOOKUP_CHUNK
+        )
+        # Bulk writes skip the post_save signals, so log the changes and refresh
+        # the search index and visit summaries here.
+        audit.record_bulk(to_create.values(), created=True)
+        audit.record_bulk(to_update.values(), created=False)
+        search.index_instances([*to_create.values(), *to_update.values()])
+        summaries.refresh_visit_summaries([*to_create, *to_update])
+        reports.touch_visit_studies([*to_create, *to_update])
+    return results
@@ -0,0 +1,84 @@
+# study/exports.py
+
+import csv
+import io
+import json
+import zlib
+
+from .models import WearableDataPoint, WearableDataPointQuerySet
+
+# Rows fetched per round trip. On PostgreSQL .iterator() reads through a
+# server-side cursor, so only one chunk is held in memory at a time.
+CHUNK_SIZE = 5000
+
+# Compressed output is flushed to the client in blocks of about this size.
+FLUSH_SIZE = 64 * 1024
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def wearable_rows(participant, start=None, end=None, metrics=None):
+    """
+    Yields (timestamp, <metric>, ...) tuples for one participant in time
+    order, walking the (participant, timestamp) index. `end` is exclusive.
+    """
+    metrics = list(metrics or WearableDataPointQuerySet.METRIC_FIELDS)
+    data = WearableDataPoint.objects.filter(participant=participant)
+    if start:
+        data = data.filter(timestamp__gte=start)
+    if end:
+        data = data.filter(timestamp__lt=end)
+    return data.order_by('timestamp').values_list('timestamp', *metrics).iterator(chunk_size=CHUNK_SIZE)
+
+
+def _csv_lines(rows, metrics):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(['timestamp', *metrics])
+    for row in rows:
+        writer.writerow([row[0].isoformat(), *row[1:]])
+        if buffer.tell() >= FLUSH_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_lines(rows, metrics):
+    keys = ['timestamp', *metrics]
+    encode = json.JSONEncoder(separators=(',', ':')).encode
+    lines = []
+    size = 0
+    for row in rows:
+        line = encode(dict(zip(keys, (row[0].isoformat(), *row[1:]))))
+        lines.append(line)
+        size += len(line) + 1
+        if size >= FLUSH_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines, size = [], 0
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def gzip_stream(chunks):
+    """Compresses an iterable of text chunks into a single gzip member, block by block."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode())
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_wearable_data(participant, fmt='csv', start=None, end=None, metrics=None):
+    """
+    Returns an iterator of gzip-compressed bytes with the participant's
+    wearable history as CSV or NDJSON, suitable for a StreamingHttpResponse.
+    """
+    metrics = list(metrics or WearableDataPointQuerySet.METRIC_FIELDS)
+    rows = wearable_rows(participant, start, end, metrics)
+    lines = _ndjson_lines(rows, metrics) if fmt == 'ndjson' else _csv_lines(rows, metrics)
+    return gzip_stream(lines)
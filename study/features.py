@@ -0,0 +1,191 @@
+# study/features.py
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+import django
+import numpy as np
+from django.db import connections
+from django.db.models import Max
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import WearableDailyFeatures, WearableDataPoint, WearableDataPointQuerySet, WearableFeatureRun
+
+COLUMNS = ('heart_rate', 'hrv', 'spo2', 'steps_count')
+FEATURE_FIELDS = [
+    'samples', 'resting_heart_rate', 'night_hrv', 'total_steps', 'step_bouts', 'active_minutes',
+    'desaturation_events', 'circadian_amplitude', 'computed_at',
+]
+
+# Participant-days read and computed per task handed to a worker process.
+DAYS_PER_TASK = 31
+
+NIGHT_END_MINUTE = 6 * 60
+# Consecutive stepping samples further apart than this end a bout.
+BOUT_MAX_GAP_MINUTES = 5
+BOUT_MIN_MINUTES = 10
+DESATURATION_DROP = 3
+# A cosinor fit needs readings spread over most of the day.
+CIRCADIAN_MIN_SPAN_MINUTES = 18 * 60
+MIN_READINGS = 10
+
+
+# --- Features of one day (pure NumPy, shared by every worker) ---
+
+def _plausible(values, field):
+    low, high = WearableDataPointQuerySet.PLAUSIBLE_RANGES[field]
+    return (values >= low) & (values <= high)
+
+
+def _runs(mask):
+    """(starts, ends) index arrays of the runs of True in a boolean array; ends are inclusive."""
+    edges = np.diff(np.concatenate(([False], mask, [False])).astype(np.int8))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+
+
+def day_features(minutes, columns):
+    """
+    Features of one participant-day. `minutes` are the sample times in
+    minutes since local midnight, in ascending order; `columns` maps each of
+    COLUMNS to a float array with NaN for missing readings.
+    """
+    hr, hrv, spo2, steps = (columns[name] for name in COLUMNS)
+    features = {'samples': len(minutes)}
+
+    with np.errstate(invalid='ignore'):
+        has_hr = _plausible(hr, 'heart_rate')
+        features['resting_heart_rate'] = (
+            float(np.percentile(hr[has_hr], 10)) if has_hr.sum() >= MIN_READINGS else None
+        )
+
+        night_hrv = hrv[(minutes < NIGHT_END_MINUTE) & (hrv > 0)]
+        features['night_hrv'] = float(np.median(night_hrv)) if len(night_hrv) else None
+
+        has_steps = ~np.isnan(steps)
+        features['total_steps'] = int(steps[has_steps].sum()) if has_steps.any() else None
+        # A bout is a run of samples with steps, none more than BOUT_MAX_GAP_MINUTES apart.
+        stepping = np.flatnonzero(steps > 0)
+        breaks = (np.diff(stepping) != 1) | (np.diff(minutes[stepping]) > BOUT_MAX_GAP_MINUTES)
+        starts = np.concatenate(([0], np.flatnonzero(breaks) + 1)) if len(stepping) else np.array([], dtype=int)
+        ends = np.concatenate((starts[1:] - 1, [len(stepping) - 1])) if len(stepping) else starts
+        durations = minutes[stepping[ends]] - minutes[stepping[starts]]
+        bouts = durations[durations >= BOUT_MIN_MINUTES]
+        features['step_bouts'] = len(bouts)
+        features['active_minutes'] = float(bouts.sum())
+
+        has_spo2 = _plausible(spo2, 'spo2')
+        saturation = spo2[has_spo2]
+        if len(saturation):
+            below = saturation <= np.median(saturation) - DESATURATION_DROP
+            features['desaturation_events'] = len(_runs(below)[0])
+        else:
+            features['desaturation_events'] = 0
+
+        # Cosinor: hr ~ mesor + a*cos(wt) + b*sin(wt), amplitude = hypot(a, b).
+        t = minutes[has_hr]
+        if has_hr.sum() >= MIN_READINGS and np.ptp(t) >= CIRCADIAN_MIN_SPAN_MINUTES:
+            angle = 2 * np.pi * t / (24 * 60)
+            design = np.column_stack((np.ones_like(angle), np.cos(angle), np.sin(angle)))
+            (mesor, a, b), *_ = np.linalg.lstsq(design, hr[has_hr], rcond=None)
+            features['circadian_amplitude'] = float(np.hypot(a, b))
+        else:
+            features['circadian_amplitude'] = None
+    return features
+
+
+# --- Extracting participant-days ---
+
+def _day_start(day):
+    """Local midnight of `day` as a naive UTC datetime64, matching WearableDataPointQuerySet.as_arrays()."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return np.datetime64(start.astimezone(dt_timezone.utc).replace(tzinfo=None), 'us')
+
+
+def extract_days(participant_id, study_id, days, computed_at):
+    """
+    Reads the samples of a participant's `days` with one query, computes each
+    day's features and upserts them. Returns the number of days written.
+    Runs in worker processes.
+    """
+    days = sorted(days)
+    starts = [_day_start(day) for day in days] + [_day_start(days[-1] + timedelta(days=1))]
+    arrays = WearableDataPoint.objects.filter(
+        participant_id=participant_id,
+        timestamp__gte=timezone.make_aware(datetime.combine(days[0], time.min)),
+        timestamp__lt=timezone.make_aware(datetime.combine(days[-1] + timedelta(days=1), time.min)),
+    ).order_by('timestamp').as_arrays(*COLUMNS)
+
+    # Every sample falls between two day starts; split the arrays there.
+    bounds = np.searchsorted(arrays['timestamp'], starts)
+    rows = []
+    for day, start, low, high in zip(days, starts, bounds, bounds[1:]):
+        if low == high:
+            continue  # The day's samples were deleted since.
+        minutes = (arrays['timestamp'][low:high] - start) / np.timedelta64(1, 'm')
+        features = day_features(minutes, {name: arrays[name][low:high] for name in COLUMNS})
+        rows.append(WearableDailyFeatures(
+            participant_id=participant_id, study_id=study_id, day=day, computed_at=computed_at, **features
+        ))
+    WearableDailyFeatures.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['participant', 'day'],
+        update_fields=FEATURE_FIELDS,
+    )
+    return len(rows)
+
+
+def _changed_days(after_id, through_id):
+    """{(participant id, study id): [days]} with samples whose id lies in (after_id, through_id]."""
+    changed = (
+        WearableDataPoint._base_manager.filter(id__gt=after_id, id__lte=through_id)
+        .annotate(day=TruncDate('timestamp'))
+        .values_list('participant_id', 'study_id', 'day')
+        .distinct()
+        .order_by()
+    )
+    by_participant = {}
+    for participant_id, study_id, day in changed:
+        by_participant.setdefault((participant_id, study_id), []).append(day)
+    return by_participant
+
+
+def _init_worker():
+    # Needed with the 'spawn' start method; a no-op for forked workers.
+    django.setup()
+
+
+def run_extraction(workers=1, full=False):
+    """
+    Computes the features of every participant-day that received samples
+    since the last finished run (every day, with `full`), spread over
+    `workers` processes. Returns the WearableFeatureRun.
+
+    Sample ids only grow, so "new since the last run" is an id range scan
+    on the primary key, and the cost follows the amount of new data rather
+    than the history. A sample committed late with an id below the mark is
+    picked up by the next `full` run.
+    """
+    last_run = WearableFeatureRun.objects.filter(finished_at__isnull=False).order_by('-through_point_id').first()
+    after_id = 0 if full or last_run is None else last_run.through_point_id
+    through_id = WearableDataPoint._base_manager.aggregate(high=Max('id'))['high'] or 0
+    run = WearableFeatureRun.objects.create(started_at=timezone.now(), through_point_id=through_id)
+
+    tasks = [
+        (participant_id, study_id, days[start:start + DAYS_PER_TASK], run.started_at)
+        for (participant_id, study_id), days in _changed_days(after_id, through_id).items()
+        for days in [sorted(days)]
+        for start in range(0, len(days), DAYS_PER_TASK)
+    ]
+    if workers > 1 and len(tasks) > 1:
+        # Forked workers must not share the parent's database connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            run.days_processed = sum(pool.map(extract_days, *zip(*tasks)))
+    else:
+        run.days_processed = sum(extract_days(*task) for task in tasks)
+
+    run.finished_at = timezone.now()
+    run.save(update_fields=['days_processed', 'finished_at'])
+    return run
@@ -0,0 +1,57 @@
+# study/fields.py
+
+from django import forms
+from django.core import exceptions
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class ScaledIntegerField(models.Field):
+    """
+    Stores a fixed-precision measurement as a small integer, e.g. an SpO2 of
+    97.25 % is kept as 9725 with scale=100.
+
+    Python code always sees the real value (a float). Note that database-side
+    expressions such as Avg() operate on the stored integer, so divide their
+    result by ``scale``.
+    """
+    default_error_messages = {
+        'invalid': _('“%(value)s” value must be a number.'),
+    }
+
+    def __init__(self, *args, scale=100, **kwargs):
+        self.scale = scale
+        super().__init__(*args, **kwargs)
+
+    def get_internal_type(self):
+        # Same column type as SmallIntegerField, but without the integer
+        # lookups that would round a float like 97.25 before it is scaled.
+        return 'SmallIntegerField'
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['scale'] = self.scale
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return value / self.scale
+
+    def to_python(self, value):
+        if value is None or value == '':
+            return None
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise exceptions.ValidationError(
+                self.error_messages['invalid'], code='invalid', params={'value': value}
+            )
+
+    def get_prep_value(self, value):
+        if value is None or value == '':
+            return None
+        return round(float(value) * self.scale)
+
+    def formfield(self, **kwargs):
+        return super().formfield(**{'form_class': forms.FloatField, **kwargs})
@@ -2,13 +2,16 @@ from django import forms
 # This import section brings the model names into this file
 from .models import (
     Participant,
+    Visit,
     Study,
     ClinicalAssessment,
     BiologicalSample,
     Neuroimaging,
     Question,
-    Choice
+    Choice,
+    WearableDataPointQuerySet
 )
+from .tenancy import current_study_id
 from django.utils import timezone
 
 class ParticipantCreationForm(forms.ModelForm):
@@ -16,13 +19,18 @@ class ParticipantCreationForm(forms.ModelForm):
 
     class Meta:
         model = Participant
-        fields = ['study', 'date_of_birth', 'gender']
+        fields = ['study', 'date_of_birth', 'gender', 'site']
         widgets = {
             'date_of_birth': forms.DateInput(attrs={'type': 'date'}),
         }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # Within a selected study, new participants can only join that study.
+        study_id = current_study_id()
+        if study_id is not None:
+            self.fields['study'].queryset = Study.objects.filter(pk=study_id)
+            self.fields['study'].initial = study_id
         for field_name, field in self.fields.items():
             field.widget.attrs['class'] = 'form-control'
 
@@ -79,4 +87,71 @@ class NeuroimagingForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         for field_name, field in self.fields.items():
-            field.widget.attrs['class'] = 'form-control'
\ No newline at end of file
+            field.widget.attrs['class'] = 'form-control'
+
+
+# --- SEARCH FORM ---
+
+class SearchForm(forms.Form):
+    q = forms.CharField(required=False, label="Findings contain")
+    participant_id = forms.CharField(required=False, label="Participant ID starts with")
+    status = forms.ChoiceField(choices=[('', 'Any status')] + Participant.Status.choices, required=False)
+    arm = forms.CharField(required=False, label="Arm")
+    visit_type = forms.ChoiceField(choices=[('', 'Any visit')] + Visit.VisitType.choices, required=False)
+    visit_complete = forms.TypedChoiceField(
+        choices=[('', 'Any state'), ('1', 'Complete'), ('0', 'Not complete')],
+        coerce=lambda value: value == '1',
+        empty_value=None,
+        required=False,
+        label="Visit state",
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field_name, field in self.fields.items():
+            field.widget.attrs['class'] = 'form-select' if isinstance(field, forms.ChoiceField) else 'form-control'
+
+    def has_structured_filters(self):
+        data = self.cleaned_data
+        return any([data['participant_id'], data['status'], data['arm'], data['visit_type'], data['visit_complete'] is not None])
+
+
+
+# --- BATCH IMPORT FORM ---
+
+class BiomarkerImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV with participant_id, visit_type and any of gfap, nfl, abeta40_42_ratio, ptau217.")
+    dry_run = forms.BooleanField(required=False, initial=True, label="Dry run (show changes without saving)")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['file'].widget.attrs['class'] = 'form-control'
+        self.fields['dry_run'].widget.attrs['class'] = 'form-check-input'
+
+
+# --- WEARABLE EXPORT FORM ---
+
+class WearableExportForm(forms.Form):
+    format = forms.ChoiceField(choices=[('csv', 'CSV'), ('ndjson', 'NDJSON')], initial='csv', required=False)
+    start = forms.DateTimeField(required=False, label="From", widget=forms.DateTimeInput(attrs={'type': 'datetime-local'}))
+    end = forms.DateTimeField(required=False, label="Until", widget=forms.DateTimeInput(attrs={'type': 'datetime-local'}))
+    metrics = forms.MultipleChoiceField(
+        choices=[(name, name.replace('_', ' ').title()) for name in WearableDataPointQuerySet.METRIC_FIELDS],
+        required=False,
+        help_text="Leave empty to export every metric.",
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field_name, field in self.fields.items():
+            field.widget.attrs['class'] = 'form-select' if isinstance(field, forms.ChoiceField) else 'form-control'
+
+    def clean_format(self):
+        return self.cleaned_data['format'] or 'csv'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get('start'), cleaned_data.get('end')
+        if start and end and start >= end:
+            raise forms.ValidationError("'From' must be before 'Until'.")
+        return cleaned_data
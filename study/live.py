@@ -0,0 +1,231 @@
+# study/live.py
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from datetime import timezone as dt_timezone
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Max
+
+from .models import WearableDataPoint, WearableDataPointQuerySet
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per open stream; a client that falls further behind loses
+# the oldest ones (it still gets the latest tiles with the next event).
+QUEUE_SIZE = 100
+
+# Seconds between keep-alive comments, so proxies do not close idle streams.
+KEEPALIVE = 15
+
+# Seconds between the process-wide database checks for samples stored by
+# other processes (add_wearable_data, other server workers), which the
+# broker never sees.
+POLL_INTERVAL = 5
+
+# Samples sent to a reconnecting client that missed events, and published
+# by one database check.
+CATCH_UP_LIMIT = 1000
+
+
+class Broker:
+    """
+    In-process fan-out of wearable events to the streams watching each
+    participant. Every stream owns an asyncio.Queue of (newest sample id,
+    message) pairs; publishing may happen from any thread and costs nothing
+    for participants nobody is watching.
+
+    While any stream is open, one poller thread per process publishes the
+    samples other processes store (see publish_stored).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # participant id -> {(loop, queue), ...}
+        self._poller = None
+
+    def subscribe(self, participant_id):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=QUEUE_SIZE))
+        with self._lock:
+            self._subscribers.setdefault(participant_id, set()).add(subscriber)
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll, name='wearable-poller', daemon=True)
+                self._poller.start()
+        return subscriber
+
+    def unsubscribe(self, participant_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(participant_id)
+            if subscribers:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[participant_id]
+
+    def watched(self, participant_ids):
+        """The subset of `participant_ids` with at least one open stream."""
+        return {pid for pid in participant_ids if pid in self._subscribers}
+
+    def publish(self, participant_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(participant_id, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_offer, queue, event)
+
+    def _poll(self):
+        """The poller thread; it ends when the last stream closes."""
+        try:
+            since = None
+            while True:
+                with self._lock:
+                    if not self._subscribers:
+                        return
+                    watched = set(self._subscribers)
+                try:
+                    since = publish_stored(watched, since)
+                except DatabaseError:
+                    logger.exception("Could not check for new wearable samples")
+                time.sleep(POLL_INTERVAL)
+        finally:
+            connections.close_all()
+            with self._lock:
+                self._poller = None
+
+
+def _offer(queue, event):
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+broker = Broker()
+
+
+# --- Publishing ---
+
+def serialize_point(point):
+    sample = {
+        'id': point.pk,
+        'timestamp': point.timestamp.astimezone(dt_timezone.utc).isoformat(),
+    }
+    for name in WearableDataPointQuerySet.METRIC_FIELDS:
+        sample[name] = getattr(point, name)
+    return sample
+
+
+def newest_id(points):
+    return max((point['id'] for point in points if point['id'] is not None), default=None)
+
+
+def format_event(points, tiles):
+    """One SSE message. Its id is the newest sample's, for Last-Event-ID on reconnect."""
+    data = json.dumps({'points': points, 'tiles': tiles}, cls=DjangoJSONEncoder, separators=(',', ':'))
+    last_id = newest_id(points)
+    event_id = f"id: {last_id}\n" if last_id is not None else ""
+    return f"{event_id}event: wearables\ndata: {data}\n\n"
+
+
+def publish_points(points):
+    """
+    Called on ingestion (see signals.py) with newly created WearableDataPoints.
+    After the transaction commits, each watched participant gets one event with
+    the new samples and the refreshed tiles, computed once for all its streams.
+    """
+    watched = broker.watched({point.participant_id for point in points})
+    if not watched:
+        return
+    by_participant = {}
+    for point in points:
+        if point.participant_id in watched:
+            by_participant.setdefault(point.participant_id, []).append(serialize_point(point))
+
+    transaction.on_commit(partial(_publish, by_participant))
+
+
+def publish_stored(participant_ids, since):
+    """
+    Publishes the samples of `participant_ids` stored after sample id `since`
+    and returns the id to pass next time. One aggregate over the primary key
+    tells whether anything was stored at all; a first call (`since` None)
+    only sets the mark. Samples this process published already are dropped
+    by the streams.
+    """
+    high = WearableDataPoint.objects.aggregate(high=Max('id'))['high'] or 0
+    if since is None or high <= since:
+        return high if since is None else max(since, high)
+    points = WearableDataPoint.objects.filter(
+        participant_id__in=participant_ids, id__gt=since, id__lte=high,
+    ).order_by('-id')[:CATCH_UP_LIMIT]
+    by_participant = {}
+    for point in points:
+        by_participant.setdefault(point.participant_id, []).append(serialize_point(point))
+    _publish(by_participant)
+    return high
+
+
+def _publish(by_participant):
+    """One event per participant with its samples and tiles, computed once for all its streams."""
+    for participant_id, samples in by_participant.items():
+        samples.sort(key=lambda sample: sample['timestamp'])
+        tiles = WearableDataPoint.objects.filter(participant_id=participant_id).tiles()
+        broker.publish(participant_id, (newest_id(samples), format_event(samples, tiles)))
+
+
+# --- Streaming ---
+
+async def _catch_up(participant_id, last_event_id):
+    """(newest id, message) with the samples stored after `last_event_id`, or None."""
+    points = WearableDataPoint.objects.filter(participant_id=participant_id, id__gt=last_event_id).order_by('id')
+    samples = [serialize_point(point) async for point in points[:CATCH_UP_LIMIT]]
+    if not samples:
+        return None
+    samples.sort(key=lambda sample: sample['timestamp'])
+    tiles = await sync_to_async(WearableDataPoint.objects.filter(participant_id=participant_id).tiles)()
+    return newest_id(samples), format_event(samples, tiles)
+
+
+async def _latest_id(participant_id):
+    latest = await WearableDataPoint.objects.filter(participant_id=participant_id).aaggregate(high=Max('id'))
+    return latest['high'] or 0
+
+
+async def wearable_events(participant_id, last_event_id=None):
+    """
+    Async iterator of SSE messages for one participant's dashboard.
+
+    Events arrive through the broker, both from ingestion in this process
+    and from the process-wide poller; the stream itself only reads the
+    database once, to catch up a reconnecting page. Sample ids only grow, so
+    an event no newer than the last one sent is skipped; a sample committed
+    late with a lower id shows on reload.
+    """
+    subscriber = broker.subscribe(participant_id)
+    queue = subscriber[1]
+    try:
+        # Subscribed first, so nothing falls between the query and the queue;
+        # the page drops samples it has already seen.
+        if last_event_id is None:
+            last_id = await _latest_id(participant_id)
+            event = None
+        else:
+            last_id = last_event_id
+            event = await _catch_up(participant_id, last_id)
+        yield "retry: 5000\n\n"
+        while True:
+            if event is not None:
+                event_id, message = event
+                if event_id is None or event_id > last_id:
+                    last_id = max(last_id, event_id or 0)
+                    yield message
+            try:
+                event = await asyncio.wait_for(queue.get(), KEEPALIVE)
+            except asyncio.TimeoutError:
+                event = None
+                yield ": keep-alive\n\n"
+    finally:
+        broker.unsubscribe(participant_id, subscriber)
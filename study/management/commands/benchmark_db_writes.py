@@ -0,0 +1,77 @@
+import threading
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+from study.models import Study, Participant, WearableDataPoint
+
+class Command(BaseCommand):
+    help = ('Measures concurrent write throughput of the configured database: several threads save '
+            'single-row transactions (like clinicians saving forms) while one thread bulk-inserts '
+            '(like wearable ingestion). Compare DATABASE_PROFILE settings with it.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help='Number of form-saving threads.')
+        parser.add_argument('--seconds', type=float, default=10, help='How long to run.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per ingestion batch.')
+
+    def handle(self, *args, **options):
+        study = Study.objects.create(name=f'Benchmark {timezone.now().isoformat()}', start_date=date.today())
+        participant = Participant.objects.create(study=study, date_of_birth=date(1950, 1, 1), gender='OTHER')
+        self.stdout.write(f"Using {connection.vendor} ({connection.settings_dict['NAME']}), "
+                          f"{options['writers']} writers + 1 ingester for {options['seconds']} s...")
+
+        deadline = time.monotonic() + options['seconds']
+        counts = {'form_saves': 0, 'ingested_rows': 0, 'lock_errors': 0}
+        lock = threading.Lock()
+
+        def record(key, amount=1):
+            with lock:
+                counts[key] += amount
+
+        def form_writer():
+            try:
+                while time.monotonic() < deadline:
+                    try:
+                        with transaction.atomic():
+                            WearableDataPoint.objects.create(participant=participant, timestamp=timezone.now(), heart_rate=70)
+                        record('form_saves')
+                    except OperationalError:
+                        record('lock_errors')
+            finally:
+                connection.close()
+
+        def ingester():
+            try:
+                while time.monotonic() < deadline:
+                    now = timezone.now()
+                    batch = [WearableDataPoint(participant=participant, timestamp=now, steps_count=i)
+                             for i in range(options['batch_size'])]
+                    try:
+                        with transaction.atomic():
+                            WearableDataPoint.objects.bulk_create(batch)
+                        record('ingested_rows', len(batch))
+                    except OperationalError:
+                        record('lock_errors')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=form_writer) for _ in range(options['writers'])]
+        threads.append(threading.Thread(target=ingester))
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        WearableDataPoint.objects.filter(participant=participant).delete()
+        participant.delete()
+        study.delete()
+
+        self.stdout.write(f"Form saves:    {counts['form_saves'] / elapsed:10.1f} /s")
+        self.stdout.write(f"Ingested rows: {counts['ingested_rows'] / elapsed:10.1f} /s")
+        style = self.style.ERROR if counts['lock_errors'] else self.style.SUCCESS
+        self.stdout.write(style(f"Lock errors:   {counts['lock_errors']}"))
@@ -0,0 +1,24 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from study.features import run_extraction
+
+class Command(BaseCommand):
+    help = ('Computes daily wearable features (resting heart rate, nightly HRV, step bouts, SpO2 desaturations, '
+            'circadian amplitude) for every participant-day with samples added since the last run.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (default: one per CPU).')
+        parser.add_argument('--full', action='store_true', help='Recompute every participant-day, not only those with new samples.')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be positive.')
+
+        started = time.monotonic()
+        run = run_extraction(workers=options['workers'], full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{run.days_processed} participant-day(s) updated in {time.monotonic() - started:.1f} s '
+            f'(samples up to id {run.through_point_id}).'
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from study.models import Participant
+from study.scheduling import generate_schedule
+
+class Command(BaseCommand):
+    help = 'Computes the protocol visit windows of all enrolled participants and refreshes the due/overdue schedule.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--study', type=int, help='Only schedule participants of this study ID.')
+
+    def handle(self, *args, **options):
+        participants = Participant.objects.all()
+        if options['study']:
+            participants = participants.filter(study_id=options['study'])
+
+        written = generate_schedule(participants)
+
+        self.stdout.write(self.style.SUCCESS(f'Scheduled {written} visits.'))
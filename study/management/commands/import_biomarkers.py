@@ -0,0 +1,38 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from study.biomarker_import import import_biomarkers, read_rows
+
+class Command(BaseCommand):
+    help = 'Imports biomarker results (GFAP, NfL, Abeta40/42, ptau217) from a CSV keyed by participant ID and visit type.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the CSV file exported from the lab spreadsheet.')
+        parser.add_argument('--dry-run', action='store_true', help='Show what would change without saving anything.')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as f:
+                rows = read_rows(f)
+        except OSError as e:
+            raise CommandError(f'Could not read {options["path"]}: {e}')
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise CommandError(f'The file could not be read as a UTF-8 CSV ({e}). Save it as "CSV UTF-8" and try again.')
+
+        results = import_biomarkers(rows, dry_run=options['dry_run'])
+
+        for result in results:
+            if result.action == 'error':
+                self.stdout.write(self.style.ERROR(f'Line {result.line}: {" ".join(result.errors)}'))
+            elif result.changes:
+                changes = ', '.join(f'{field}: {old} -> {new}' for field, (old, new) in result.changes.items())
+                self.stdout.write(f'Line {result.line}: {result.action} {result.participant_id} {result.visit_type} ({changes})')
+
+        errors = sum(result.action == 'error' for result in results)
+        changed = sum(result.action in ('create', 'update') for result in results)
+        if errors:
+            raise CommandError(f'{errors} row(s) have errors. Nothing was saved.')
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Dry run: {changed} of {len(results)} row(s) would change.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Imported {len(results)} row(s); {changed} changed.'))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from study.retention import BATCH_SIZE, apply_retention
+
+class Command(BaseCommand):
+    help = ('Deletes raw wearable samples older than the retention period of their study '
+            '(Study.wearable_retention_days), in bounded batches.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--study', type=int, help='Only prune this study ID.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows deleted per statement and transaction.')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to wait between batches, to leave room for other writers.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the samples that would be deleted.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['pause'] < 0:
+            raise CommandError('--batch-size must be positive and --pause not negative.')
+
+        started = time.monotonic()
+        deleted = apply_retention(
+            study_id=options['study'],
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            dry_run=options['dry_run'],
+        )
+        verb = 'would be deleted' if options['dry_run'] else 'deleted'
+        for study, count in deleted.items():
+            self.stdout.write(f'{study} (keeps {study.wearable_retention_days} days): {count} sample(s) {verb}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{sum(deleted.values())} sample(s) {verb} in {time.monotonic() - started:.1f} s.'
+        ))
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from study.retention import BATCH_SIZE, purge_participant, withdrawn_participants
+
+class Command(BaseCommand):
+    help = ('Deletes all wearable samples and daily features of withdrawn participants, in bounded batches. '
+            'Clinical data and the audit log are kept.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('participant_ids', nargs='*', type=int, help='Participant IDs (default: every withdrawn participant).')
+        parser.add_argument('--study', type=int, help='Only purge withdrawn participants of this study ID.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows deleted per statement and transaction.')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to wait between batches, to leave room for other writers.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be deleted.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['pause'] < 0:
+            raise CommandError('--batch-size must be positive and --pause not negative.')
+
+        participants = withdrawn_participants(options['study'])
+        if options['participant_ids']:
+            participants = participants.filter(pk__in=options['participant_ids'])
+            missing = set(options['participant_ids']) - set(participants.values_list('pk', flat=True))
+            if missing:
+                raise CommandError(
+                    f"Not withdrawn or not found: {', '.join(map(str, sorted(missing)))}. "
+                    f"Withdraw a participant before purging their data."
+                )
+
+        started = time.monotonic()
+        verb = 'would be deleted' if options['dry_run'] else 'deleted'
+        total_samples = 0
+        for participant in participants:
+            samples, days = purge_participant(
+                participant, batch_size=options['batch_size'], pause=options['pause'], dry_run=options['dry_run']
+            )
+            total_samples += samples
+            if samples or days:
+                self.stdout.write(f'{participant}: {samples} sample(s) and {days} feature day(s) {verb}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{total_samples} sample(s) {verb} in {time.monotonic() - started:.1f} s.'
+        ))
@@ -0,0 +1,104 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from study.models import AllocationCounter, Participant, RandomizationScheme, Study
+from study.randomization import allocate, minimize, next_in_block, stratum_key, stratum_levels
+
+class Command(BaseCommand):
+    help = ('Allocates virtual participants with a randomization scheme and reports throughput and '
+            'the worst arm imbalance per stratification factor.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--participants', type=int, default=100_000, help='Virtual participants to allocate.')
+        parser.add_argument('--method', choices=['minimization', 'blocks'], default='minimization')
+        parser.add_argument('--arms', default='Intervention:1,Control:1', help='Arms and ratios, e.g. "A:2,B:1".')
+        parser.add_argument('--sites', type=int, default=10, help='Number of recruiting sites.')
+        parser.add_argument('--age-bands', default='65,75', help='Ages where a new band starts.')
+        parser.add_argument('--block-sizes', default='4,6', help='Block sizes for permuted blocks.')
+        parser.add_argument('--probability', type=float, default=0.8, help='Minimization probability.')
+        parser.add_argument('--seed', type=int, help='Seed for reproducible runs.')
+        parser.add_argument('--database', action='store_true',
+                            help='Allocate through the database with row locks (rolled back afterwards); '
+                                 'use a smaller --participants.')
+
+    def handle(self, *args, **options):
+        try:
+            arms = {name: int(ratio) for name, ratio in (arm.split(':') for arm in options['arms'].split(','))}
+            scheme = RandomizationScheme(
+                method=(RandomizationScheme.Method.MINIMIZATION if options['method'] == 'minimization'
+                        else RandomizationScheme.Method.PERMUTED_BLOCKS),
+                arms=arms,
+                stratify_by=list(RandomizationScheme.FACTORS),
+                age_band_edges=[int(age) for age in options['age_bands'].split(',') if age],
+                block_sizes=[int(size) for size in options['block_sizes'].split(',') if size],
+                minimization_probability=options['probability'],
+            )
+            scheme.clean()
+        except (ValueError, ValidationError) as e:
+            raise CommandError(f'Invalid scheme: {e}')
+
+        rng = random.Random(options['seed'])
+        today = date.today()
+        sites = [f'S{i:02d}' for i in range(max(options['sites'], 1))]
+        people = [
+            (rng.choice(['MALE', 'FEMALE']), today - timedelta(days=rng.randint(55 * 365, 90 * 365)), rng.choice(sites))
+            for _ in range(options['participants'])
+        ]
+
+        started = time.perf_counter()
+        if options['database']:
+            counts = self._allocate_in_database(scheme, people, today, rng)
+        else:
+            counts = self._allocate_in_memory(scheme, people, today, rng)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f'{len(people)} allocations in {elapsed:.2f} s ({len(people) / elapsed:,.0f}/s)')
+        for factor in scheme.stratify_by:
+            levels = {level for f, level, arm in counts if f == factor}
+            worst = max(
+                max(counts.get((factor, level, arm), 0) / ratio for arm, ratio in arms.items())
+                - min(counts.get((factor, level, arm), 0) / ratio for arm, ratio in arms.items())
+                for level in levels
+            )
+            self.stdout.write(f'{factor}: {len(levels)} levels, worst imbalance {worst:g}')
+        totals = {arm: sum(n for (f, level, a), n in counts.items() if a == arm and f == scheme.stratify_by[0]) for arm in arms}
+        self.stdout.write(self.style.SUCCESS(', '.join(f'{arm}: {n}' for arm, n in totals.items())))
+
+    def _allocate_in_memory(self, scheme, people, today, rng):
+        counts, blocks = {}, {}
+        for gender, date_of_birth, site in people:
+            levels = stratum_levels(scheme, gender, date_of_birth, site, today)
+            if scheme.method == RandomizationScheme.Method.MINIMIZATION:
+                arm = minimize(scheme.arms, counts, levels, scheme.minimization_probability, rng)
+            else:
+                key = stratum_key(levels)
+                sequence, position = blocks.get(key, ([], 0))
+                arm, sequence, position = next_in_block(scheme.arms, scheme.block_sizes, sequence, position, rng)
+                blocks[key] = (sequence, position)
+            for factor, level in levels.items():
+                counts[(factor, level, arm)] = counts.get((factor, level, arm), 0) + 1
+        return counts
+
+    def _allocate_in_database(self, scheme, people, today, rng):
+        with transaction.atomic():
+            study = Study.objects.create(name=f'Randomization simulation {time.time()}', start_date=today)
+            scheme.study = study
+            scheme.save()
+            participants = Participant.objects.bulk_create([
+                Participant(study=study, participant_id=f'SIM-{study.id}-{i}', status=Participant.Status.ELIGIBLE,
+                            gender=gender, date_of_birth=date_of_birth, site=site)
+                for i, (gender, date_of_birth, site) in enumerate(people)
+            ])
+            for participant in participants:
+                allocate(participant, today, rng)
+            counts = {
+                (factor, level, arm): count
+                for factor, level, arm, count in AllocationCounter.objects.filter(scheme=scheme)
+                .values_list('factor', 'level', 'arm', 'count')
+            }
+            transaction.set_rollback(True)
+        return counts
@@ -0,0 +1,32 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from study.validation import CHUNK_SIZE, SOURCES_BY_NAME, run_sweep
+
+class Command(BaseCommand):
+    help = 'Checks clinical, biomarker, visit and wearable data for impossible values and records them as data queries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--study', type=int, help='Only check participants of this study ID.')
+        parser.add_argument('--source', action='append', choices=sorted(SOURCES_BY_NAME), help='Only check this table (repeatable).')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (default: one per CPU).')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows per id range handed to a worker.')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--workers and --chunk-size must be positive.')
+
+        started = time.monotonic()
+        totals = run_sweep(
+            sources=options['source'],
+            study_id=options['study'],
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+        )
+
+        for code, count in totals.items():
+            if count:
+                self.stdout.write(f'{code}: {count}')
+        flagged = sum(totals.values())
+        self.stdout.write(self.style.SUCCESS(f'Sweep finished in {time.monotonic() - started:.1f} s; {flagged} row(s) flagged.'))
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:59
+
+import study.fields
+from django.db import migrations, models
+from django.db.models import F, IntegerField
+from django.db.models.functions import Cast, Round
+
+
+def copy_spo2_to_scaled(apps, schema_editor):
+    WearableDataPoint = apps.get_model('study', 'WearableDataPoint')
+    WearableDataPoint.objects.filter(spo2__isnull=False).update(
+        spo2_scaled=Cast(Round(F('spo2') * 100), IntegerField())
+    )
+
+
+def copy_spo2_from_scaled(apps, schema_editor):
+    WearableDataPoint = apps.get_model('study', 'WearableDataPoint')
+    WearableDataPoint.objects.filter(spo2_scaled__isnull=False).update(
+        spo2=F('spo2_scaled') / 100.0
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0002_biologicalsample_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='wearabledatapoint',
+            name='blood_pressure_diastolic',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='wearabledatapoint',
+            name='blood_pressure_systolic',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='wearabledatapoint',
+            name='heart_rate',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='wearabledatapoint',
+            name='hrv',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Heart Rate Variability'),
+        ),
+        migrations.AlterField(
+            model_name='wearabledatapoint',
+            name='respiratory_rate',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        # SpO2 moves from DECIMAL to a x100 small integer. The values are copied
+        # through a temporary column so existing readings keep their precision.
+        migrations.AddField(
+            model_name='wearabledatapoint',
+            name='spo2_scaled',
+            field=study.fields.ScaledIntegerField(blank=True, null=True, scale=100, verbose_name='SpO2'),
+        ),
+        migrations.RunPython(copy_spo2_to_scaled, copy_spo2_from_scaled),
+        migrations.RemoveField(
+            model_name='wearabledatapoint',
+            name='spo2',
+        ),
+        migrations.RenameField(
+            model_name='wearabledatapoint',
+            old_name='spo2_scaled',
+            new_name='spo2',
+        ),
+        migrations.AlterField(
+            model_name='wearabledatapoint',
+            name='steps_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='wearabledatapoint',
+            index=models.Index(fields=['participant', 'timestamp'], name='wearable_participant_ts_idx'),
+        ),
+    ]
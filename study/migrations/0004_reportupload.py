@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:02
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0003_compact_wearable_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('total_size', models.BigIntegerField()),
+                ('received_bytes', models.BigIntegerField(default=0)),
+                ('expected_sha256', models.CharField(blank=True, help_text='Optional hash sent by the client, checked on completion.', max_length=64)),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('visit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_uploads', to='study.visit')),
+            ],
+        ),
+    ]
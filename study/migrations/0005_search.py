@@ -0,0 +1,109 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# SQLite keeps an external-content FTS5 table in step with study_searchentry
+# through triggers. Note that a later migration which rebuilds
+# study_searchentry on SQLite drops these triggers and must recreate them.
+SQLITE_FTS_SQL = [
+    """CREATE VIRTUAL TABLE study_searchentry_fts USING fts5(
+        content, content='study_searchentry', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER study_searchentry_ai AFTER INSERT ON study_searchentry BEGIN
+        INSERT INTO study_searchentry_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER study_searchentry_ad AFTER DELETE ON study_searchentry BEGIN
+        INSERT INTO study_searchentry_fts(study_searchentry_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER study_searchentry_au AFTER UPDATE ON study_searchentry BEGIN
+        INSERT INTO study_searchentry_fts(study_searchentry_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO study_searchentry_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+]
+SQLITE_FTS_REVERSE_SQL = [
+    'DROP TRIGGER IF EXISTS study_searchentry_ai',
+    'DROP TRIGGER IF EXISTS study_searchentry_ad',
+    'DROP TRIGGER IF EXISTS study_searchentry_au',
+    'DROP TABLE IF EXISTS study_searchentry_fts',
+]
+POSTGRES_FTS_SQL = [
+    "CREATE INDEX study_searchentry_tsv_idx ON study_searchentry USING gin (to_tsvector('english', content))",
+    "CREATE INDEX study_participant_id_prefix_idx ON study_participant (participant_id varchar_pattern_ops)",
+]
+POSTGRES_FTS_REVERSE_SQL = [
+    'DROP INDEX IF EXISTS study_searchentry_tsv_idx',
+    'DROP INDEX IF EXISTS study_participant_id_prefix_idx',
+]
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_FTS_SQL, 'postgresql': POSTGRES_FTS_SQL}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_FTS_REVERSE_SQL, 'postgresql': POSTGRES_FTS_REVERSE_SQL}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def populate_search_entries(apps, schema_editor):
+    SearchEntry = apps.get_model('study', 'SearchEntry')
+    sources = [
+        ('ClinicalAssessment', 'CLINICAL', 'ntb_results_summary'),
+        ('BiologicalSample', 'BIOLOGICAL', 'initial_blood_screening_summary'),
+        ('Neuroimaging', 'NEUROIMAGING', 'mri_key_findings'),
+    ]
+    for model_name, source, field_name in sources:
+        Model = apps.get_model('study', model_name)
+        rows = Model.objects.exclude(**{f'{field_name}__isnull': True}).exclude(**{field_name: ''})
+        SearchEntry.objects.bulk_create(
+            [SearchEntry(visit_id=visit_id, source=source, content=content)
+             for visit_id, content in rows.values_list('visit_id', field_name).iterator()],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0004_reportupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('CLINICAL', 'NTB Results'), ('BIOLOGICAL', 'Blood Screening Summary'), ('NEUROIMAGING', 'MRI Key Findings')], max_length=20)),
+                ('content', models.TextField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['status'], name='participant_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['assigned_group_name'], name='participant_arm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['visit_type', 'is_complete'], name='visit_type_complete_idx'),
+        ),
+        migrations.AddField(
+            model_name='searchentry',
+            name='visit',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='study.visit'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='searchentry',
+            unique_together={('visit', 'source')},
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(populate_search_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0005_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledVisit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('visit_type', models.CharField(choices=[('BASELINE', 'Baseline Visit'), ('VISIT1', 'Visit 1 (6-Month)'), ('VISIT2', 'Visit 2 (12-Month)'), ('EXIT', 'Exit Visit')], max_length=20)),
+                ('target_date', models.DateField()),
+                ('window_start', models.DateField()),
+                ('window_end', models.DateField()),
+                ('is_done', models.BooleanField(default=False, help_text='Set once the matching visit is marked complete.')),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule', to='study.participant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['is_done', 'window_start'], name='schedule_due_idx'), models.Index(fields=['is_done', 'window_end'], name='schedule_overdue_idx')],
+                'unique_together': {('participant', 'visit_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def populate_visit_summaries(apps, schema_editor):
+    Visit = apps.get_model('study', 'Visit')
+    VisitSummary = apps.get_model('study', 'VisitSummary')
+    visits = Visit.objects.select_related('clinical_assessment', 'biological_sample', 'neuroimaging').annotate(
+        n_assigned=Count('assessments'),
+        n_completed=Count('assessments', filter=Q(assessments__completed_at__isnull=False)),
+        last_completed=Max('assessments__completed_at'),
+    )
+    summaries = []
+    for visit in visits.iterator(chunk_size=500):
+        clinical = getattr(visit, 'clinical_assessment', None)
+        biological = getattr(visit, 'biological_sample', None)
+        neuroimaging = getattr(visit, 'neuroimaging', None)
+        summaries.append(VisitSummary(
+            visit_id=visit.id,
+            participant_id=visit.participant_id,
+            visit_type=visit.visit_type,
+            visit_date=visit.visit_date,
+            is_complete=visit.is_complete,
+            clinical_complete=bool(clinical and clinical.moca_score is not None),
+            clinical_updated_at=clinical.updated_at if clinical else None,
+            biological_complete=bool(biological and biological.gfap is not None),
+            biological_updated_at=biological.updated_at if biological else None,
+            neuroimaging_complete=bool(neuroimaging and neuroimaging.mri_completed),
+            neuroimaging_updated_at=neuroimaging.updated_at if neuroimaging else None,
+            questionnaires_assigned=visit.n_assigned,
+            questionnaires_completed=visit.n_completed,
+            last_questionnaire_at=visit.last_completed,
+        ))
+    VisitSummary.objects.bulk_create(summaries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0006_scheduledvisit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VisitSummary',
+            fields=[
+                ('visit', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='study.visit')),
+                ('visit_type', models.CharField(choices=[('BASELINE', 'Baseline Visit'), ('VISIT1', 'Visit 1 (6-Month)'), ('VISIT2', 'Visit 2 (12-Month)'), ('EXIT', 'Exit Visit')], max_length=20)),
+                ('visit_date', models.DateField()),
+                ('is_complete', models.BooleanField(default=False)),
+                ('clinical_complete', models.BooleanField(default=False)),
+                ('clinical_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('biological_complete', models.BooleanField(default=False)),
+                ('biological_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('neuroimaging_complete', models.BooleanField(default=False)),
+                ('neuroimaging_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('questionnaires_assigned', models.PositiveIntegerField(default=0)),
+                ('questionnaires_completed', models.PositiveIntegerField(default=0)),
+                ('last_questionnaire_at', models.DateTimeField(blank=True, null=True)),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visit_summaries', to='study.participant')),
+            ],
+            options={
+                'verbose_name_plural': 'Visit summaries',
+                'indexes': [models.Index(fields=['participant', 'visit_date'], name='visitsummary_participant_idx')],
+            },
+        ),
+        migrations.RunPython(populate_visit_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:25
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# The audit log is append-only: the database itself rejects any UPDATE or
+# DELETE of an existing entry, whichever code path attempts it.
+SQLITE_APPEND_ONLY_SQL = [
+    """CREATE TRIGGER study_auditentry_no_update BEFORE UPDATE ON study_auditentry BEGIN
+        SELECT RAISE(ABORT, 'study_auditentry is append-only');
+    END""",
+    """CREATE TRIGGER study_auditentry_no_delete BEFORE DELETE ON study_auditentry BEGIN
+        SELECT RAISE(ABORT, 'study_auditentry is append-only');
+    END""",
+]
+SQLITE_APPEND_ONLY_REVERSE_SQL = [
+    'DROP TRIGGER IF EXISTS study_auditentry_no_update',
+    'DROP TRIGGER IF EXISTS study_auditentry_no_delete',
+]
+POSTGRES_APPEND_ONLY_SQL = [
+    """CREATE FUNCTION study_auditentry_append_only() RETURNS trigger AS $$
+    BEGIN
+        RAISE EXCEPTION 'study_auditentry is append-only';
+    END;
+    $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER study_auditentry_append_only BEFORE UPDATE OR DELETE ON study_auditentry
+        FOR EACH ROW EXECUTE FUNCTION study_auditentry_append_only()""",
+]
+POSTGRES_APPEND_ONLY_REVERSE_SQL = [
+    'DROP TRIGGER IF EXISTS study_auditentry_append_only ON study_auditentry',
+    'DROP FUNCTION IF EXISTS study_auditentry_append_only()',
+]
+
+
+def create_append_only_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_APPEND_ONLY_SQL, 'postgresql': POSTGRES_APPEND_ONLY_SQL}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_append_only_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_APPEND_ONLY_REVERSE_SQL, 'postgresql': POSTGRES_APPEND_ONLY_REVERSE_SQL}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('study', '0007_visitsummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.BigIntegerField()),
+                ('visit_id', models.BigIntegerField(blank=True, null=True)),
+                ('action', models.CharField(choices=[('CREATE', 'Created'), ('UPDATE', 'Updated'), ('DELETE', 'Deleted')], max_length=10)),
+                ('changes', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('timestamp', models.DateTimeField()),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='contenttypes.contenttype')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Audit entries',
+                'indexes': [models.Index(fields=['content_type', 'object_id', 'timestamp'], name='audit_object_ts_idx'), models.Index(fields=['visit_id', 'timestamp'], name='audit_visit_ts_idx')],
+            },
+        ),
+        migrations.RunPython(create_append_only_triggers, drop_append_only_triggers),
+    ]
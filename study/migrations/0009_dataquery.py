@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0008_auditentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rule', models.CharField(max_length=50)),
+                ('model_name', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('description', models.CharField(max_length=255)),
+                ('value', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('RESOLVED', 'Resolved')], default='OPEN', max_length=10)),
+                ('first_seen_at', models.DateTimeField()),
+                ('last_seen_at', models.DateTimeField()),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='data_queries', to='study.participant')),
+                ('visit', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='data_queries', to='study.visit')),
+            ],
+            options={
+                'verbose_name_plural': 'Data queries',
+                'indexes': [models.Index(fields=['status', 'rule'], name='dataquery_status_rule_idx')],
+                'unique_together': {('rule', 'model_name', 'object_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_study_from_participant(apps, schema_editor):
+    Participant = apps.get_model('study', 'Participant')
+    participant_study = Subquery(Participant.objects.filter(pk=OuterRef('participant_id')).values('study_id')[:1])
+    for model_name in ['Visit', 'WearableDataPoint', 'ScheduledVisit']:
+        apps.get_model('study', model_name).objects.update(study_id=participant_study)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0009_dataquery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='visit',
+            name='study',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='visits', to='study.study'),
+        ),
+        migrations.AddField(
+            model_name='wearabledatapoint',
+            name='study',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='wearable_data', to='study.study'),
+        ),
+        migrations.AddField(
+            model_name='scheduledvisit',
+            name='study',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='schedule', to='study.study'),
+        ),
+        migrations.RunPython(copy_study_from_participant, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='visit',
+            name='study',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='visits', to='study.study'),
+        ),
+        migrations.AlterField(
+            model_name='wearabledatapoint',
+            name='study',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='wearable_data', to='study.study'),
+        ),
+        migrations.AlterField(
+            model_name='scheduledvisit',
+            name='study',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='schedule', to='study.study'),
+        ),
+        migrations.RemoveIndex(
+            model_name='participant',
+            name='participant_status_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='participant',
+            name='participant_arm_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='visit',
+            name='visit_type_complete_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='scheduledvisit',
+            name='schedule_due_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='scheduledvisit',
+            name='schedule_overdue_idx',
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['study', 'status'], name='participant_study_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['study', 'assigned_group_name'], name='participant_study_arm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['study', 'visit_type', 'is_complete'], name='visit_study_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['study', 'visit_date'], name='visit_study_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wearabledatapoint',
+            index=models.Index(fields=['study', 'timestamp'], name='wearable_study_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scheduledvisit',
+            index=models.Index(fields=['study', 'is_done', 'window_start'], name='schedule_study_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scheduledvisit',
+            index=models.Index(fields=['study', 'is_done', 'window_end'], name='schedule_study_overdue_idx'),
+        ),
+    ]
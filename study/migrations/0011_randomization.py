@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0010_study_scope'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='site',
+            field=models.CharField(blank=True, help_text='Recruiting site, used to stratify randomization.', max_length=50),
+        ),
+        migrations.CreateModel(
+            name='RandomizationScheme',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(choices=[('BLOCKS', 'Stratified permuted blocks'), ('MINIMIZATION', 'Minimization (Pocock-Simon)')], default='MINIMIZATION', max_length=20)),
+                ('arms', models.JSONField(default=dict, help_text='Arm name -> allocation ratio, e.g. {"Intervention": 1, "Control": 1}.')),
+                ('stratify_by', models.JSONField(default=list, help_text='Any of: gender, age_band, site.')),
+                ('age_band_edges', models.JSONField(blank=True, default=list, help_text='Ages where a new band starts, e.g. [65, 75] for <65, 65-74 and 75+.')),
+                ('block_sizes', models.JSONField(blank=True, default=list, help_text='Permuted blocks only: sizes to draw from, multiples of the ratio sum.')),
+                ('minimization_probability', models.FloatField(default=0.8, help_text='Minimization only: chance of taking the arm that minimizes imbalance.')),
+                ('study', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='randomization', to='study.study')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AllocationCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('factor', models.CharField(max_length=20)),
+                ('level', models.CharField(max_length=50)),
+                ('arm', models.CharField(max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('scheme', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counters', to='study.randomizationscheme')),
+            ],
+            options={
+                'unique_together': {('scheme', 'factor', 'level', 'arm')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AllocationBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stratum', models.CharField(max_length=200)),
+                ('sequence', models.JSONField(default=list)),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('scheme', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blocks', to='study.randomizationscheme')),
+            ],
+            options={
+                'unique_together': {('scheme', 'stratum')},
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0012_study_data_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WearableFeatureRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('through_point_id', models.BigIntegerField()),
+                ('days_processed', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WearableDailyFeatures',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('samples', models.PositiveIntegerField()),
+                ('resting_heart_rate', models.FloatField(blank=True, help_text='10th percentile of plausible heart-rate readings (BPM).', null=True)),
+                ('night_hrv', models.FloatField(blank=True, help_text='Median HRV between 00:00 and 06:00 (ms).', null=True, verbose_name='Nightly HRV')),
+                ('total_steps', models.PositiveIntegerField(blank=True, null=True)),
+                ('step_bouts', models.PositiveIntegerField(default=0, help_text='Runs of stepping lasting at least 10 minutes.')),
+                ('active_minutes', models.FloatField(default=0, help_text='Total duration of the step bouts.')),
+                ('desaturation_events', models.PositiveIntegerField(default=0, help_text="Drops of 3 points or more below the day's median SpO2.", verbose_name='SpO2 desaturation events')),
+                ('circadian_amplitude', models.FloatField(blank=True, help_text='Amplitude of a 24-hour cosinor fit of heart rate (BPM).', null=True)),
+                ('computed_at', models.DateTimeField()),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='wearable_features', to='study.participant')),
+                ('study', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='wearable_features', to='study.study')),
+            ],
+            options={
+                'verbose_name_plural': 'Wearable daily features',
+                'indexes': [models.Index(fields=['study', 'day'], name='wearable_features_study_idx')],
+                'unique_together': {('participant', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0013_wearable_features'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='study',
+            name='wearable_retention_days',
+            field=models.PositiveIntegerField(blank=True, help_text='Delete raw wearable samples older than this many days (manage.py prune_wearable_data). Blank keeps them.', null=True),
+        ),
+    ]
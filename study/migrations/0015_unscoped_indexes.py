@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0014_wearable_retention'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['status'], name='participant_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participant',
+            index=models.Index(fields=['assigned_group_name'], name='participant_arm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scheduledvisit',
+            index=models.Index(fields=['is_done', 'window_start'], name='schedule_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scheduledvisit',
+            index=models.Index(fields=['is_done', 'window_end'], name='schedule_overdue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['visit_type', 'is_complete'], name='visit_type_complete_idx'),
+        ),
+    ]
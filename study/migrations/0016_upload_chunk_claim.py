@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0015_unscoped_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportupload',
+            name='chunk_started_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,8 +1,27 @@
 # study/models.py
 
-from django.db import models
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models, router, transaction
+from django.db.models import Avg, Count, F, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, NullIf
+from django.dispatch import Signal
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .fields import ScaledIntegerField
+from .tenancy import current_study_id
+
+logger = logging.getLogger(__name__)
+
 # --- Core Foundational Models ---
 
 class Study(models.Model):
@@ -11,6 +30,13 @@ class Study(models.Model):
     description = models.TextField(blank=True, null=True)
     start_date = models.DateField()
     end_date = models.DateField(blank=True, null=True)
+    # Bumped whenever a participant or visit of the study changes; cached
+    # reports are keyed on it (see study/reports.py).
+    data_version = models.PositiveIntegerField(default=0, editable=False)
+    wearable_retention_days = models.PositiveIntegerField(
+        blank=True, null=True,
+        help_text=_("Delete raw wearable samples older than this many days (manage.py prune_wearable_data). Blank keeps them."),
+    )
 
     def __str__(self):
         return self.name
@@ -19,6 +45,69 @@ class Study(models.Model):
         verbose_name_plural = "Studies"
 
 
+class StudyScopedManager(models.Manager):
+    """
+    Limits every query to the study of the current request (see
+    study/tenancy.py). Outside a request, e.g. in management commands,
+    nothing is filtered.
+    """
+    def __init__(self, study_field='study'):
+        super().__init__()
+        self.study_field = study_field
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        study_id = current_study_id()
+        if study_id is not None:
+            queryset = queryset.filter(**{f'{self.study_field}_id': study_id})
+        return queryset
+
+
+class ParticipantQuerySet(models.QuerySet):
+    def with_progress(self):
+        """
+        Annotates visit_count, complete_visit_count, completion_percent,
+        last_visit_date and last_wearable_at.
+
+        Each value is a correlated subquery on an indexed foreign key rather
+        than a JOIN + GROUP BY, so a LIMITed page only evaluates them for the
+        rows it returns, however deep the page is.
+        """
+        visits = Visit.objects.filter(participant=OuterRef('pk')).order_by().values('participant')
+        visit_count = Subquery(visits.annotate(n=Count('pk')).values('n'))
+        complete_visit_count = Subquery(visits.filter(is_complete=True).annotate(n=Count('pk')).values('n'))
+        return self.annotate(
+            visit_count=Coalesce(visit_count, 0),
+            complete_visit_count=Coalesce(complete_visit_count, 0),
+            last_visit_date=Subquery(visits.annotate(last=Max('visit_date')).values('last')),
+            last_wearable_at=Subquery(
+                WearableDataPoint.objects.filter(participant=OuterRef('pk')).order_by('-timestamp').values('timestamp')[:1]
+            ),
+        ).annotate(
+            completion_percent=F('complete_visit_count') * 100 / NullIf(F('visit_count'), 0),
+        )
+
+    def delete(self):
+        _purge_wearable_data(WearableDataPoint.objects.filter(participant__in=self.order_by().values('pk')))
+        return super().delete()
+
+
+def _purge_wearable_data(samples):
+    """
+    Removes deleted participants' wearable samples in batches before the
+    cascade, which then finds none. Inside a transaction (the admin's delete
+    views run in one) batching would not release any lock before the outer
+    commit, so the cascade is left to delete them in that transaction.
+    """
+    if connections[router.db_for_write(WearableDataPoint)].in_atomic_block:
+        logger.warning(
+            "Deleting participants inside a transaction also deletes their wearable samples in it. "
+            "Run purge_withdrawn_data first to remove large histories in short batches."
+        )
+        return
+    samples.delete_in_batches()
+
+
 class Participant(models.Model):
     """Represents a single participant's journey through the study."""
     class Status(models.TextChoices):
@@ -37,10 +126,13 @@ class Participant(models.Model):
     # Basic demographics needed for eligibility/stratification
     date_of_birth = models.DateField()
     gender = models.CharField(max_length=10, choices=[('MALE', 'Male'), ('FEMALE', 'Female'), ('OTHER', 'Other')])
+    site = models.CharField(max_length=50, blank=True, help_text=_("Recruiting site, used to stratify randomization."))
+
+    objects = StudyScopedManager.from_queryset(ParticipantQuerySet)()
 
     def save(self, *args, **kwargs):
         if not self.participant_id:
-            last_participant = Participant.objects.filter(study=self.study).order_by('id').last()
+            last_participant = Participant._base_manager.filter(study=self.study).order_by('id').last()
             last_id = 0
             if last_participant:
                 try:
@@ -48,12 +140,112 @@ class Participant(models.Model):
                 except (ValueError, IndexError):
                     last_id = 0 # Fallback
             self.participant_id = f"DG-{self.study.id}-{last_id + 1:04d}"
-        super().save(*args, **kwargs)
+        moved = not self._state.adding and getattr(self, '_loaded_study_id', self.study_id) != self.study_id
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if moved:
+                # Rows that copy the participant's study follow it, one UPDATE per table.
+                for model in StudyOwnedModel.__subclasses__():
+                    model._base_manager.filter(participant=self).update(study_id=self.study_id)
+        self._loaded_study_id = self.study_id
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_study_id = instance.__dict__.get('study_id')
+        return instance
+
+    def delete(self, *args, **kwargs):
+        _purge_wearable_data(WearableDataPoint.objects.filter(participant=self))
+        return super().delete(*args, **kwargs)
 
     def __str__(self):
         return self.participant_id
 
-class Visit(models.Model):
+    class Meta:
+        indexes = [
+            models.Index(fields=['study', 'status'], name='participant_study_status_idx'),
+            models.Index(fields=['study', 'assigned_group_name'], name='participant_study_arm_idx'),
+            # For the "All studies" view, which has no study to lead with.
+            models.Index(fields=['status'], name='participant_status_idx'),
+            models.Index(fields=['assigned_group_name'], name='participant_arm_idx'),
+        ]
+
+
+class StudyOwnedQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create() skips save(), so copy the study from the participants here.
+        objs = list(objs)
+        missing = [obj for obj in objs if obj.study_id is None]
+        if missing:
+            study_ids = dict(
+                Participant._base_manager.filter(pk__in={obj.participant_id for obj in missing}).values_list('id', 'study_id')
+            )
+            for obj in missing:
+                obj.study_id = study_ids[obj.participant_id]
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def delete_in_batches(self, batch_size=10_000, pause=0):
+        """
+        Deletes the matching rows with repeated raw
+        DELETE ... WHERE id IN (SELECT id ... LIMIT batch_size), each batch in
+        its own transaction, sleeping `pause` seconds in between. Returns the
+        number of rows deleted.
+
+        No rows are loaded into Python and locks are held one batch at a
+        time, so millions of rows can go without a long lock or a memory
+        spike. Signals and cascades are skipped: only use it on tables that
+        have neither. Call it outside transaction.atomic(): inside one, every
+        batch becomes a savepoint and all locks last until the outer commit.
+        """
+        db = self._db or router.db_for_write(self.model)
+        connection = connections[db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        pk = connection.ops.quote_name(self.model._meta.pk.column)
+        try:
+            select_sql, params = self.order_by().values('pk')[:batch_size].query.get_compiler(db).as_sql()
+        except EmptyResultSet:
+            return 0
+        sql = f'DELETE FROM {table} WHERE {pk} IN ({select_sql})'
+
+        deleted = 0
+        while True:
+            with transaction.atomic(using=db), connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                count = cursor.rowcount
+            deleted += count
+            if count < batch_size:
+                return deleted
+            if pause:
+                time.sleep(pause)
+
+
+class StudyOwnedModel(models.Model):
+    """
+    Base class for per-participant tables that carry a copy of the
+    participant's study, so their indexes can lead with it.
+    """
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self.study_id is None:
+            self.study_id = self.participant.study_id
+        super().save(*args, **kwargs)
+
+
+class VisitQuerySet(StudyOwnedQuerySet):
+    """Named fetch presets for visits; views and admin use these instead of ad-hoc joins."""
+    def for_list(self):
+        # Visit.__str__ reads the participant.
+        return self.select_related('participant')
+
+    def for_dashboard(self):
+        # The three per-visit data records are one-to-one, so one JOINed query fetches them all.
+        return self.select_related('participant', 'clinical_assessment', 'biological_sample', 'neuroimaging')
+
+
+class Visit(StudyOwnedModel):
     """Represents a scheduled data collection timepoint for a participant."""
     # --- MODIFY THIS PART ---
     class VisitType(models.TextChoices):
@@ -63,60 +255,24 @@ class Visit(models.Model):
         EXIT = 'EXIT', _('Exit Visit')
     # --- END OF MODIFICATION ---
 
+    study = models.ForeignKey(Study, on_delete=models.PROTECT, related_name='visits', editable=False)
     participant = models.ForeignKey(Participant, on_delete=models.CASCADE, related_name='visits')
     visit_type = models.CharField(max_length=20, choices=VisitType.choices)
     visit_date = models.DateField()
     is_complete = models.BooleanField(default=False)
 
+    objects = StudyScopedManager.from_queryset(VisitQuerySet)()
+
     def __str__(self):
         return f"{self.participant.participant_id} - {self.get_visit_type_display()}"
     
     class Meta:
         unique_together = ('participant', 'visit_type')
-
-# --- Data Collection Models (Based on the provided document) ---
-
-class ClinicalAssessment(models.Model):
-    """Stores data from clinical and functional assessments."""
-    visit = models.OneToOneField(Visit, on_delete=models.CASCADE, related_name='clinical_assessment')
-    
-    # Fields from "Clinical & Functional Assessments" section 
-    moca_score = models.IntegerField(blank=True, null=True, verbose_name="Montreal Cognitive Assessment (MoCA) score") # [cite: 9]
-    ntb_results_summary = models.TextField(blank=True, null=True, verbose_name="Neuropsychological Test Battery (NTB) Results") # [cite: 10]
-    nyha_class = models.CharField(max_length=10, blank=True, null=True, verbose_name="NYHA classification") # [cite: 11]
-    six_minute_walk_test_meters = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True, verbose_name="6-minute walk test (meters)") # [cite: 12]
-    tug_test_seconds = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True, verbose_name="Timed up-and-go (TUG) test (seconds)") # [cite: 13]
-
-    def __str__(self):
-        return f"Clinical Assessment for {self.visit}"
-
-
-class BiologicalSample(models.Model):
-    """Stores results from biological samples."""
-    visit = models.OneToOneField(Visit, on_delete=models.CASCADE, related_name='biological_sample')
-
-    # Fields from "Biological Sample Results" section [cite: 14]
-    initial_blood_screening_summary = models.TextField(blank=True, null=True, help_text="B12, folate, thyroid, liver, kidney function") # [cite: 15]
-    gfap = models.DecimalField(max_digits=10, decimal_places=4, blank=True, null=True, verbose_name="GFAP") # [cite: 16]
-    nfl = models.DecimalField(max_digits=10, decimal_places=4, blank=True, null=True, verbose_name="NfL") # [cite: 16]
-    abeta40_42_ratio = models.DecimalField(max_digits=10, decimal_places=4, blank=True, null=True, verbose_name="Abeta40/42 Ratio") # [cite: 16]
-    ptau217 = models.DecimalField(max_digits=10, decimal_places=4, blank=True, null=True, verbose_name="ptau217") # [cite: 16]
-    
-    def __str__(self):
-        return f"Biological Sample for {self.visit}"
-
-
-class Neuroimaging(models.Model):
-    """Stores confirmation of neuroimaging procedures."""
-    visit = models.OneToOneField(Visit, on_delete=models.CASCADE, related_name='neuroimaging')
-
-    # Fields from "Neuroimaging Data" section [cite: 17]
-    mri_completed = models.BooleanField(default=False, verbose_name="Research MRI Completed") # [cite: 18, 33]
-    mri_report = models.FileField(upload_to='mri_reports/', blank=True, null=True)
-    mri_key_findings = models.TextField(blank=True, null=True) # [cite: 18]
-
-    def __str__(self):
-        return f"Neuroimaging for {self.visit}"
+        indexes = [
+            models.Index(fields=['study', 'visit_type', 'is_complete'], name='visit_study_type_idx'),
+            models.Index(fields=['study', 'visit_date'], name='visit_study_date_idx'),
+            models.Index(fields=['visit_type', 'is_complete'], name='visit_type_complete_idx'),
+        ]
 
 
 class Questionnaire(models.Model):
@@ -138,25 +294,171 @@ class Questionnaire(models.Model):
         return f"{self.get_name_display()} for {self.visit}"
 
 
-class WearableDataPoint(models.Model):
+class WearableDataPointQuerySet(StudyOwnedQuerySet):
+    # Column name -> scale for values stored as scaled integers.
+    SCALED_FIELDS = {'spo2': 100}
+    METRIC_FIELDS = (
+        'heart_rate', 'hrv', 'blood_pressure_systolic', 'blood_pressure_diastolic',
+        'spo2', 'respiratory_rate', 'steps_count',
+    )
+
+    def as_arrays(self, *fields):
+        """
+        Returns {'timestamp': datetime64[us] array, <field>: float64 array, ...}
+        for the current queryset, with NaN for missing readings.
+
+        Rows are fetched straight from the cursor, so no model instances or
+        Decimals are built on the way.
+        """
+        fields = fields or self.METRIC_FIELDS
+        query = self.values_list('timestamp', *fields).query
+        try:
+            sql, params = query.get_compiler(self.db).as_sql()
+        except EmptyResultSet:
+            rows = []
+        else:
+            with connections[self.db].cursor() as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+
+        columns = list(zip(*rows)) if rows else [()] * (len(fields) + 1)
+        arrays = {'timestamp': _to_datetime64(columns[0])}
+        for name, column in zip(fields, columns[1:]):
+            values = np.array(column, dtype=np.float64)
+            if name in self.SCALED_FIELDS:
+                values /= self.SCALED_FIELDS[name]
+            arrays[name] = values
+        return arrays
+
+    # Physiologically possible range of each vital. Readings outside it are
+    # device errors; the validation sweep flags them and averages skip them.
+    PLAUSIBLE_RANGES = {
+        'heart_rate': (20, 250),
+        'spo2': (50, 100),
+        'respiratory_rate': (4, 60),
+    }
+
+    def for_list(self):
+        # WearableDataPoint.__str__ reads the participant.
+        return self.select_related('participant')
+
+    def plausible(self, *fields):
+        """Drops rows whose reading of any of `fields` lies outside PLAUSIBLE_RANGES (missing readings are kept)."""
+        qs = self
+        for name in fields:
+            low, high = self.PLAUSIBLE_RANGES[name]
+            qs = qs.filter(models.Q(**{f'{name}__isnull': True}) | models.Q(**{f'{name}__range': (low, high)}))
+        return qs
+
+    def tiles(self, now=None):
+        """The summary tiles of the wearable dashboard for this queryset (normally one participant)."""
+        now = now or timezone.now()
+        last_24h = self.filter(timestamp__gte=now - timedelta(days=1))
+        latest_bp = (self.exclude(blood_pressure_systolic__isnull=True).order_by('-timestamp')
+                     .values('blood_pressure_systolic', 'blood_pressure_diastolic').first())
+        return {
+            # Implausible device readings would skew the average; see study/validation.py.
+            'avg_hr_24h': last_24h.plausible('heart_rate').aggregate(value=Avg('heart_rate'))['value'],
+            'latest_spo2': (last_24h.plausible('spo2').exclude(spo2__isnull=True)
+                            .order_by('-timestamp').values_list('spo2', flat=True).first()),
+            'latest_bp_systolic': latest_bp and latest_bp['blood_pressure_systolic'],
+            'latest_bp_diastolic': latest_bp and latest_bp['blood_pressure_diastolic'],
+            'steps_today': self.filter(
+                timestamp__gte=now.replace(hour=0, minute=0, second=0, microsecond=0)
+            ).aggregate(value=Sum('steps_count'))['value'],
+        }
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        wearable_points_created.send(sender=self.model, points=created)
+        return created
+
+
+# Sent with the new rows after WearableDataPoint bulk_create(), which skips post_save.
+wearable_points_created = Signal()
+
+
+def _to_datetime64(column):
+    # SQLite hands back ISO strings which NumPy parses in C; other backends
+    # return aware datetimes, which are stored in UTC.
+    if column and not isinstance(column[0], str):
+        column = [value.replace(tzinfo=None) for value in column]
+    return np.array(column, dtype='datetime64[us]')
+
+
+class WearableDataPoint(StudyOwnedModel):
     """Represents a single point of passively collected data."""
+    study = models.ForeignKey(Study, on_delete=models.PROTECT, related_name='wearable_data', editable=False)
     participant = models.ForeignKey(Participant, on_delete=models.CASCADE, related_name='wearable_data')
     timestamp = models.DateTimeField(db_index=True)
     
     # Example fields from "Wearable & Mobile Device Data" section [cite: 39]
-    heart_rate = models.IntegerField(blank=True, null=True) # [cite: 40]
-    hrv = models.IntegerField(blank=True, null=True, verbose_name="Heart Rate Variability") # [cite: 40]
-    blood_pressure_systolic = models.IntegerField(blank=True, null=True) # [cite: 40]
-    blood_pressure_diastolic = models.IntegerField(blank=True, null=True) # [cite: 40]
-    spo2 = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True, verbose_name="SpO2") # [cite: 40]
-    respiratory_rate = models.IntegerField(blank=True, null=True) # [cite: 40]
-    steps_count = models.IntegerField(blank=True, null=True) # [cite: 40]
+    # Stored as small integers: every vital fits in 2 bytes and SpO2 keeps two decimals as a x100 integer.
+    heart_rate = models.PositiveSmallIntegerField(blank=True, null=True) # [cite: 40]
+    hrv = models.PositiveSmallIntegerField(blank=True, null=True, verbose_name="Heart Rate Variability") # [cite: 40]
+    blood_pressure_systolic = models.PositiveSmallIntegerField(blank=True, null=True) # [cite: 40]
+    blood_pressure_diastolic = models.PositiveSmallIntegerField(blank=True, null=True) # [cite: 40]
+    spo2 = ScaledIntegerField(scale=100, blank=True, null=True, verbose_name="SpO2") # [cite: 40]
+    respiratory_rate = models.PositiveSmallIntegerField(blank=True, null=True) # [cite: 40]
+    steps_count = models.PositiveIntegerField(blank=True, null=True) # [cite: 40]
+
+    objects = StudyScopedManager.from_queryset(WearableDataPointQuerySet)()
 
     def __str__(self):
         return f"Data for {self.participant.participant_id} at {self.timestamp}"
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['participant', 'timestamp'], name='wearable_participant_ts_idx'),
+            models.Index(fields=['study', 'timestamp'], name='wearable_study_ts_idx'),
+        ]
+
+
+class WearableDailyFeatures(StudyOwnedModel):
+    """
+    Features derived from one participant-day of wearable samples (see
+    study/features.py). Days are calendar days in TIME_ZONE.
+    """
+    study = models.ForeignKey(Study, on_delete=models.PROTECT, related_name='wearable_features', editable=False)
+    participant = models.ForeignKey(Participant, on_delete=models.CASCADE, related_name='wearable_features')
+    day = models.DateField()
+    samples = models.PositiveIntegerField()
+    resting_heart_rate = models.FloatField(null=True, blank=True, help_text=_("10th percentile of plausible heart-rate readings (BPM)."))
+    night_hrv = models.FloatField(null=True, blank=True, verbose_name="Nightly HRV", help_text=_("Median HRV between 00:00 and 06:00 (ms)."))
+    total_steps = models.PositiveIntegerField(null=True, blank=True)
+    step_bouts = models.PositiveIntegerField(default=0, help_text=_("Runs of stepping lasting at least 10 minutes."))
+    active_minutes = models.FloatField(default=0, help_text=_("Total duration of the step bouts."))
+    desaturation_events = models.PositiveIntegerField(default=0, verbose_name="SpO2 desaturation events", help_text=_("Drops of 3 points or more below the day's median SpO2."))
+    circadian_amplitude = models.FloatField(null=True, blank=True, help_text=_("Amplitude of a 24-hour cosinor fit of heart rate (BPM)."))
+    computed_at = models.DateTimeField()
+
+    objects = StudyScopedManager.from_queryset(StudyOwnedQuerySet)()
+
+    def __str__(self):
+        return f"Features of {self.participant.participant_id} on {self.day}"
+
+    class Meta:
+        verbose_name_plural = "Wearable daily features"
+        unique_together = ('participant', 'day')
+        indexes = [
+            models.Index(fields=['study', 'day'], name='wearable_features_study_idx'),
+        ]
+
+
+class WearableFeatureRun(models.Model):
+    """
+    One run of the feature extraction. Samples with an id up to
+    through_point_id were covered, so the next run starts after the
+    latest finished run's mark.
+    """
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    through_point_id = models.BigIntegerField()
+    days_processed = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Feature run of {self.started_at:%Y-%m-%d %H:%M}"
 
 
 # study/models.py (add these new models at the end)
@@ -195,15 +497,59 @@ class Choice(models.Model):
         return f"{self.question.text[:30]}... - {self.text} ({self.value})"
 
 
+# --- Audit Trail ---
+
+class AuditedModel(models.Model):
+    """
+    Base class for clinical data whose changes are written to the audit log
+    (see study/audit.py). Rows loaded from the database remember the values
+    they were loaded with, so a save can be diffed without re-reading the row.
+    """
+    audit_exclude = ('updated_at',)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._audit_snapshot = dict(zip(field_names, values))
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Also runs when a deferred field is first read; remember the loaded values.
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        deferred = self.get_deferred_fields()
+        names = [
+            f.attname for f in self._meta.concrete_fields
+            if f.attname not in deferred and (fields is None or f.name in fields or f.attname in fields)
+        ]
+        snapshot = getattr(self, '_audit_snapshot', None) or {}
+        self._audit_snapshot = {**snapshot, **{name: getattr(self, name) for name in names}}
+
+
 # --- Participant-Specific Data Models ---
 
-class VisitAssessment(models.Model):
+class VisitAssessmentQuerySet(models.QuerySet):
+    def for_list(self):
+        # VisitAssessment.__str__ and the assessment lists read both relations.
+        return self.select_related('visit__participant', 'questionnaire_template')
+
+    def with_answers(self):
+        return self.for_list().prefetch_related(
+            models.Prefetch('answers', queryset=Answer.objects.select_related('question', 'selected_choice'))
+        )
+
+
+class VisitAssessment(AuditedModel):
     """Links a Questionnaire to a specific Visit where it needs to be completed."""
     visit = models.ForeignKey(Visit, on_delete=models.CASCADE, related_name='assessments')
     questionnaire_template = models.ForeignKey(QuestionnaireTemplate, on_delete=models.PROTECT)
     completed_at = models.DateTimeField(null=True, blank=True)
     total_score = models.IntegerField(null=True, blank=True)
 
+    objects = VisitAssessmentQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.visit} - {self.questionnaire_template.name}"
 
@@ -211,7 +557,7 @@ class VisitAssessment(models.Model):
         unique_together = ('visit', 'questionnaire_template')
 
 
-class Answer(models.Model):
+class Answer(AuditedModel):
     """Stores a participant's selected choice for a specific question."""
     visit_assessment = models.ForeignKey(VisitAssessment, on_delete=models.CASCADE, related_name='answers')
     question = models.ForeignKey(Question, on_delete=models.PROTECT)
@@ -223,7 +569,7 @@ class Answer(models.Model):
 
 # --- Data Collection Models (Based on the provided document) ---
 
-class ClinicalAssessment(models.Model):
+class ClinicalAssessment(AuditedModel):
     """Stores data from clinical and functional assessments."""
     visit = models.OneToOneField(Visit, on_delete=models.CASCADE, related_name='clinical_assessment')
     updated_at = models.DateTimeField(auto_now=True)
@@ -239,7 +585,7 @@ class ClinicalAssessment(models.Model):
         return f"Clinical Assessment for {self.visit}"
 
 
-class BiologicalSample(models.Model):
+class BiologicalSample(AuditedModel):
     """Stores results from biological samples."""
     visit = models.OneToOneField(Visit, on_delete=models.CASCADE, related_name='biological_sample')
     updated_at = models.DateTimeField(auto_now=True)
@@ -255,7 +601,7 @@ class BiologicalSample(models.Model):
         return f"Biological Sample for {self.visit}"
 
 
-class Neuroimaging(models.Model):
+class Neuroimaging(AuditedModel):
     """Stores confirmation of neuroimaging procedures."""
     visit = models.OneToOneField(Visit, on_delete=models.CASCADE, related_name='neuroimaging')
     updated_at = models.DateTimeField(auto_now=True)
@@ -266,4 +612,260 @@ class Neuroimaging(models.Model):
     mri_key_findings = models.TextField(blank=True, null=True)
 
     def __str__(self):
-        return f"Neuroimaging for {self.visit}"
\ No newline at end of file
+        return f"Neuroimaging for {self.visit}"
+
+# --- Chunked Upload Models ---
+
+class ReportUpload(models.Model):
+    """A resumable, chunked upload of an MRI report for a visit."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    visit = models.ForeignKey(Visit, on_delete=models.CASCADE, related_name='report_uploads')
+    filename = models.CharField(max_length=255)
+    total_size = models.BigIntegerField()
+    received_bytes = models.BigIntegerField(default=0)
+    # Set while a request writes the chunk at received_bytes (see uploads.claim_chunk).
+    chunk_started_at = models.DateTimeField(null=True, blank=True, editable=False)
+    expected_sha256 = models.CharField(max_length=64, blank=True, help_text=_("Optional hash sent by the client, checked on completion."))
+    sha256 = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Upload of {self.filename} for {self.visit}"
+
+
+# --- Search Models ---
+
+class SearchEntry(models.Model):
+    """
+    A copy of one free-text field of a visit, kept in sync by signals so it can
+    be indexed for full-text search (FTS5 on SQLite, tsvector on PostgreSQL).
+    """
+    class Source(models.TextChoices):
+        CLINICAL = 'CLINICAL', _('NTB Results')
+        BIOLOGICAL = 'BIOLOGICAL', _('Blood Screening Summary')
+        NEUROIMAGING = 'NEUROIMAGING', _('MRI Key Findings')
+
+    visit = models.ForeignKey(Visit, on_delete=models.CASCADE, related_name='search_entries')
+    source = models.CharField(max_length=20, choices=Source.choices)
+    content = models.TextField()
+
+    objects = StudyScopedManager('visit__study')
+
+    def __str__(self):
+        return f"{self.get_source_display()} for {self.visit}"
+
+    class Meta:
+        unique_together = ('visit', 'source')
+
+
+# --- Visit Scheduling Models ---
+
+class ScheduledVisit(StudyOwnedModel):
+    """A protocol visit an enrolled participant is expected to attend, with its allowed window."""
+    study = models.ForeignKey(Study, on_delete=models.PROTECT, related_name='schedule', editable=False)
+    participant = models.ForeignKey(Participant, on_delete=models.CASCADE, related_name='schedule')
+    visit_type = models.CharField(max_length=20, choices=Visit.VisitType.choices)
+    target_date = models.DateField()
+    window_start = models.DateField()
+    window_end = models.DateField()
+    is_done = models.BooleanField(default=False, help_text=_("Set once the matching visit is marked complete."))
+
+    objects = StudyScopedManager.from_queryset(StudyOwnedQuerySet)()
+
+    def __str__(self):
+        return f"{self.participant_id} - {self.get_visit_type_display()} due {self.target_date}"
+
+    class Meta:
+        unique_together = ('participant', 'visit_type')
+        indexes = [
+            models.Index(fields=['study', 'is_done', 'window_start'], name='schedule_study_due_idx'),
+            models.Index(fields=['study', 'is_done', 'window_end'], name='schedule_study_overdue_idx'),
+            # The worklists of the "All studies" view.
+            models.Index(fields=['is_done', 'window_start'], name='schedule_due_idx'),
+            models.Index(fields=['is_done', 'window_end'], name='schedule_overdue_idx'),
+        ]
+
+
+# --- Denormalized Read Models ---
+
+class VisitSummary(models.Model):
+    """
+    One row per visit with the completion state of every data category, kept
+    current by signals (see study/summaries.py). List pages read this instead
+    of joining the visit to each of its data tables.
+    """
+    visit = models.OneToOneField(Visit, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    participant = models.ForeignKey(Participant, on_delete=models.CASCADE, related_name='visit_summaries')
+    visit_type = models.CharField(max_length=20, choices=Visit.VisitType.choices)
+    visit_date = models.DateField()
+    is_complete = models.BooleanField(default=False)
+
+    clinical_complete = models.BooleanField(default=False)
+    clinical_updated_at = models.DateTimeField(null=True, blank=True)
+    biological_complete = models.BooleanField(default=False)
+    biological_updated_at = models.DateTimeField(null=True, blank=True)
+    neuroimaging_complete = models.BooleanField(default=False)
+    neuroimaging_updated_at = models.DateTimeField(null=True, blank=True)
+    questionnaires_assigned = models.PositiveIntegerField(default=0)
+    questionnaires_completed = models.PositiveIntegerField(default=0)
+    last_questionnaire_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Summary of visit {self.visit_id}"
+
+    class Meta:
+        verbose_name_plural = "Visit summaries"
+        indexes = [
+            models.Index(fields=['participant', 'visit_date'], name='visitsummary_participant_idx'),
+        ]
+
+
+class AuditEntry(models.Model):
+    """
+    One append-only record of a create, update or delete of an audited row.
+    `changes` maps each affected field to [old, new]. The visit id is copied
+    (not a foreign key), so the history outlives the visit.
+    """
+    class Action(models.TextChoices):
+        CREATE = 'CREATE', _('Created')
+        UPDATE = 'UPDATE', _('Updated')
+        DELETE = 'DELETE', _('Deleted')
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.PROTECT)
+    object_id = models.BigIntegerField()
+    visit_id = models.BigIntegerField(null=True, blank=True)
+    action = models.CharField(max_length=10, choices=Action.choices)
+    changes = models.JSONField(encoder=DjangoJSONEncoder)
+    timestamp = models.DateTimeField()
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.content_type.model} #{self.object_id} at {self.timestamp}"
+
+    class Meta:
+        verbose_name_plural = "Audit entries"
+        indexes = [
+            models.Index(fields=['content_type', 'object_id', 'timestamp'], name='audit_object_ts_idx'),
+            models.Index(fields=['visit_id', 'timestamp'], name='audit_visit_ts_idx'),
+        ]
+
+
+# --- Data Quality ---
+
+class DataQuery(models.Model):
+    """
+    A discrepancy found by the validation sweep (see study/validation.py), e.g.
+    a MoCA score above 30. Re-running the sweep refreshes open queries and
+    resolves the ones whose data has since been corrected.
+    """
+    class Status(models.TextChoices):
+        OPEN = 'OPEN', _('Open')
+        RESOLVED = 'RESOLVED', _('Resolved')
+
+    rule = models.CharField(max_length=50)
+    model_name = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    participant = models.ForeignKey(Participant, on_delete=models.CASCADE, related_name='data_queries')
+    visit = models.ForeignKey(Visit, on_delete=models.CASCADE, null=True, blank=True, related_name='data_queries')
+    description = models.CharField(max_length=255)
+    value = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.OPEN)
+    first_seen_at = models.DateTimeField()
+    last_seen_at = models.DateTimeField()
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    objects = StudyScopedManager('participant__study')
+
+    def __str__(self):
+        return f"{self.rule} on {self.model_name} #{self.object_id}"
+
+    class Meta:
+        verbose_name_plural = "Data queries"
+        unique_together = ('rule', 'model_name', 'object_id')
+        indexes = [
+            models.Index(fields=['status', 'rule'], name='dataquery_status_rule_idx'),
+        ]
+
+
+# --- Randomization ---
+
+class RandomizationScheme(models.Model):
+    """
+    How a study allocates participants to arms (see study/randomization.py).
+    The scheme row is also the lock that serializes concurrent allocations.
+    """
+    class Method(models.TextChoices):
+        PERMUTED_BLOCKS = 'BLOCKS', _('Stratified permuted blocks')
+        MINIMIZATION = 'MINIMIZATION', _('Minimization (Pocock-Simon)')
+
+    FACTORS = ('gender', 'age_band', 'site')
+
+    study = models.OneToOneField(Study, on_delete=models.CASCADE, related_name='randomization')
+    method = models.CharField(max_length=20, choices=Method.choices, default=Method.MINIMIZATION)
+    arms = models.JSONField(
+        default=dict, help_text=_('Arm name -> allocation ratio, e.g. {"Intervention": 1, "Control": 1}.'),
+    )
+    stratify_by = models.JSONField(default=list, help_text=_("Any of: gender, age_band, site."))
+    age_band_edges = models.JSONField(
+        default=list, blank=True, help_text=_("Ages where a new band starts, e.g. [65, 75] for <65, 65-74 and 75+."),
+    )
+    block_sizes = models.JSONField(
+        default=list, blank=True, help_text=_("Permuted blocks only: sizes to draw from, multiples of the ratio sum."),
+    )
+    minimization_probability = models.FloatField(
+        default=0.8, help_text=_("Minimization only: chance of taking the arm that minimizes imbalance."),
+    )
+
+    def __str__(self):
+        return f"{self.study} ({self.get_method_display()})"
+
+    def clean(self):
+        if not isinstance(self.arms, dict) or len(self.arms) < 2:
+            raise ValidationError({'arms': _("Name at least two arms.")})
+        if not all(isinstance(ratio, int) and ratio > 0 for ratio in self.arms.values()):
+            raise ValidationError({'arms': _("Allocation ratios must be positive integers.")})
+        unknown = set(self.stratify_by) - set(self.FACTORS)
+        if unknown:
+            raise ValidationError({'stratify_by': _("Unknown factors: %s.") % ', '.join(sorted(unknown))})
+        if self.age_band_edges != sorted(self.age_band_edges):
+            raise ValidationError({'age_band_edges': _("List the ages in increasing order.")})
+        if self.method == self.Method.PERMUTED_BLOCKS:
+            ratio_sum = sum(self.arms.values())
+            if not self.block_sizes or any(size <= 0 or size % ratio_sum for size in self.block_sizes):
+                raise ValidationError({'block_sizes': _("Give block sizes that are multiples of %d.") % ratio_sum})
+        if not 0.5 <= self.minimization_probability <= 1:
+            raise ValidationError({'minimization_probability': _("Use a probability between 0.5 and 1.")})
+
+
+class AllocationCounter(models.Model):
+    """
+    Participants allocated to an arm within one level of a stratification
+    factor (e.g. gender=FEMALE). Updated with each allocation, so balance is
+    never recomputed from the cohort.
+    """
+    scheme = models.ForeignKey(RandomizationScheme, on_delete=models.CASCADE, related_name='counters')
+    factor = models.CharField(max_length=20)
+    level = models.CharField(max_length=50)
+    arm = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.factor}={self.level} / {self.arm}: {self.count}"
+
+    class Meta:
+        unique_together = ('scheme', 'factor', 'level', 'arm')
+
+
+class AllocationBlock(models.Model):
+    """The current permuted block of one stratum and how much of it has been used."""
+    scheme = models.ForeignKey(RandomizationScheme, on_delete=models.CASCADE, related_name='blocks')
+    stratum = models.CharField(max_length=200)
+    sequence = models.JSONField(default=list)
+    position = models.PositiveSmallIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.stratum}: {self.position}/{len(self.sequence)}"
+
+    class Meta:
+        unique_together = ('scheme', 'stratum')
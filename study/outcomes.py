@@ -0,0 +1,162 @@
+# study/outcomes.py
+
+import warnings
+from collections import namedtuple
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Max, Q
+
+from .models import BiologicalSample, ClinicalAssessment, Visit
+from .reports import NOT_RANDOMIZED
+
+# One pivoting query per group: a row per participant, a column per
+# (outcome, visit type).
+OutcomeGroup = namedtuple('OutcomeGroup', ['label', 'model', 'outcomes'])
+
+OUTCOME_GROUPS = [
+    OutcomeGroup("Clinical & functional", ClinicalAssessment, [
+        ('moca_score', "MoCA score"),
+        ('six_minute_walk_test_meters', "6-minute walk (m)"),
+        ('tug_test_seconds', "Timed up-and-go (s)"),
+    ]),
+    OutcomeGroup("Biomarkers", BiologicalSample, [
+        ('gfap', "GFAP"),
+        ('nfl', "NfL"),
+        ('ptau217', "pTau217"),
+        ('abeta40_42_ratio', "Abeta40/42 ratio"),
+    ]),
+]
+
+# Visit types in protocol order; the first one is the baseline.
+VISIT_TYPES = [value for value, label in Visit.VisitType.choices]
+VISIT_LABELS = [str(label) for value, label in Visit.VisitType.choices]
+
+CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _pivot(group, **filters):
+    """
+    Returns (participant ids, arms, values) where values[i, j, k] is outcome j
+    of participant i at visit type k (NaN when missing).
+    """
+    columns = {
+        f'{field}_{visit_type.lower()}': Max(field, filter=Q(visit__visit_type=visit_type))
+        for field, label in group.outcomes
+        for visit_type in VISIT_TYPES
+    }
+    rows = list(
+        group.model.objects.filter(**filters)
+        .values('visit__participant_id', 'visit__participant__assigned_group_name')
+        .annotate(**columns)
+        .order_by('visit__participant_id')
+        .values_list('visit__participant_id', 'visit__participant__assigned_group_name', *columns)
+    )
+    values = np.array([row[2:] for row in rows], dtype=np.float64)
+    values = values.reshape(len(rows), len(group.outcomes), len(VISIT_TYPES))
+    return [row[0] for row in rows], [row[1] for row in rows], values
+
+
+def _changes(values):
+    """Change and percent change from baseline, for all participants, outcomes and visits at once."""
+    baseline = values[:, :, :1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        change = values - baseline
+        percent = np.where(baseline != 0, change / baseline * 100, np.nan)
+    return change, percent
+
+
+def _number(value):
+    return None if np.isnan(value) else float(value)
+
+
+# --- Participant trajectory ---
+
+def build_trajectory(participant):
+    groups = []
+    for group in OUTCOME_GROUPS:
+        ids, arms, values = _pivot(group, visit__participant=participant)
+        if not ids:
+            values = np.full((1, len(group.outcomes), len(VISIT_TYPES)), np.nan)
+        change, percent = _changes(values)
+        groups.append({
+            'label': group.label,
+            'outcomes': [
+                {
+                    'label': label,
+                    'cells': [
+                        (_number(values[0, j, k]), _number(change[0, j, k]) if k else None, _number(percent[0, j, k]) if k else None)
+                        for k in range(len(VISIT_TYPES))
+                    ],
+                }
+                for j, (field, label) in enumerate(group.outcomes)
+            ],
+        })
+    return {'visits': VISIT_LABELS, 'groups': groups}
+
+
+def participant_trajectory(participant):
+    """
+    Cached per participant until their study's data_version changes, which
+    happens on every assessment save (see signals.py). Load the participant
+    with select_related('study').
+    """
+    key = f'trajectory:{participant.pk}:{participant.study.data_version}'
+    trajectory = cache.get(key)
+    if trajectory is None:
+        trajectory = build_trajectory(participant)
+        cache.set(key, trajectory, CACHE_TIMEOUT)
+    return trajectory
+
+
+# --- Study-wide change from baseline ---
+
+def build_change_from_baseline(study):
+    """
+    Per outcome, follow-up visit and arm: participants with both a baseline and
+    a follow-up value, their mean baseline, and the mean and SD of the change.
+    """
+    groups, all_arms = [], set()
+    pivots = [(group, *_pivot(group, visit__study=study)) for group in OUTCOME_GROUPS]
+    for group, ids, arms, values in pivots:
+        all_arms.update(arm or NOT_RANDOMIZED for arm in arms)
+    # Same column order as the CONSORT report.
+    arm_names = sorted(all_arms - {NOT_RANDOMIZED}) + ([NOT_RANDOMIZED] if NOT_RANDOMIZED in all_arms else [])
+
+    for group, ids, arms, values in pivots:
+        change, _ = _changes(values)
+        arms = np.array([arm or NOT_RANDOMIZED for arm in arms], dtype=object)
+        stats = []
+        for arm in arm_names:
+            in_arm = change[arms == arm]
+            paired = ~np.isnan(in_arm)
+            baseline = np.where(paired, values[arms == arm][:, :, :1], np.nan)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)  # empty or single-value slices give NaN
+                stats.append((
+                    paired.sum(axis=0),
+                    np.nanmean(baseline, axis=0),
+                    np.nanmean(in_arm, axis=0),
+                    np.nanstd(in_arm, axis=0, ddof=1),
+                ))
+        rows = []
+        for j, (field, label) in enumerate(group.outcomes):
+            for k in range(1, len(VISIT_TYPES)):
+                cells = [
+                    (int(n[j, k]), _number(base[j, k]), _number(mean[j, k]), _number(sd[j, k])) if n[j, k] else None
+                    for n, base, mean, sd in stats
+                ]
+                if any(cells):
+                    rows.append({'outcome': label, 'visit': VISIT_LABELS[k], 'cells': cells})
+        groups.append({'label': group.label, 'rows': rows})
+    return {'arms': arm_names, 'groups': groups}
+
+
+def change_from_baseline(study):
+    """Cached until the study's data_version changes; pass a freshly loaded study."""
+    key = f'change_from_baseline:{study.pk}:{study.data_version}'
+    table = cache.get(key)
+    if table is None:
+        table = build_change_from_baseline(study)
+        cache.set(key, table, CACHE_TIMEOUT)
+    return table
@@ -0,0 +1,147 @@
+# study/randomization.py
+
+import random
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import AllocationBlock, AllocationCounter, Participant, RandomizationScheme
+
+# Real allocations must not be predictable from earlier ones.
+_system_random = random.SystemRandom()
+
+
+class RandomizationError(Exception):
+    pass
+
+
+# --- Allocation rules (pure functions, shared with the simulation) ---
+
+def age_band(date_of_birth, edges, on_date):
+    """'<65', '65-74', '75+' style label for edges like [65, 75]."""
+    age = on_date.year - date_of_birth.year - ((on_date.month, on_date.day) < (date_of_birth.month, date_of_birth.day))
+    if not edges:
+        return 'all'
+    if age < edges[0]:
+        return f"<{edges[0]}"
+    for low, high in zip(edges, edges[1:]):
+        if age < high:
+            return f"{low}-{high - 1}"
+    return f"{edges[-1]}+"
+
+
+def stratum_levels(scheme, gender, date_of_birth, site, on_date):
+    """{factor: level} for the scheme's stratification factors."""
+    values = {
+        'gender': lambda: gender,
+        'age_band': lambda: age_band(date_of_birth, scheme.age_band_edges, on_date),
+        'site': lambda: site or 'unknown',
+    }
+    return {factor: values[factor]() for factor in scheme.stratify_by}
+
+
+def stratum_key(levels):
+    return '|'.join(f"{factor}={level}" for factor, level in levels.items()) or 'all'
+
+
+def _weighted_choice(arms, rng):
+    return rng.choices(list(arms), weights=list(arms.values()))[0]
+
+
+def minimize(arms, counts, levels, probability, rng):
+    """
+    Pocock-Simon minimization. `counts` maps (factor, level, arm) to the
+    number allocated so far; only the participant's own levels are read, so
+    the cost is O(factors x arms^2) whatever the cohort size. Imbalance is the
+    range of ratio-weighted counts, summed over factors.
+    """
+    def imbalance(candidate):
+        total = 0
+        for factor, level in levels.items():
+            weighted = [
+                (counts.get((factor, level, arm), 0) + (arm == candidate)) / ratio
+                for arm, ratio in arms.items()
+            ]
+            total += max(weighted) - min(weighted)
+        return total
+
+    scores = {arm: imbalance(arm) for arm in arms}
+    best = min(scores.values())
+    preferred = [arm for arm in arms if scores[arm] == best]
+    if len(preferred) == len(arms):
+        return _weighted_choice(arms, rng)
+    if rng.random() < probability:
+        return rng.choice(preferred)
+    return rng.choice([arm for arm in arms if arm not in preferred])
+
+
+def next_in_block(arms, block_sizes, sequence, position, rng):
+    """Returns (arm, sequence, position), starting a new shuffled block when the current one is used up."""
+    if position >= len(sequence):
+        repeats = rng.choice(block_sizes) // sum(arms.values())
+        sequence = [arm for arm, ratio in arms.items() for _ in range(ratio * repeats)]
+        rng.shuffle(sequence)
+        position = 0
+    return sequence[position], sequence, position + 1
+
+
+# --- Allocating participants ---
+
+def allocate(participant, on_date=None, rng=_system_random):
+    """
+    Assigns an eligible or enrolled participant to an arm of their study's
+    scheme and enrolls them. Returns the arm.
+
+    Allocations of one study are serialized by locking the scheme row (on
+    SQLite, by the write lock BEGIN IMMEDIATE takes), so two concurrent
+    enrollments never read the same counters. Reads and writes only the
+    counters of the participant's own levels.
+    """
+    on_date = on_date or timezone.now().date()
+    with transaction.atomic():
+        participant = Participant._base_manager.select_for_update().get(pk=participant.pk)
+        if participant.assigned_group_name:
+            raise RandomizationError(f"{participant} is already allocated to {participant.assigned_group_name}.")
+        if participant.status not in (Participant.Status.ELIGIBLE, Participant.Status.ENROLLED):
+            raise RandomizationError(f"{participant} must be eligible or enrolled to be randomized.")
+        try:
+            scheme = RandomizationScheme.objects.select_for_update().get(study_id=participant.study_id)
+        except RandomizationScheme.DoesNotExist:
+            raise RandomizationError(f"{participant.study} has no randomization scheme.")
+
+        levels = stratum_levels(scheme, participant.gender, participant.date_of_birth, participant.site, on_date)
+        level_filter = Q()
+        for factor, level in levels.items():
+            level_filter |= Q(factor=factor, level=level)
+        counts = {
+            (factor, level, arm): count
+            for factor, level, arm, count in AllocationCounter.objects.filter(level_filter, scheme=scheme)
+            .values_list('factor', 'level', 'arm', 'count')
+        } if levels else {}
+
+        if scheme.method == RandomizationScheme.Method.MINIMIZATION:
+            arm = minimize(scheme.arms, counts, levels, scheme.minimization_probability, rng)
+        else:
+            block, _ = AllocationBlock.objects.get_or_create(scheme=scheme, stratum=stratum_key(levels))
+            arm, block.sequence, block.position = next_in_block(
+                scheme.arms, scheme.block_sizes, block.sequence, block.position, rng
+            )
+            block.save(update_fields=['sequence', 'position'])
+
+        AllocationCounter.objects.bulk_create(
+            [
+                AllocationCounter(scheme=scheme, factor=factor, level=level, arm=arm,
+                                  count=counts.get((factor, level, arm), 0) + 1)
+                for factor, level in levels.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['scheme', 'factor', 'level', 'arm'],
+            update_fields=['count'],
+        )
+
+        participant.assigned_group_name = arm
+        participant.status = Participant.Status.ENROLLED
+        participant.enrollment_date = participant.enrollment_date or on_date
+        participant.save(update_fields=['assigned_group_name', 'status', 'enrollment_date'])
+    return arm
@@ -0,0 +1,185 @@
+# study/reports.py
+
+import csv
+import io
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Participant, ScheduledVisit, Study, Visit
+
+# Column label for participants who have not been randomized.
+NOT_RANDOMIZED = 'Not randomized'
+
+# Old versions are never read again; let them expire.
+CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def touch_study(study_id):
+    """
+    Invalidates the cached reports of a study by bumping its change counter.
+
+    The UPDATE runs once the current transaction commits, so a long data entry
+    or import does not hold the study row's lock and make every other writer
+    in the study wait for it.
+    """
+    _bump_after_commit([study_id])
+
+
+def touch_visit_studies(visit_ids):
+    """Same, for the studies of the given visits (one UPDATE, one bump per study)."""
+    # Read now: the visits may be deleted by the time the transaction commits.
+    study_ids = set(Visit.objects.filter(pk__in=visit_ids).values_list('study_id', flat=True))
+    if study_ids:
+        _bump_after_commit(sorted(study_ids))
+
+
+def _bump_after_commit(study_ids):
+    transaction.on_commit(
+        lambda: Study.objects.filter(pk__in=study_ids).update(data_version=F('data_version') + 1)
+    )
+
+
+# --- CONSORT flow ---
+
+def _arm(name):
+    return name or NOT_RANDOMIZED
+
+
+def build_consort_report(study, today=None):
+    """
+    CONSORT-style counts for one study from three grouped queries: participants
+    by status, arm and whether they were ever enrolled; protocol visits due and
+    attended by visit type and arm; and enrollments per month.
+    """
+    today = today or timezone.now().date()
+    by_status = (
+        Participant.objects.filter(study=study)
+        .values('status', 'assigned_group_name')
+        .annotate(n=Count('id'), enrolled=Count('id', filter=Q(enrollment_date__isnull=False)))
+    )
+    attendance = (
+        ScheduledVisit.objects.filter(study=study, window_start__lte=today)
+        .values('visit_type', 'participant__assigned_group_name')
+        .annotate(due=Count('id'), attended=Count('id', filter=Q(is_done=True)))
+    )
+    recruitment = (
+        Participant.objects.filter(study=study, enrollment_date__isnull=False)
+        .annotate(month=TruncMonth('enrollment_date'))
+        .values('month', 'assigned_group_name')
+        .annotate(n=Count('id'))
+        .order_by('month')
+    )
+
+    status_counts, flow = {}, {}
+    arms = set()
+
+    def add(table, row_key, arm, n):
+        row = table.setdefault(row_key, {})
+        row[arm] = row.get(arm, 0) + n
+
+    for row in by_status:
+        arm, status, n, enrolled = _arm(row['assigned_group_name']), row['status'], row['n'], row['enrolled']
+        arms.add(arm)
+        add(status_counts, status, arm, n)
+        add(flow, 'screened', arm, n)
+        if status == Participant.Status.SCREENING:
+            add(flow, 'in_screening', arm, n)
+        elif status == Participant.Status.WITHDRAWN and n > enrolled:
+            add(flow, 'excluded', arm, n - enrolled)
+        elif status == Participant.Status.ELIGIBLE:
+            add(flow, 'awaiting_enrollment', arm, n)
+        add(flow, 'enrolled', arm, enrolled)
+        if status == Participant.Status.ENROLLED:
+            add(flow, 'on_study', arm, n)
+        elif status == Participant.Status.WITHDRAWN:
+            add(flow, 'withdrawn', arm, enrolled)
+        elif status == Participant.Status.COMPLETED:
+            add(flow, 'completed', arm, n)
+
+    visits = {}
+    for row in attendance:
+        arm = _arm(row['participant__assigned_group_name'])
+        arms.add(arm)
+        counts = visits.setdefault(row['visit_type'], {}).setdefault(arm, [0, 0])
+        counts[0] += row['attended']
+        counts[1] += row['due']
+
+    months = {}
+    for row in recruitment:
+        add(months, row['month'], _arm(row['assigned_group_name']), row['n'])
+
+    # Randomized arms first, then the participants who have none yet. Every
+    # row below lists its counts in this order, for the template and the CSV.
+    arms = sorted(arms - {NOT_RANDOMIZED}) + ([NOT_RANDOMIZED] if NOT_RANDOMIZED in arms else [])
+
+    def row(label, by_arm):
+        counts = [by_arm.get(arm, 0) for arm in arms]
+        return str(label), counts, sum(counts)
+
+    cumulative, recruitment_rows = 0, []
+    for month, by_arm in months.items():
+        label, counts, total = row(month.strftime('%Y-%m'), by_arm)
+        cumulative += total
+        recruitment_rows.append((label, counts, total, cumulative))
+    flow_labels = [
+        ('screened', "Assessed for eligibility"),
+        ('in_screening', "Still in screening"),
+        ('excluded', "Excluded before enrollment"),
+        ('awaiting_enrollment', "Eligible, awaiting enrollment"),
+        ('enrolled', "Enrolled"),
+        ('on_study', "On study"),
+        ('withdrawn', "Withdrew after enrollment"),
+        ('completed', "Completed"),
+    ]
+    return {
+        'study_id': study.pk,
+        'generated_at': timezone.now(),
+        'arms': arms,
+        'flow': [row(label, flow.get(key, {})) for key, label in flow_labels],
+        'statuses': [row(label, status_counts.get(value, {})) for value, label in Participant.Status.choices],
+        'visits': [
+            (str(label), [visits[value].get(arm) for arm in arms]) for value, label in Visit.VisitType.choices
+            if value in visits
+        ],
+        'recruitment': recruitment_rows,
+    }
+
+
+def consort_report(study):
+    """
+    The cached report for the study's current data_version (read from `study`,
+    so load it fresh). Repeat views cost one cache read; any participant or
+    visit change bumps the version and the next view recomputes.
+    """
+    today = timezone.now().date()
+    # The date is part of the key because "due" visits depend on it.
+    key = f'consort:{study.pk}:{study.data_version}:{today.isoformat()}'
+    report = cache.get(key)
+    if report is None:
+        report = build_consort_report(study, today)
+        cache.set(key, report, CACHE_TIMEOUT)
+    return report
+
+
+def consort_csv(report):
+    """The report as CSV text: one row per section, line and arm."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['section', 'line', 'arm', 'count', 'due'])
+    arms = report['arms']
+    for section in ('flow', 'statuses'):
+        for label, counts, total in report[section]:
+            for arm, count in zip(arms, counts):
+                writer.writerow([section, label, arm, count, ''])
+    for label, counts in report['visits']:
+        for arm, attended_due in zip(arms, counts):
+            if attended_due:
+                writer.writerow(['visit_attendance', label, arm, *attended_due])
+    for label, counts, total, cumulative in report['recruitment']:
+        for arm, count in zip(arms, counts):
+            writer.writerow(['recruitment', label, arm, count, ''])
+    return buffer.getvalue()
@@ -0,0 +1,64 @@
+# study/retention.py
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Participant, Study, WearableDailyFeatures, WearableDataPoint
+
+# Rows removed per DELETE statement and transaction.
+BATCH_SIZE = 10_000
+
+
+# --- Per-study retention ---
+
+def retention_cutoff(study, now=None):
+    """Samples taken before this are past the study's retention period; None when it keeps everything."""
+    if study.wearable_retention_days is None:
+        return None
+    return (now or timezone.now()) - timedelta(days=study.wearable_retention_days)
+
+
+def prune_study(study, now=None, batch_size=BATCH_SIZE, pause=0, dry_run=False):
+    """
+    Deletes the study's raw wearable samples older than its retention period,
+    walking the (study, timestamp) index. Daily features are kept. Returns
+    the number of samples deleted (or, with `dry_run`, that would be).
+    """
+    cutoff = retention_cutoff(study, now)
+    if cutoff is None:
+        return 0
+    expired = WearableDataPoint.objects.filter(study=study, timestamp__lt=cutoff)
+    if dry_run:
+        return expired.count()
+    return expired.delete_in_batches(batch_size, pause)
+
+
+def apply_retention(study_id=None, **options):
+    """Prunes every study with a retention period (or only `study_id`). Returns {study: samples deleted}."""
+    studies = Study.objects.filter(wearable_retention_days__isnull=False).order_by('pk')
+    if study_id:
+        studies = studies.filter(pk=study_id)
+    return {study: prune_study(study, **options) for study in studies}
+
+
+# --- Withdrawal purge ---
+
+def withdrawn_participants(study_id=None):
+    participants = Participant.objects.filter(status=Participant.Status.WITHDRAWN).order_by('pk')
+    if study_id:
+        participants = participants.filter(study_id=study_id)
+    return participants
+
+
+def purge_participant(participant, batch_size=BATCH_SIZE, pause=0, dry_run=False):
+    """
+    Deletes all wearable samples and daily features of a participant, e.g.
+    one who withdrew consent for passive data. Returns (samples, feature days)
+    deleted, or with `dry_run` the numbers that would be.
+    """
+    samples = WearableDataPoint.objects.filter(participant=participant)
+    days = WearableDailyFeatures.objects.filter(participant=participant)
+    if dry_run:
+        return samples.count(), days.count()
+    return samples.delete_in_batches(batch_size, pause), days.delete_in_batches(batch_size, pause)
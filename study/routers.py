@@ -0,0 +1,43 @@
+# study/routers.py
+
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+def use_read_replica(view):
+    """
+    Sends the ORM reads of a view to the read replica, when one is configured.
+    Only for pages that never write and can tolerate a little replication lag.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if REPLICA_ALIAS not in settings.DATABASES:
+            return view(request, *args, **kwargs)
+        token = _read_alias.set(REPLICA_ALIAS)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+    return wrapper
+
+
+class ReadReplicaRouter:
+    """Routes reads inside @use_read_replica views to the replica; everything else uses 'default'."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -0,0 +1,107 @@
+# study/scheduling.py
+
+from collections import namedtuple
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Participant, Visit, ScheduledVisit
+
+# Target day (relative to enrollment) and the allowed window around it.
+VisitWindow = namedtuple('VisitWindow', ['offset_days', 'days_before', 'days_after'])
+
+PROTOCOL = {
+    Visit.VisitType.BASELINE: VisitWindow(offset_days=0, days_before=0, days_after=30),
+    Visit.VisitType.VISIT1: VisitWindow(offset_days=182, days_before=30, days_after=30),   # 6 months
+    Visit.VisitType.VISIT2: VisitWindow(offset_days=365, days_before=30, days_after=30),   # 12 months
+    Visit.VisitType.EXIT: VisitWindow(offset_days=365, days_before=0, days_after=60),
+}
+
+BATCH_SIZE = 1000
+
+
+def visit_window(enrollment_date, visit_type):
+    """Returns (target_date, window_start, window_end) for a visit type."""
+    window = PROTOCOL[visit_type]
+    target = enrollment_date + timedelta(days=window.offset_days)
+    return target, target - timedelta(days=window.days_before), target + timedelta(days=window.days_after)
+
+
+def target_date(participant, visit_type):
+    """The protocol date for a visit, or today when the participant is not enrolled yet."""
+    if participant.enrollment_date:
+        return visit_window(participant.enrollment_date, visit_type)[0]
+    return timezone.now().date()
+
+
+def generate_schedule(participants=None):
+    """
+    Upserts the expected visits of every enrolled participant in `participants`
+    (default: everyone) in batched INSERT ... ON CONFLICT statements, and drops
+    pending rows for participants who are no longer enrolled.
+    Returns the number of scheduled visits written.
+    """
+    if participants is None:
+        participants = Participant.objects.all()
+    enrolled = participants.filter(status=Participant.Status.ENROLLED, enrollment_date__isnull=False)
+
+    ScheduledVisit.objects.filter(participant__in=participants, is_done=False).exclude(participant__in=enrolled).delete()
+    done = set(
+        Visit.objects.filter(participant__in=enrolled, is_complete=True).values_list('participant_id', 'visit_type')
+    )
+
+    written = 0
+    batch = []
+    rows = enrolled.values_list('id', 'study_id', 'enrollment_date').iterator(chunk_size=BATCH_SIZE)
+    for participant_id, study_id, enrollment_date in rows:
+        for visit_type in PROTOCOL:
+            target, start, end = visit_window(enrollment_date, visit_type)
+            batch.append(ScheduledVisit(
+                study_id=study_id,
+                participant_id=participant_id,
+                visit_type=visit_type,
+                target_date=target,
+                window_start=start,
+                window_end=end,
+                is_done=(participant_id, visit_type) in done,
+            ))
+        if len(batch) >= BATCH_SIZE:
+            written += _upsert(batch)
+            batch = []
+    if batch:
+        written += _upsert(batch)
+    return written
+
+
+def _upsert(batch):
+    ScheduledVisit.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['participant', 'visit_type'],
+        update_fields=['target_date', 'window_start', 'window_end', 'is_done'],
+    )
+    return len(batch)
+
+
+def mark_visit(visit, is_done):
+    ScheduledVisit.objects.filter(participant_id=visit.participant_id, visit_type=visit.visit_type).update(is_done=is_done)
+
+
+# --- Worklist queries ---
+
+def upcoming_visits(days=14, today=None):
+    """Pending visits whose window opens within `days` and has not closed yet."""
+    today = today or timezone.now().date()
+    return (ScheduledVisit.objects
+            .filter(is_done=False, window_start__lte=today + timedelta(days=days), window_end__gte=today)
+            .select_related('participant')
+            .order_by('window_start'))
+
+
+def overdue_visits(today=None):
+    """Pending visits whose window has already closed."""
+    today = today or timezone.now().date()
+    return (ScheduledVisit.objects
+            .filter(is_done=False, window_end__lt=today)
+            .select_related('participant')
+            .order_by('window_end'))
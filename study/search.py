@@ -0,0 +1,167 @@
+# study/search.py
+
+import re
+
+from django.db import connections, router
+from django.db.models import Exists, F, Func, OuterRef
+from django.utils.functional import cached_property
+
+from .models import (
+    Participant,
+    Visit,
+    ClinicalAssessment,
+    BiologicalSample,
+    Neuroimaging,
+    SearchEntry,
+)
+from .tenancy import current_study_id
+
+# Which free-text field of which model feeds each search source.
+INDEXED_FIELDS = {
+    ClinicalAssessment: (SearchEntry.Source.CLINICAL, 'ntb_results_summary'),
+    BiologicalSample: (SearchEntry.Source.BIOLOGICAL, 'initial_blood_screening_summary'),
+    Neuroimaging: (SearchEntry.Source.NEUROIMAGING, 'mri_key_findings'),
+}
+
+RESULT_LIMIT = 50
+
+
+# --- Keeping the index in sync ---
+
+def index_instance(instance):
+    """Mirrors the free-text field of a data-entry record into SearchEntry."""
+    source, field_name = INDEXED_FIELDS[type(instance)]
+    content = (getattr(instance, field_name) or '').strip()
+    if content:
+        SearchEntry.objects.update_or_create(
+            visit_id=instance.visit_id, source=source, defaults={'content': content}
+        )
+    else:
+        SearchEntry.objects.filter(visit_id=instance.visit_id, source=source).delete()
+
+
+def unindex_instance(instance):
+    source, _ = INDEXED_FIELDS[type(instance)]
+    SearchEntry.objects.filter(visit_id=instance.visit_id, source=source).delete()
+
+
+# --- Queries ---
+
+class _EnglishVector(Func):
+    """
+    to_tsvector('english', <field>), spelled exactly like the GIN index of
+    migration 0005. SearchVector would wrap the field in COALESCE, which the
+    index does not match.
+    """
+    function = 'to_tsvector'
+    template = "%(function)s('english', %(expressions)s)"
+
+    @cached_property
+    def output_field(self):
+        from django.contrib.postgres.search import SearchVectorField
+        return SearchVectorField()
+
+
+def search_participants(participant_id='', status='', arm='', visit_type='', visit_complete=None):
+    """
+    Structured participant search. Every filter is backed by an index; the ID
+    prefix becomes a LIKE 'prefix%', which PostgreSQL answers from the
+    varchar_pattern_ops index of migration 0005.
+    """
+    participants = Participant.objects.select_related('study')
+    prefix = participant_id.strip().upper()
+    if prefix:
+        participants = participants.filter(participant_id__startswith=prefix)
+    if status:
+        participants = participants.filter(status=status)
+    if arm:
+        participants = participants.filter(assigned_group_name=arm)
+    if visit_type or visit_complete is not None:
+        visits = Visit.objects.filter(participant=OuterRef('pk'))
+        if visit_type:
+            visits = visits.filter(visit_type=visit_type)
+        if visit_complete is not None:
+            visits = visits.filter(is_complete=visit_complete)
+        participants = participants.filter(Exists(visits))
+    return participants.order_by('participant_id')[:RESULT_LIMIT]
+
+
+def search_text(query):
+    """
+    Full-text search over the indexed findings. Returns SearchEntry objects
+    (with visit and participant loaded) best match first, each with a
+    `snippet` attribute.
+    """
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return []
+
+    # Follow the router, so @use_read_replica views search the replica.
+    connection = connections[router.db_for_read(SearchEntry)]
+
+    if connection.vendor == 'sqlite':
+        # Quote every term so user input cannot inject FTS5 syntax, and allow
+        # prefix matches ("cardi" finds "cardiac").
+        match = ' '.join(f'"{term}"*' for term in terms)
+        sql, params = (
+            "SELECT study_searchentry_fts.rowid, snippet(study_searchentry_fts, 0, '', '', '…', 16) "
+            "FROM study_searchentry_fts", [match]
+        )
+        study_id = current_study_id()
+        if study_id is not None:
+            # Filter before the LIMIT so other studies' hits do not crowd out this one's.
+            sql += (" JOIN study_searchentry e ON e.id = study_searchentry_fts.rowid"
+                    " JOIN study_visit v ON v.id = e.visit_id AND v.study_id = %s")
+            params = [study_id, match]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                sql + " WHERE study_searchentry_fts MATCH %s ORDER BY rank LIMIT %s",
+                params + [RESULT_LIMIT],
+            )
+            snippets = dict(cursor.fetchall())
+    elif connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        search_query = SearchQuery(' '.join(terms), config='english')
+        entries = SearchEntry.objects.annotate(
+            vector=_EnglishVector('content'),
+        ).filter(vector=search_query).annotate(
+            rank=SearchRank(F('vector'), search_query),
+        ).order_by('-rank', 'pk').values_list('id', 'content')[:RESULT_LIMIT]
+        snippets = {pk: content[:200] for pk, content in entries}
+    else:
+        entries = SearchEntry.objects.all()
+        for term in terms:
+            entries = entries.filter(content__icontains=term)
+        snippets = {pk: content[:200] for pk, content in entries.values_list('id', 'content')[:RESULT_LIMIT]}
+
+    entries = SearchEntry.objects.filter(pk__in=snippets).select_related('visit__participant').in_bulk()
+    results = []
+    for pk, snippet in snippets.items():
+        entry = entries.get(pk)
+        if entry is None:  # deleted since the match
+            continue
+        entry.snippet = snippet
+        results.append(entry)
+    return results
+
+
+def index_instances(instances):
+    """
+    Bulk version of index_instance() for code that bypasses signals, e.g.
+    bulk_create()/bulk_update(). All instances must be of the same model.
+    """
+    if not instances:
+        return
+    source, field_name = INDEXED_FIELDS[type(instances[0])]
+    entries, cleared = [], []
+    for instance in instances:
+        content = (getattr(instance, field_name) or '').strip()
+        if content:
+            entries.append(SearchEntry(visit_id=instance.visit_id, source=source, content=content))
+        else:
+            cleared.append(instance.visit_id)
+    SearchEntry.objects.bulk_create(
+        entries, update_conflicts=True, unique_fields=['visit', 'source'], update_fields=['content']
+    )
+    SearchEntry.objects.filter(visit_id__in=cleared, source=source).delete()
@@ -0,0 +1,103 @@
+# study/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import audit, live, reports, scheduling, search, summaries
+from .models import (
+    Participant, Visit, VisitAssessment, Answer, ClinicalAssessment, BiologicalSample, Neuroimaging,
+    WearableDataPoint, wearable_points_created,
+)
+
+
+@receiver(post_save, sender=ClinicalAssessment)
+@receiver(post_save, sender=BiologicalSample)
+@receiver(post_save, sender=Neuroimaging)
+def update_search_index(sender, instance, **kwargs):
+    search.index_instance(instance)
+
+
+@receiver(post_delete, sender=ClinicalAssessment)
+@receiver(post_delete, sender=BiologicalSample)
+@receiver(post_delete, sender=Neuroimaging)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.unindex_instance(instance)
+
+
+@receiver(post_save, sender=Participant)
+def update_visit_schedule(sender, instance, **kwargs):
+    scheduling.generate_schedule(Participant.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Participant)
+@receiver(post_delete, sender=Participant)
+@receiver(post_save, sender=Visit)
+@receiver(post_delete, sender=Visit)
+def touch_study(sender, instance, **kwargs):
+    reports.touch_study(instance.study_id)
+
+
+@receiver(post_save, sender=ClinicalAssessment)
+@receiver(post_delete, sender=ClinicalAssessment)
+@receiver(post_save, sender=BiologicalSample)
+@receiver(post_delete, sender=BiologicalSample)
+def touch_outcome_study(sender, instance, **kwargs):
+    # Outcome trajectories are cached on the study's data_version too.
+    reports.touch_visit_studies([instance.visit_id])
+
+
+@receiver(post_save, sender=Visit)
+def mark_scheduled_visit(sender, instance, **kwargs):
+    scheduling.mark_visit(instance, instance.is_complete)
+
+
+@receiver(post_delete, sender=Visit)
+def unmark_scheduled_visit(sender, instance, **kwargs):
+    scheduling.mark_visit(instance, False)
+
+
+@receiver(post_save, sender=Visit)
+@receiver(post_save, sender=VisitAssessment)
+@receiver(post_delete, sender=VisitAssessment)
+@receiver(post_save, sender=ClinicalAssessment)
+@receiver(post_delete, sender=ClinicalAssessment)
+@receiver(post_save, sender=BiologicalSample)
+@receiver(post_delete, sender=BiologicalSample)
+@receiver(post_save, sender=Neuroimaging)
+@receiver(post_delete, sender=Neuroimaging)
+def refresh_visit_summary(sender, instance, **kwargs):
+    visit_id = instance.pk if sender is Visit else instance.visit_id
+    # Run after commit: when the visit itself is being deleted, its children's
+    # post_delete fires first and must not re-create the summary row.
+    transaction.on_commit(lambda: summaries.refresh_visit_summaries([visit_id]))
+
+
+@receiver(post_save, sender=ClinicalAssessment)
+@receiver(post_save, sender=BiologicalSample)
+@receiver(post_save, sender=Neuroimaging)
+@receiver(post_save, sender=VisitAssessment)
+@receiver(post_save, sender=Answer)
+def audit_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        audit.record_save(instance, created)
+
+
+@receiver(post_delete, sender=ClinicalAssessment)
+@receiver(post_delete, sender=BiologicalSample)
+@receiver(post_delete, sender=Neuroimaging)
+@receiver(post_delete, sender=VisitAssessment)
+@receiver(post_delete, sender=Answer)
+def audit_delete(sender, instance, **kwargs):
+    audit.record_delete(instance)
+
+
+@receiver(post_save, sender=WearableDataPoint)
+def publish_wearable_point(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        live.publish_points([instance])
+
+
+@receiver(wearable_points_created)
+def publish_wearable_points(sender, points, **kwargs):
+    live.publish_points(points)
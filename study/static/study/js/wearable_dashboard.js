@@ -0,0 +1,114 @@
+// Charts for study/wearable_dashboard.html. Loaded with `defer`, after chart.umd.min.js.
+(function () {
+    const data = JSON.parse(document.getElementById('wearable-chart-data').textContent);
+    const WINDOW_MS = 24 * 60 * 60 * 1000;  // The page shows the last 24 hours.
+    const timeOnly = (time) => time.slice(11, 16);  // HH:MM (UTC)
+
+    // Heart Rate Chart
+    const heartRateChart = new Chart(document.getElementById('heartRateChart').getContext('2d'), {
+        type: 'line',
+        data: {
+            labels: data.hr_times.map(timeOnly),
+            datasets: [{
+                label: 'Heart Rate',
+                data: data.hr_data,
+                borderColor: 'rgb(255, 99, 132)',
+                backgroundColor: 'rgba(255, 99, 132, 0.2)',
+                borderWidth: 1,
+                pointRadius: 2,
+                tension: 0.1
+            }]
+        },
+        options: { scales: { y: { beginAtZero: false } } }
+    });
+
+    // SpO2 Chart
+    const spo2Chart = new Chart(document.getElementById('spo2Chart').getContext('2d'), {
+        type: 'line',
+        data: {
+            labels: data.spo2_times.map(timeOnly),
+            datasets: [{
+                label: 'SpO₂ (%)',
+                data: data.spo2_data,
+                borderColor: 'rgb(54, 162, 235)',
+                backgroundColor: 'rgba(54, 162, 235, 0.2)',
+                borderWidth: 1,
+                pointRadius: 2,
+                tension: 0.1
+            }]
+        },
+        options: { scales: { y: { beginAtZero: false, suggestedMin: 90 } } }
+    });
+
+    // Live updates: the server pushes new samples and tile values (see study/live.py).
+    // The page only turns them on when it was served over ASGI.
+    if (!data.live_updates || !window.EventSource) {
+        return;
+    }
+    const formats = {
+        avg_hr_24h: (value) => Math.round(value),
+        latest_spo2: (value) => value.toFixed(1),
+    };
+    let lastId = 0;
+
+    function plausible(name, value) {
+        const [low, high] = data.plausible_ranges[name];
+        return value !== null && value >= low && value <= high;
+    }
+
+    // Full minute of every charted sample, to drop those that leave the window.
+    const times = new Map([[heartRateChart, data.hr_times], [spo2Chart, data.spo2_times]]);
+
+    function append(chart, time, value) {
+        times.get(chart).push(time);
+        chart.data.labels.push(timeOnly(time));
+        chart.data.datasets[0].data.push(value);
+    }
+
+    function trim(chart, cutoff) {
+        const chartTimes = times.get(chart);
+        let old = 0;
+        while (old < chartTimes.length && chartTimes[old] < cutoff) {
+            old++;
+        }
+        chartTimes.splice(0, old);
+        chart.data.labels.splice(0, old);
+        chart.data.datasets[0].data.splice(0, old);
+    }
+
+    const source = new EventSource(data.stream_url);
+    source.addEventListener('wearables', function (event) {
+        const message = JSON.parse(event.data);
+        for (const point of message.points) {
+            // A reconnect can replay samples this page already has.
+            if (point.id !== null && point.id <= lastId) {
+                continue;
+            }
+            lastId = Math.max(lastId, point.id || 0);
+            const time = point.timestamp.slice(0, 16);  // YYYY-MM-DDTHH:MM (UTC), as rendered by the view
+            if (plausible('heart_rate', point.heart_rate)) {
+                append(heartRateChart, time, point.heart_rate);
+            }
+            if (plausible('spo2', point.spo2)) {
+                append(spo2Chart, time, point.spo2);
+            }
+        }
+        // Measured from the newest sample rather than the browser's clock.
+        if (message.points.length) {
+            const newest = message.points[message.points.length - 1].timestamp;
+            const cutoff = new Date(Date.parse(newest) - WINDOW_MS).toISOString().slice(0, 16);
+            trim(heartRateChart, cutoff);
+            trim(spo2Chart, cutoff);
+        }
+        heartRateChart.update('none');
+        spo2Chart.update('none');
+
+        for (const [name, value] of Object.entries(message.tiles)) {
+            const element = document.querySelector(`[data-tile="${name}"]`);
+            if (element) {
+                const format = formats[name];
+                element.textContent = value === null ? '—' : (format ? format(value) : value);
+            }
+        }
+    });
+})();
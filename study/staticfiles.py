@@ -0,0 +1,123 @@
+# study/staticfiles.py
+
+import gzip
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+
+# Text formats worth compressing. Images and fonts are already compressed.
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.map', '.svg', '.txt', '.json', '.html')
+
+# Hashed file names change whenever their content does, so browsers may keep
+# them forever. Anything else is revalidated after a short while.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE_CONTROL = 'public, max-age=60'
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Hashes file names like ManifestStaticFilesStorage and writes a gzip copy
+    (name.gz) next to every compressible file during collectstatic, so the
+    compression cost is paid once at deploy time instead of on every request.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                compressed_name = self.compress(name)
+                if compressed_name:
+                    yield name, compressed_name, True
+
+    def compress(self, name):
+        """Writes name.gz and returns its name, or None when gzip does not pay off."""
+        path = self.path(name)
+        with open(path, 'rb') as f:
+            data = f.read()
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) >= len(data) * 0.95:
+            return None
+        with open(path + '.gz', 'wb') as f:
+            f.write(compressed)
+        return name + '.gz'
+
+
+class StaticFile:
+    __slots__ = ('path', 'gzip_path', 'content_type', 'last_modified', 'cache_control')
+
+    def __init__(self, path, gzip_path, cache_control):
+        self.path = path
+        self.gzip_path = gzip_path
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.last_modified = int(os.stat(path).st_mtime)
+        self.cache_control = cache_control
+
+
+class StaticFilesMiddleware:
+    """
+    Serves the collected files in STATIC_ROOT straight from the app, so no
+    separate web server or CDN is needed.
+
+    The file list is read once at startup. Browsers that accept gzip get the
+    precompressed copy, and hashed names are cached for a year. Requests for
+    files that are not collected (e.g. with DEBUG on, before collectstatic)
+    fall through to the rest of the stack.
+    """
+
+    def __init__(self, get_response):
+        if not settings.STATIC_ROOT or not os.path.isdir(settings.STATIC_ROOT):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = '/' + settings.STATIC_URL.lstrip('/')
+        self.files = self.scan(str(settings.STATIC_ROOT))
+
+    def scan(self, root):
+        hashed_names = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        files = {}
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.endswith('.gz'):
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                gzip_path = path + '.gz'
+                files[self.prefix + name] = StaticFile(
+                    path,
+                    gzip_path if os.path.exists(gzip_path) else None,
+                    IMMUTABLE_CACHE_CONTROL if name in hashed_names else DEFAULT_CACHE_CONTROL,
+                )
+        return files
+
+    def __call__(self, request):
+        static_file = self.files.get(request.path_info)
+        if static_file is None or request.method not in ('GET', 'HEAD'):
+            return self.get_response(request)
+        return self.serve(request, static_file)
+
+    def serve(self, request, static_file):
+        since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        if since is not None and static_file.last_modified <= since:
+            response = HttpResponseNotModified()
+        else:
+            use_gzip = static_file.gzip_path and 'gzip' in request.headers.get('Accept-Encoding', '')
+            response = FileResponse(
+                open(static_file.gzip_path if use_gzip else static_file.path, 'rb'),
+                content_type=static_file.content_type,
+            )
+            # FileResponse adds an inline disposition naming the file on disk.
+            del response['Content-Disposition']
+            if use_gzip:
+                response['Content-Encoding'] = 'gzip'
+        if static_file.gzip_path:
+            response['Vary'] = 'Accept-Encoding'
+        response['Last-Modified'] = http_date(static_file.last_modified)
+        response['Cache-Control'] = static_file.cache_control
+        return response
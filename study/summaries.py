@@ -0,0 +1,77 @@
+# study/summaries.py
+
+from django.db.models import Count, Max, Q
+
+from .models import Visit, VisitSummary
+
+SUMMARY_FIELDS = [
+    'participant', 'visit_type', 'visit_date', 'is_complete',
+    'clinical_complete', 'clinical_updated_at',
+    'biological_complete', 'biological_updated_at',
+    'neuroimaging_complete', 'neuroimaging_updated_at',
+    'questionnaires_assigned', 'questionnaires_completed', 'last_questionnaire_at',
+]
+
+BATCH_SIZE = 500
+
+
+def _build(visit):
+    clinical = getattr(visit, 'clinical_assessment', None)
+    biological = getattr(visit, 'biological_sample', None)
+    neuroimaging = getattr(visit, 'neuroimaging', None)
+    # "Complete" mirrors the tile rules on the visit dashboard.
+    return VisitSummary(
+        visit_id=visit.id,
+        participant_id=visit.participant_id,
+        visit_type=visit.visit_type,
+        visit_date=visit.visit_date,
+        is_complete=visit.is_complete,
+        clinical_complete=bool(clinical and clinical.moca_score is not None),
+        clinical_updated_at=clinical.updated_at if clinical else None,
+        biological_complete=bool(biological and biological.gfap is not None),
+        biological_updated_at=biological.updated_at if biological else None,
+        neuroimaging_complete=bool(neuroimaging and neuroimaging.mri_completed),
+        neuroimaging_updated_at=neuroimaging.updated_at if neuroimaging else None,
+        questionnaires_assigned=visit.questionnaires_assigned,
+        questionnaires_completed=visit.questionnaires_completed,
+        last_questionnaire_at=visit.last_questionnaire_at,
+    )
+
+
+def _with_counts(visits):
+    return visits.for_dashboard().annotate(
+        questionnaires_assigned=Count('assessments'),
+        questionnaires_completed=Count('assessments', filter=Q(assessments__completed_at__isnull=False)),
+        last_questionnaire_at=Max('assessments__completed_at'),
+    )
+
+
+def live_summaries(visit_ids):
+    """Unsaved summaries of the given visits computed from their data tables, with one query."""
+    return [_build(visit) for visit in _with_counts(Visit.objects.filter(pk__in=list(visit_ids)))]
+
+
+def refresh_visit_summaries(visits=None):
+    """
+    Recomputes the summary rows of `visits` (a Visit queryset or a list of
+    visit ids; default: every visit) with one query and one upsert per batch.
+    """
+    if visits is None:
+        visits = Visit.objects.all()
+    elif not hasattr(visits, 'query'):
+        visits = Visit.objects.filter(pk__in=list(visits))
+
+    batch = []
+    for visit in _with_counts(visits).order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        batch.append(_build(visit))
+        if len(batch) >= BATCH_SIZE:
+            _upsert(batch)
+            batch = []
+    if batch:
+        _upsert(batch)
+
+
+def _upsert(batch):
+    VisitSummary.objects.bulk_create(
+        batch, update_conflicts=True, unique_fields=['visit'], update_fields=SUMMARY_FIELDS,
+    )
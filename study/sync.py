@@ -0,0 +1,325 @@
+# study/sync.py
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import audit, summaries
+from .models import Answer, Choice, Question, QuestionnaireTemplate, Visit, VisitAssessment
+
+# Assessments accepted per request; tablets send the rest in later batches.
+MAX_BATCH_SIZE = 200
+
+# Tablet clocks drift; completion times further ahead than this are refused.
+CLOCK_SKEW = timedelta(minutes=5)
+
+# Largest primary key; bigger numbers overflow the database's integer types.
+MAX_ID = 2 ** 63 - 1
+
+
+# --- Definitions for offline clients ---
+
+def questionnaire_definitions():
+    """
+    Every questionnaire with its questions and choices in display order, plus
+    a `version` per questionnaire and one for the whole document. Three queries.
+    """
+    templates = QuestionnaireTemplate.objects.order_by('name').prefetch_related(
+        Prefetch('questions', queryset=Question.objects.order_by('order', 'id').prefetch_related(
+            Prefetch('choices', queryset=Choice.objects.order_by('value', 'id'))
+        ))
+    )
+    definitions = []
+    for template in templates:
+        definition = {
+            'id': template.id,
+            'name': template.name,
+            'description': template.description,
+            'questions': [
+                {
+                    'id': question.id,
+                    'order': question.order,
+                    'text': question.text,
+                    'choices': [
+                        {'id': choice.id, 'text': choice.text, 'value': choice.value}
+                        for choice in question.choices.all()
+                    ],
+                }
+                for question in template.questions.all()
+            ],
+        }
+        definition['version'] = _digest(definition)
+        definitions.append(definition)
+    return {'version': _digest(definitions), 'questionnaires': definitions}
+
+
+def _digest(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16]
+
+
+# --- Batch submission ---
+
+class ItemResult:
+    """
+    Outcome of one submitted assessment: 'created', 'updated', 'unchanged',
+    'conflict' (the server holds a completion at least as recent, which is
+    kept) or 'error'.
+    """
+    def __init__(self, index, item):
+        self.index = index
+        self.client_id = item.get('client_id') if isinstance(item, dict) else None
+        self.status = 'unchanged'
+        self.assessment = None
+        self.errors = []
+
+    def as_dict(self):
+        result = {'index': self.index, 'client_id': self.client_id, 'status': self.status}
+        if self.assessment is not None and self.assessment.pk is not None:
+            result.update(
+                assessment_id=self.assessment.pk,
+                total_score=self.assessment.total_score,
+                completed_at=self.assessment.completed_at,
+            )
+        if self.errors:
+            result['errors'] = self.errors
+        return result
+
+
+def _id(value):
+    """A primary key sent by a client, or raises ValueError."""
+    try:
+        pk = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(value)
+    if not 1 <= pk <= MAX_ID:
+        raise ValueError(value)
+    return pk
+
+
+def _parse_item(item, visits, templates):
+    """Returns (visit id, template, completed_at, {question id: choice}) or raises ValueError."""
+    if not isinstance(item, dict):
+        raise ValueError("Each item must be an object.")
+    try:
+        visit_id, template_id = _id(item.get('visit_id')), _id(item.get('questionnaire_id'))
+    except ValueError:
+        raise ValueError("visit_id and questionnaire_id are required positive 64-bit integers.")
+    if visit_id not in visits:
+        raise ValueError(f"Visit {visit_id} was not found.")
+    template = templates.get(template_id)
+    if template is None:
+        raise ValueError(f"Questionnaire {template_id} was not found.")
+
+    completed_at = parse_datetime(str(item.get('completed_at') or ''))
+    if completed_at is None or timezone.is_naive(completed_at):
+        raise ValueError("completed_at must be an ISO 8601 date and time with a UTC offset.")
+    if completed_at > timezone.now() + CLOCK_SKEW:
+        raise ValueError("completed_at lies in the future.")
+
+    answers = item.get('answers')
+    if not isinstance(answers, dict):
+        raise ValueError("answers must map question ids to choice ids.")
+    questions = {question.id: question for question in template.questions.all()}
+    selected, errors = {}, []
+    for question_id, choice_id in answers.items():
+        question = questions.get(int(question_id)) if str(question_id).isdigit() else None
+        if question is None:
+            errors.append(f"Question {question_id} is not part of {template.name}.")
+            continue
+        choice = next((c for c in question.choices.all() if str(c.id) == str(choice_id)), None)
+        if choice is None:
+            errors.append(f"Choice {choice_id} does not belong to question {question_id}.")
+            continue
+        selected[question.id] = choice
+    answered = {str(question_id) for question_id in answers}
+    missing = [str(question_id) for question_id in questions if str(question_id) not in answered]
+    if missing:
+        errors.append(f"Unanswered question(s): {', '.join(missing)}.")
+    if errors:
+        raise ValueError(*errors)
+    return visit_id, template, completed_at, selected
+
+
+def sync_assessments(items):
+    """
+    Validates, scores and saves a batch of assessments completed offline.
+
+    Each item names a visit and a questionnaire (the assessment is created if
+    it was not assigned yet) and carries `completed_at` and `answers`
+    ({question id: choice id}). Per assessment, the most recent completion
+    wins: an item older than the stored completion, or than another item for
+    the same assessment in the batch, is reported as a conflict and not saved.
+
+    Lookups take a fixed number of queries whatever the batch size, and all
+    valid items are written in one transaction with bulk inserts and updates.
+    Invalid items do not stop the others. Returns one ItemResult per item.
+    """
+    results = [ItemResult(index, item) for index, item in enumerate(items)]
+    dicts = [item for item in items if isinstance(item, dict)]
+
+    def ids(key):
+        values = set()
+        for item in dicts:
+            try:
+                values.add(_id(item.get(key)))
+            except ValueError:
+                pass
+        return values
+
+    # Visit.objects is scoped to the selected study, so other studies' visits are "not found".
+    visits = set(Visit.objects.filter(pk__in=ids('visit_id')).values_list('pk', flat=True))
+    templates = QuestionnaireTemplate.objects.filter(pk__in=ids('questionnaire_id')).prefetch_related(
+        Prefetch('questions', queryset=Question.objects.prefetch_related('choices'))
+    ).in_bulk()
+
+    parsed = {}
+    for result, item in zip(results, items):
+        try:
+            parsed[result.index] = _parse_item(item, visits, templates)
+        except ValueError as e:
+            result.status = 'error'
+            result.errors = list(e.args)
+
+    existing = _existing_assessments(parsed.values())
+
+    # The newest completion of each assessment in the batch is the candidate.
+    newest = {}
+    for index, (visit_id, template, completed_at, selected) in parsed.items():
+        key = (visit_id, template.id)
+        if key not in newest or completed_at > parsed[newest[key]][2]:
+            newest[key] = index
+
+    to_create, to_update, writes, read_at = [], [], [], {}
+    for index, (visit_id, template, completed_at, selected) in parsed.items():
+        result, key = results[index], (visit_id, template.id)
+        assessment = existing.get(key)
+        if index != newest[key]:
+            result.status = 'conflict'
+            result.errors = ["A more recent completion of this assessment is in the same batch."]
+            continue
+        if assessment is not None and assessment.completed_at and assessment.completed_at >= completed_at:
+            stored = {answer.question_id: answer.selected_choice_id for answer in assessment.answers.all()}
+            same = stored == {question_id: choice.id for question_id, choice in selected.items()}
+            result.status = 'unchanged' if same else 'conflict'
+            result.assessment = assessment
+            continue
+
+        if assessment is None:
+            assessment = VisitAssessment(visit_id=visit_id, questionnaire_template=template)
+            to_create.append(assessment)
+            result.status = 'created'
+        else:
+            to_update.append(assessment)
+            read_at[assessment.pk] = assessment.completed_at
+            result.status = 'updated'
+        assessment.completed_at = completed_at
+        assessment.total_score = sum(choice.value for choice in selected.values())
+        result.assessment = assessment
+        writes.append((assessment, selected))
+
+    if writes:
+        lost = _save(to_create, to_update, writes, read_at)
+        for result in results:
+            if result.assessment in lost:
+                result.status = 'conflict'
+                result.assessment = None
+                result.errors = ["Another device saved this assessment at the same time. Sync again to compare."]
+    return results
+
+
+def _existing_assessments(parsed):
+    """{(visit id, template id): VisitAssessment with its answers} for the parsed items."""
+    parsed = list(parsed)
+    return {
+        (assessment.visit_id, assessment.questionnaire_template_id): assessment
+        for assessment in VisitAssessment.objects.filter(
+            visit_id__in={visit_id for visit_id, *_ in parsed},
+            questionnaire_template_id__in={template.id for _, template, *_ in parsed},
+        ).prefetch_related('answers')
+    }
+
+
+def _create_assessments(to_create):
+    """
+    Inserts the new assessments and returns those another request created
+    first (visit and questionnaire are unique together). Only when the bulk
+    insert fails are they retried one at a time to find them.
+    """
+    try:
+        with transaction.atomic():
+            VisitAssessment.objects.bulk_create(to_create)
+        return []
+    except IntegrityError:
+        pass
+    lost = []
+    for assessment in to_create:
+        try:
+            with transaction.atomic():
+                VisitAssessment.objects.bulk_create([assessment])
+        except IntegrityError:
+            lost.append(assessment)
+    return lost
+
+
+def _changed_since_read(to_update, read_at):
+    """
+    Locks the assessments about to be updated and returns those another
+    request completed again (or deleted) since `read_at` {pk: completed_at}
+    was read; their answers may have changed too, so they are not saved.
+    """
+    if not to_update:
+        return []
+    current = dict(
+        VisitAssessment.objects.select_for_update()
+        .filter(pk__in=[assessment.pk for assessment in to_update])
+        .values_list('pk', 'completed_at')
+    )
+    return [
+        assessment for assessment in to_update
+        if assessment.pk not in current or current[assessment.pk] != read_at[assessment.pk]
+    ]
+
+
+def _save(to_create, to_update, writes, read_at):
+    """
+    Writes the assessments and their answers in one transaction, updating
+    answers in place like take_questionnaire. Returns the assessments that
+    lost a race with a concurrent request and were not saved.
+    """
+    with audit.batch():
+        lost = _create_assessments(to_create) + _changed_since_read(to_update, read_at)
+        if lost:
+            to_create = [assessment for assessment in to_create if assessment not in lost]
+            to_update = [assessment for assessment in to_update if assessment not in lost]
+            writes = [(assessment, selected) for assessment, selected in writes if assessment not in lost]
+        VisitAssessment.objects.bulk_update(to_update, ['completed_at', 'total_score'])
+
+        answers_to_create, answers_to_update, stale = [], [], []
+        for assessment, selected in writes:
+            current = {} if assessment in to_create else {answer.question_id: answer for answer in assessment.answers.all()}
+            for question_id, choice in selected.items():
+                answer = current.pop(question_id, None)
+                if answer is None:
+                    answers_to_create.append(Answer(visit_assessment=assessment, question_id=question_id, selected_choice=choice))
+                elif answer.selected_choice_id != choice.id:
+                    answer.selected_choice = choice
+                    answers_to_update.append(answer)
+            stale.extend(current.values())  # Questions no longer in the template
+        Answer.objects.bulk_create(answers_to_create)
+        Answer.objects.bulk_update(answers_to_update, ['selected_choice'])
+        for answer in stale:
+            answer.delete()
+
+        # Bulk writes skip the post_save signals, so log the changes and
+        # refresh the visit summaries here.
+        audit.record_bulk(to_create, created=True)
+        audit.record_bulk(to_update, created=False)
+        audit.record_bulk(answers_to_create, created=True)
+        audit.record_bulk(answers_to_update, created=False)
+        summaries.refresh_visit_summaries(sorted({assessment.visit_id for assessment, selected in writes}))
+    return lost
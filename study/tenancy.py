@@ -0,0 +1,57 @@
+# study/tenancy.py
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Session key holding the id of the study the user is working in.
+SESSION_KEY = 'study_id'
+
+# The study every scoped query is limited to; None means all studies.
+_current_study = ContextVar('current_study', default=None)
+
+
+def current_study_id():
+    return _current_study.get()
+
+
+@contextmanager
+def use_study(study_id):
+    """Scopes the queries of the enclosed block to one study (None: all studies)."""
+    token = _current_study.set(study_id)
+    try:
+        yield
+    finally:
+        _current_study.reset(token)
+
+
+class StudyMiddleware:
+    """
+    Scopes each request to the study selected in the session. When nothing
+    has been selected and the deployment runs a single study, that study is
+    selected automatically.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        study_id = request.session.get(SESSION_KEY)
+        if study_id is None and request.user.is_authenticated:
+            from .models import Study
+            study_ids = list(Study.objects.values_list('id', flat=True)[:2])
+            if len(study_ids) == 1:
+                study_id = request.session[SESSION_KEY] = study_ids[0]
+        request.study_id = study_id
+        with use_study(study_id):
+            return self.get_response(request)
+
+
+def studies(request):
+    """Context processor for the study selector in the sidebar."""
+    if not getattr(request, 'user', None) or not request.user.is_authenticated:
+        return {}
+    from .models import Study
+    return {
+        'studies': Study.objects.only('id', 'name').order_by('name'),
+        'current_study_id': getattr(request, 'study_id', None),
+    }
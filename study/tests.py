@@ -1,3 +1,1280 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import random
+import tempfile
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    audit, exports, live, outcomes, randomization, reports, retention, routers, scheduling, search, summaries, sync, tenancy,
+    uploads, validation, views,
+)
+from . import features as features_module
+from .admin import EstimatedCountPaginator
+from .models import (
+    AllocationBlock, AllocationCounter, Answer, AuditEntry, Choice, ClinicalAssessment, DataQuery, Neuroimaging,
+    Participant, Question, QuestionnaireTemplate, RandomizationScheme, ReportUpload, ScheduledVisit, SearchEntry,
+    Study, Visit, VisitAssessment, VisitSummary, WearableDailyFeatures, WearableDataPoint,
+)
+from .routers import use_read_replica
+from .staticfiles import CompressedManifestStaticFilesStorage, StaticFilesMiddleware
+
+
+# Pages render without a collectstatic manifest.
+plain_static = override_settings(STORAGES={
+    **settings.STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+
+
+def make_participant(study, **kwargs):
+    fields = {'date_of_birth': datetime.date(1950, 1, 1), 'gender': 'MALE', 'status': Participant.Status.ELIGIBLE}
+    fields.update(kwargs)
+    return Participant.objects.create(study=study, **fields)
+
+
+def make_visit(participant, visit_type=Visit.VisitType.BASELINE):
+    return Visit.objects.create(participant=participant, visit_type=visit_type, visit_date=datetime.date(2025, 2, 1))
+
+
+# --- Visit scheduling ---
+
+class ScheduleTests(TestCase):
+    def setUp(self):
+        self.study = Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1))
+        self.enrolled = make_participant(
+            self.study, status=Participant.Status.ENROLLED, enrollment_date=datetime.date(2025, 1, 10),
+        )
+
+    def schedule(self, participant):
+        return {row.visit_type: row for row in ScheduledVisit.objects.filter(participant=participant)}
+
+    def test_enrolled_participant_gets_protocol_windows(self):
+        schedule = self.schedule(self.enrolled)
+        self.assertEqual(set(schedule), set(scheduling.PROTOCOL))
+        visit1 = schedule[Visit.VisitType.VISIT1]
+        self.assertEqual(visit1.study_id, self.study.pk)
+        self.assertEqual(
+            (visit1.target_date, visit1.window_start, visit1.window_end),
+            (datetime.date(2025, 7, 11), datetime.date(2025, 6, 11), datetime.date(2025, 8, 10)),
+        )
+        self.assertEqual(self.schedule(make_participant(self.study)), {})
+
+    def test_regenerating_updates_rows_in_place(self):
+        before = {visit_type: row.pk for visit_type, row in self.schedule(self.enrolled).items()}
+        self.enrolled.enrollment_date = datetime.date(2025, 2, 1)
+        self.enrolled.save()
+        self.assertEqual(scheduling.generate_schedule(), 4)
+        after = self.schedule(self.enrolled)
+        self.assertEqual({visit_type: row.pk for visit_type, row in after.items()}, before)
+        self.assertEqual(after[Visit.VisitType.BASELINE].target_date, datetime.date(2025, 2, 1))
+
+    def test_completed_visits_are_done(self):
+        visit = make_visit(self.enrolled)
+        self.assertFalse(self.schedule(self.enrolled)[Visit.VisitType.BASELINE].is_done)
+        visit.is_complete = True
+        visit.save()
+        self.assertTrue(self.schedule(self.enrolled)[Visit.VisitType.BASELINE].is_done)
+        scheduling.generate_schedule()
+        self.assertTrue(self.schedule(self.enrolled)[Visit.VisitType.BASELINE].is_done)
+
+    def test_withdrawal_drops_pending_visits(self):
+        visit = make_visit(self.enrolled)
+        visit.is_complete = True
+        visit.save()
+        self.enrolled.status = Participant.Status.WITHDRAWN
+        self.enrolled.save()
+        self.assertEqual(list(self.schedule(self.enrolled)), [Visit.VisitType.BASELINE])
+
+    def test_worklists(self):
+        upcoming = scheduling.upcoming_visits(days=14, today=datetime.date(2025, 6, 1))
+        self.assertEqual([row.visit_type for row in upcoming], [Visit.VisitType.VISIT1])
+        overdue = scheduling.overdue_visits(today=datetime.date(2025, 6, 1))
+        self.assertEqual([row.visit_type for row in overdue], [Visit.VisitType.BASELINE])
+
+    @plain_static
+    def test_worklist_view_clamps_days(self):
+        self.client.force_login(User.objects.create_user('coordinator'))
+        for days, shown in [('100000000', 365), ('-5', 1), ('soon', 14)]:
+            response = self.client.get(reverse('upcoming_visits'), {'days': days})
+            self.assertEqual(response.context['days'], shown)
+
+
+# --- Visit summaries ---
+
+class VisitSummaryTests(TestCase):
+    def setUp(self):
+        study = Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1))
+        self.visit = make_visit(make_participant(study))
+        self.template = QuestionnaireTemplate.objects.create(name='HADS')
+
+    def test_refresh_upserts(self):
+        summaries.refresh_visit_summaries([self.visit.pk])
+        summary = VisitSummary.objects.get(visit=self.visit)
+        self.assertFalse(summary.clinical_complete)
+        self.assertEqual(summary.questionnaires_assigned, 0)
+
+        ClinicalAssessment.objects.create(visit=self.visit, moca_score=25)
+        completed_at = timezone.now()
+        VisitAssessment.objects.create(visit=self.visit, questionnaire_template=self.template, completed_at=completed_at)
+        summaries.refresh_visit_summaries(Visit.objects.filter(pk=self.visit.pk))
+        summary = VisitSummary.objects.get(visit=self.visit)
+        self.assertTrue(summary.clinical_complete)
+        self.assertFalse(summary.biological_complete)
+        self.assertEqual((summary.questionnaires_assigned, summary.questionnaires_completed), (1, 1))
+        self.assertEqual(summary.last_questionnaire_at, completed_at)
+        self.assertEqual(VisitSummary.objects.count(), 1)
+
+    def test_saves_refresh_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Neuroimaging.objects.create(visit=self.visit, mri_completed=True)
+        self.assertTrue(VisitSummary.objects.get(visit=self.visit).neuroimaging_complete)
+
+    def test_deleted_visit_keeps_no_summary(self):
+        ClinicalAssessment.objects.create(visit=self.visit, moca_score=25)
+        summaries.refresh_visit_summaries([self.visit.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.visit.delete()
+        self.assertFalse(VisitSummary.objects.exists())
+
+    @plain_static
+    def test_participant_detail_lists_visits_without_summary(self):
+        summaries.refresh_visit_summaries([self.visit.pk])
+        other = Visit.objects.create(
+            participant=self.visit.participant, visit_type=Visit.VisitType.VISIT1, visit_date=datetime.date(2025, 5, 1),
+        )
+        ClinicalAssessment.objects.create(visit=other, moca_score=25)  # Its summary is refreshed on commit
+        self.client.force_login(User.objects.create_user('coordinator'))
+        response = self.client.get(reverse('participant_detail', args=[self.visit.participant_id]))
+        visits = response.context['visits']
+        self.assertEqual([visit.visit_id for visit in visits], [self.visit.pk, other.pk])
+        self.assertTrue(visits[1].clinical_complete)
+        self.assertNotIn(Visit.VisitType.VISIT1, [code for code, label in response.context['creatable_visits']])
+
+
+# --- Randomization ---
+
+class AllocateTests(TestCase):
+    def setUp(self):
+        self.study = Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1))
+        self.rng = random.Random(0)
+
+    def scheme(self, **kwargs):
+        fields = {'arms': {'A': 1, 'B': 1}, 'stratify_by': ['gender']}
+        fields.update(kwargs)
+        return RandomizationScheme.objects.create(study=self.study, **fields)
+
+    def allocate(self, participant):
+        return randomization.allocate(participant, on_date=datetime.date(2025, 6, 1), rng=self.rng)
+
+    def counts(self, scheme):
+        return {(c.factor, c.level, c.arm): c.count for c in AllocationCounter.objects.filter(scheme=scheme)}
+
+    def test_blocks_balance_and_rotate(self):
+        scheme = self.scheme(method=RandomizationScheme.Method.PERMUTED_BLOCKS, block_sizes=[4])
+        arms = [self.allocate(make_participant(self.study)) for _ in range(4)]
+        self.assertEqual(sorted(arms), ['A', 'A', 'B', 'B'])
+        block = AllocationBlock.objects.get(scheme=scheme, stratum='gender=MALE')
+        self.assertEqual((block.sequence, block.position), (arms, 4))
+
+        fifth = self.allocate(make_participant(self.study))
+        block.refresh_from_db()
+        self.assertEqual(block.position, 1)
+        self.assertEqual(block.sequence[0], fifth)
+        self.assertEqual(sorted(block.sequence), ['A', 'A', 'B', 'B'])
+
+    def test_strata_have_their_own_blocks(self):
+        scheme = self.scheme(method=RandomizationScheme.Method.PERMUTED_BLOCKS, block_sizes=[2])
+        self.allocate(make_participant(self.study, gender='MALE'))
+        self.allocate(make_participant(self.study, gender='FEMALE'))
+        positions = dict(AllocationBlock.objects.filter(scheme=scheme).values_list('stratum', 'position'))
+        self.assertEqual(positions, {'gender=MALE': 1, 'gender=FEMALE': 1})
+
+    def test_counters_follow_allocations(self):
+        scheme = self.scheme(stratify_by=['gender', 'age_band'], age_band_edges=[65, 75])
+        participants = [
+            make_participant(self.study, gender='MALE', date_of_birth=datetime.date(1950, 1, 1)),
+            make_participant(self.study, gender='FEMALE', date_of_birth=datetime.date(1950, 1, 1)),
+            make_participant(self.study, gender='FEMALE', date_of_birth=datetime.date(1970, 1, 1)),
+        ]
+        arms = [self.allocate(participant) for participant in participants]
+
+        expected = {}
+        for participant, arm in zip(participants, arms):
+            age_band = '75+' if participant.date_of_birth.year == 1950 else '<65'
+            for key in [('gender', participant.gender, arm), ('age_band', age_band, arm)]:
+                expected[key] = expected.get(key, 0) + 1
+        self.assertEqual(self.counts(scheme), expected)
+
+    def test_minimization_takes_the_balancing_arm(self):
+        self.scheme(minimization_probability=1)
+        first = self.allocate(make_participant(self.study))
+        second = self.allocate(make_participant(self.study))
+        self.assertNotEqual(first, second)
+
+    def test_allocation_enrolls(self):
+        self.scheme()
+        participant = make_participant(self.study)
+        arm = self.allocate(participant)
+        participant.refresh_from_db()
+        self.assertEqual(participant.assigned_group_name, arm)
+        self.assertEqual(participant.status, Participant.Status.ENROLLED)
+        self.assertEqual(participant.enrollment_date, datetime.date(2025, 6, 1))
+
+    def test_refuses_allocated_participant(self):
+        scheme = self.scheme()
+        participant = make_participant(self.study)
+        self.allocate(participant)
+        before = self.counts(scheme)
+        with self.assertRaisesMessage(randomization.RandomizationError, "already allocated"):
+            self.allocate(participant)
+        self.assertEqual(self.counts(scheme), before)
+
+    def test_refuses_participant_in_screening(self):
+        scheme = self.scheme()
+        participant = make_participant(self.study, status=Participant.Status.SCREENING)
+        with self.assertRaisesMessage(randomization.RandomizationError, "must be eligible or enrolled"):
+            self.allocate(participant)
+        participant.refresh_from_db()
+        self.assertIsNone(participant.assigned_group_name)
+        self.assertEqual(self.counts(scheme), {})
+
+    def test_refuses_study_without_scheme(self):
+        with self.assertRaisesMessage(randomization.RandomizationError, "has no randomization scheme"):
+            self.allocate(make_participant(self.study))
+
+
+# --- Report caching ---
+
+class DataVersionTests(TestCase):
+    def setUp(self):
+        self.study = Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1))
+        self.visit = make_visit(make_participant(self.study))
+
+    def version(self):
+        return Study.objects.get(pk=self.study.pk).data_version
+
+    def test_bumped_after_commit(self):
+        before = self.version()
+        with self.captureOnCommitCallbacks(execute=True):
+            ClinicalAssessment.objects.create(visit=self.visit, moca_score=25)
+            self.assertEqual(self.version(), before)
+        self.assertEqual(self.version(), before + 1)
+
+    def test_deleting_a_visit_bumps_its_study(self):
+        ClinicalAssessment.objects.create(visit=self.visit, moca_score=25)
+        before = self.version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.visit.delete()
+        self.assertGreater(self.version(), before)
+
+    def test_touch_visit_studies_without_visits(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            reports.touch_visit_studies([])
+        self.assertEqual(callbacks, [])
+
+
+# --- Audit trail ---
+
+def at(when):
+    return mock.patch('django.utils.timezone.now', return_value=when)
+
+
+class AuditTests(TestCase):
+    def setUp(self):
+        study = Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1))
+        self.visit = make_visit(make_participant(study))
+        self.t1 = timezone.make_aware(datetime.datetime(2025, 3, 1, 9))
+        self.t2 = self.t1 + datetime.timedelta(days=1)
+        self.t3 = self.t2 + datetime.timedelta(days=1)
+
+    def changes(self, instance):
+        return [(entry.action, entry.changes) for entry in audit.history(type(instance), instance.pk)]
+
+    def test_create_logs_set_fields(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            clinical = ClinicalAssessment.objects.create(visit=self.visit, moca_score=25)
+        self.assertEqual(self.changes(clinical), [
+            (AuditEntry.Action.CREATE, {'visit_id': [None, self.visit.pk], 'moca_score': [None, 25]}),
+        ])
+
+    def test_update_logs_only_changed_fields(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ClinicalAssessment.objects.create(visit=self.visit, moca_score=25, six_minute_walk_test_meters=Decimal('300.5'))
+            clinical = ClinicalAssessment.objects.get(visit=self.visit)
+            clinical.moca_score = 27
+            clinical.six_minute_walk_test_meters = Decimal('300.50')
+            clinical.save()
+            clinical.save()
+        self.assertEqual(self.changes(clinical)[1:], [(AuditEntry.Action.UPDATE, {'moca_score': [25, 27]})])
+
+    def test_empty_file_field_is_not_a_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Neuroimaging.objects.create(visit=self.visit)
+            neuroimaging = Neuroimaging.objects.get(visit=self.visit)
+            neuroimaging.save()
+        self.assertEqual(len(self.changes(neuroimaging)), 1)
+
+    def test_deferred_fields_are_not_read_or_logged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ClinicalAssessment.objects.create(visit=self.visit, moca_score=25, nyha_class='II')
+            clinical = ClinicalAssessment.objects.only('moca_score').get(visit=self.visit)
+            clinical.moca_score = 26
+            clinical.save(update_fields=['moca_score', 'updated_at'])
+        self.assertEqual(self.changes(clinical)[-1], (AuditEntry.Action.UPDATE, {'moca_score': [25, 26]}))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            clinical.nyha_class  # Loaded now, and remembered as loaded
+            clinical.nyha_class = 'III'
+            clinical.save()
+        self.assertEqual(self.changes(clinical)[-1], (AuditEntry.Action.UPDATE, {'nyha_class': ['II', 'III']}))
+
+    def test_transaction_writes_entries_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            clinical = ClinicalAssessment.objects.create(visit=self.visit, moca_score=25)
+            Neuroimaging.objects.create(visit=self.visit)
+            self.assertFalse(AuditEntry.objects.exists())
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+        self.assertEqual(sum('INSERT INTO "study_auditentry"' in query['sql'] for query in queries), 1)
+        self.assertEqual(len(self.changes(clinical)), 1)
+
+    def test_rolled_back_savepoint_drops_its_entries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            clinical = ClinicalAssessment.objects.create(visit=self.visit, moca_score=25)
+            try:
+                with transaction.atomic():
+                    Neuroimaging.objects.create(visit=self.visit)
+                    raise ValueError
+            except ValueError:
+                pass
+            clinical.moca_score = 27
+            clinical.save()
+        self.assertEqual(AuditEntry.objects.count(), 2)
+        self.assertEqual(len(self.changes(clinical)), 2)
+
+    def test_batch_writes_entries_at_once(self):
+        with audit.batch():
+            clinical = ClinicalAssessment.objects.create(visit=self.visit, moca_score=25)
+            self.assertFalse(AuditEntry.objects.exists())
+        self.assertEqual(len(self.changes(clinical)), 1)
+
+    def test_state_at(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with at(self.t1):
+                clinical = ClinicalAssessment.objects.create(visit=self.visit, moca_score=25)
+            with at(self.t2):
+                clinical = ClinicalAssessment.objects.get(pk=clinical.pk)
+                clinical.moca_score = 27
+                clinical.save()
+            with at(self.t3):
+                pk = clinical.pk
+                clinical.delete()
+
+        state = lambda when: audit.state_at(ClinicalAssessment, pk, when)
+        self.assertIsNone(state(self.t1 - datetime.timedelta(seconds=1)))
+        self.assertEqual(state(self.t1)['moca_score'], 25)
+        self.assertEqual(state(self.t2)['moca_score'], 27)
+        self.assertIsNone(state(self.t3))
+
+    def test_visit_state_at_leaves_out_deleted_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with at(self.t1):
+                clinical = ClinicalAssessment.objects.create(visit=self.visit, moca_score=25)
+                neuroimaging = Neuroimaging.objects.create(visit=self.visit, mri_completed=True)
+            with at(self.t2):
+                neuroimaging.delete()
+        self.assertEqual(set(audit.visit_state_at(self.visit.pk, self.t1)), {ClinicalAssessment, Neuroimaging})
+        state = audit.visit_state_at(self.visit.pk, self.t2)
+        self.assertEqual(list(state), [ClinicalAssessment])
+        self.assertEqual(state[ClinicalAssessment][clinical.pk]['moca_score'], 25)
+
+
+# --- Offline questionnaire sync ---
+
+class SyncAssessmentsTests(TestCase):
+    def setUp(self):
+        study = Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1))
+        participant = make_participant(study)
+        self.visit = make_visit(participant)
+        self.other_visit = make_visit(participant, Visit.VisitType.VISIT1)
+        self.template = QuestionnaireTemplate.objects.create(name='HADS')
+        self.questions = [
+            Question.objects.create(questionnaire=self.template, text=f'Q{order}', order=order) for order in (1, 2)
+        ]
+        self.choices = {
+            question.id: [Choice.objects.create(question=question, text=str(value), value=value) for value in range(3)]
+            for question in self.questions
+        }
+
+    def item(self, completed_at='2026-10-01T10:00:00+02:00', value=1, **kwargs):
+        item = {
+            'client_id': 'tablet-1/1',
+            'visit_id': self.visit.id,
+            'questionnaire_id': self.template.id,
+            'completed_at': completed_at,
+            'answers': {str(question.id): self.choices[question.id][value].id for question in self.questions},
+        }
+        item.update(kwargs)
+        return item
+
+    def statuses(self, *items):
+        return [result.status for result in sync.sync_assessments(list(items))]
+
+    def test_created_then_unchanged(self):
+        [result] = sync.sync_assessments([self.item(value=2)])
+        self.assertEqual(result.status, 'created')
+        assessment = VisitAssessment.objects.get(visit=self.visit, questionnaire_template=self.template)
+        self.assertEqual(result.as_dict()['assessment_id'], assessment.pk)
+        self.assertEqual(assessment.total_score, 4)
+        self.assertEqual(Answer.objects.filter(visit_assessment=assessment).count(), 2)
+        self.assertTrue(audit.history(VisitAssessment, assessment.pk).exists())
+
+        self.assertEqual(self.statuses(self.item(value=2)), ['unchanged'])
+
+    def test_newer_completion_updates(self):
+        self.statuses(self.item(value=1))
+        self.assertEqual(self.statuses(self.item('2026-10-02T10:00:00+02:00', value=2)), ['updated'])
+        assessment = VisitAssessment.objects.get(visit=self.visit)
+        self.assertEqual(assessment.total_score, 4)
+        self.assertEqual(
+            set(assessment.answers.values_list('selected_choice__value', flat=True)), {2},
+        )
+
+    def test_older_completion_conflicts(self):
+        self.statuses(self.item('2026-10-02T10:00:00+02:00', value=1))
+        [result] = sync.sync_assessments([self.item(value=2)])
+        self.assertEqual(result.status, 'conflict')
+        self.assertEqual(result.as_dict()['total_score'], 2)
+        self.assertEqual(VisitAssessment.objects.get(visit=self.visit).total_score, 2)
+
+    def test_latest_in_batch_wins(self):
+        statuses = self.statuses(self.item(value=1), self.item('2026-10-01T11:00:00+02:00', value=2))
+        self.assertEqual(statuses, ['conflict', 'created'])
+        self.assertEqual(VisitAssessment.objects.get(visit=self.visit).total_score, 4)
+
+    def test_concurrent_completion_conflicts(self):
+        self.statuses(self.item(value=1))
+        read = sync._existing_assessments
+
+        def read_then_sync_elsewhere(parsed):
+            existing = read(parsed)
+            VisitAssessment.objects.filter(visit=self.visit).update(
+                completed_at=datetime.datetime(2026, 10, 3, tzinfo=datetime.timezone.utc), total_score=0,
+            )
+            return existing
+
+        with mock.patch.object(sync, '_existing_assessments', read_then_sync_elsewhere):
+            [result] = sync.sync_assessments([self.item('2026-10-02T10:00:00+02:00', value=2)])
+        self.assertEqual(result.status, 'conflict')
+        self.assertEqual(VisitAssessment.objects.get(visit=self.visit).total_score, 0)
+
+    def test_invalid_items_do_not_stop_the_others(self):
+        first, second = self.questions
+        statuses = self.statuses(
+            'junk',
+            self.item(visit_id=10 ** 6),
+            self.item(visit_id=2 ** 64),
+            self.item(questionnaire_id=0),
+            self.item(completed_at='2026-10-01T10:00:00'),
+            self.item(completed_at='2099-01-01T10:00:00+00:00'),
+            self.item(answers={str(first.id): self.choices[first.id][0].id}),
+            self.item(answers={str(first.id): self.choices[second.id][0].id, str(second.id): self.choices[second.id][0].id}),
+            self.item(visit_id=self.other_visit.id),
+        )
+        self.assertEqual(statuses, ['error'] * 8 + ['created'])
+
+    def test_concurrent_create_is_a_conflict(self):
+        # Another request creates the assessment after this one looked for it.
+        VisitAssessment.objects.create(visit=self.visit, questionnaire_template=self.template)
+        with mock.patch.object(sync, '_existing_assessments', return_value={}):
+            results = sync.sync_assessments([self.item(), self.item(visit_id=self.other_visit.id)])
+        self.assertEqual([result.status for result in results], ['conflict', 'created'])
+        self.assertNotIn('assessment_id', results[0].as_dict())
+        self.assertEqual(VisitAssessment.objects.count(), 2)
+        self.assertEqual(Answer.objects.filter(visit_assessment__visit=self.visit).count(), 0)
+
+    def test_view(self):
+        self.client.force_login(User.objects.create_user('nurse'))
+        url = reverse('sync_questionnaires')
+        response = self.client.post(url, json.dumps({'assessments': [self.item()]}), content_type='application/json')
+        self.assertEqual(response.json()['results'][0]['status'], 'created')
+        self.assertEqual(self.client.post(url, '{}', content_type='application/json').status_code, 400)
+        items = [self.item()] * (sync.MAX_BATCH_SIZE + 1)
+        response = self.client.post(url, json.dumps({'assessments': items}), content_type='application/json')
+        self.assertEqual(response.status_code, 413)
+
+
+# --- Wearable data retention ---
+
+class RetentionTests(TestCase):
+    def setUp(self):
+        self.study = Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1), wearable_retention_days=30)
+        self.participant = make_participant(self.study)
+        self.other = make_participant(self.study)
+        self.now = timezone.now()
+
+    def add_samples(self, participant, count, days_ago=0):
+        WearableDataPoint.objects.bulk_create([
+            WearableDataPoint(
+                participant=participant,
+                timestamp=self.now - datetime.timedelta(days=days_ago, minutes=minute),
+                heart_rate=60,
+            )
+            for minute in range(count)
+        ])
+
+    def test_delete_in_batches(self):
+        self.add_samples(self.participant, 10)
+        self.add_samples(self.other, 4)
+        with CaptureQueriesContext(connection) as queries:
+            deleted = WearableDataPoint.objects.filter(participant=self.participant).delete_in_batches(batch_size=3)
+        self.assertEqual(deleted, 10)
+        deletes = [query for query in queries.captured_queries if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 4)
+        self.assertEqual(WearableDataPoint.objects.filter(participant=self.other).count(), 4)
+
+    def test_delete_in_batches_of_nothing(self):
+        self.add_samples(self.participant, 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(WearableDataPoint.objects.filter(pk__in=[]).delete_in_batches(), 0)
+        self.assertEqual(WearableDataPoint.objects.filter(participant=self.other).delete_in_batches(), 0)
+        self.assertEqual(WearableDataPoint.objects.count(), 2)
+
+    def test_prune_study(self):
+        self.add_samples(self.participant, 5, days_ago=31)
+        self.add_samples(self.participant, 3, days_ago=29)
+        self.assertEqual(retention.prune_study(self.study, now=self.now, dry_run=True), 5)
+        self.assertEqual(WearableDataPoint.objects.count(), 8)
+        self.assertEqual(retention.prune_study(self.study, now=self.now, batch_size=2), 5)
+        self.assertEqual(WearableDataPoint.objects.count(), 3)
+
+        self.study.wearable_retention_days = None
+        self.add_samples(self.participant, 1, days_ago=400)
+        self.assertEqual(retention.prune_study(self.study, now=self.now), 0)
+
+    def test_purge_participant(self):
+        self.add_samples(self.participant, 4)
+        self.add_samples(self.other, 1)
+        WearableDailyFeatures.objects.create(
+            participant=self.participant, study=self.study, day=self.now.date(), samples=4, computed_at=self.now,
+        )
+        self.assertEqual(retention.purge_participant(self.participant, dry_run=True), (4, 1))
+        self.assertEqual(retention.purge_participant(self.participant, batch_size=3), (4, 1))
+        self.assertEqual(WearableDataPoint.objects.count(), 1)
+
+    def test_participant_delete_in_a_transaction(self):
+        # TestCase runs inside a transaction, like the admin's delete views.
+        self.add_samples(self.participant, 3)
+        pk = self.participant.pk
+        with self.assertLogs('study.models', 'WARNING'):
+            self.participant.delete()
+        self.assertFalse(WearableDataPoint.objects.filter(participant_id=pk).exists())
+        self.assertEqual(WearableDataPoint.objects.count(), 0)
+
+
+# --- Compact wearable storage ---
+
+class WearableStorageTests(TestCase):
+    def setUp(self):
+        self.participant = make_participant(Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1)))
+        self.now = timezone.now()
+
+    def test_spo2_is_stored_as_scaled_integer(self):
+        point = WearableDataPoint.objects.create(participant=self.participant, timestamp=self.now, spo2=97.25)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT spo2 FROM study_wearabledatapoint WHERE id = %s', [point.pk])
+            self.assertEqual(cursor.fetchone()[0], 9725)
+        self.assertEqual(WearableDataPoint.objects.get(pk=point.pk).spo2, 97.25)
+        self.assertTrue(WearableDataPoint.objects.filter(spo2__gte=97.2).exists())
+
+    def test_as_arrays(self):
+        WearableDataPoint.objects.bulk_create([
+            WearableDataPoint(participant=self.participant, timestamp=self.now, heart_rate=60, spo2=97.5),
+            WearableDataPoint(participant=self.participant, timestamp=self.now + datetime.timedelta(minutes=1), heart_rate=62),
+        ])
+        arrays = WearableDataPoint.objects.order_by('timestamp').as_arrays('heart_rate', 'spo2')
+        self.assertEqual(arrays['timestamp'].dtype.str, '<M8[us]')
+        self.assertEqual(arrays['heart_rate'].tolist(), [60.0, 62.0])
+        self.assertEqual(arrays['spo2'][0], 97.5)
+        self.assertTrue(np.isnan(arrays['spo2'][1]))
+
+    def test_as_arrays_of_nothing(self):
+        arrays = WearableDataPoint.objects.none().as_arrays('heart_rate')
+        self.assertEqual((len(arrays['timestamp']), len(arrays['heart_rate'])), (0, 0))
+
+    def test_tiles_skip_implausible_readings(self):
+        WearableDataPoint.objects.bulk_create([
+            WearableDataPoint(participant=self.participant, timestamp=self.now - datetime.timedelta(minutes=minute),
+                              heart_rate=heart_rate, spo2=spo2)
+            for minute, (heart_rate, spo2) in enumerate([(60, 96.5), (80, 12.0), (300, None)])
+        ])
+        tiles = WearableDataPoint.objects.filter(participant=self.participant).tiles(now=self.now)
+        self.assertEqual(tiles['avg_hr_24h'], 70)
+        self.assertEqual(tiles['latest_spo2'], 96.5)
+
+
+# --- Resumable MRI report uploads ---
+
+class ReportUploadTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name, UPLOAD_PARTIAL_DIR=os.path.join(media.name, 'partial')))
+        self.visit = make_visit(make_participant(Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1))))
+        self.client.force_login(User.objects.create_user('radiographer'))
+        self.content = b'%PDF-report'
+
+    def start(self, **data):
+        url = reverse('start_report_upload', args=[self.visit.participant_id, self.visit.pk])
+        response = self.client.post(url, {'filename': 'report.pdf', 'total_size': len(self.content), **data})
+        self.assertEqual(response.status_code, 201)
+        return ReportUpload.objects.get(pk=response.json()['upload_id'])
+
+    def put(self, upload, offset, body):
+        url = reverse('report_upload_chunk', args=[self.visit.participant_id, self.visit.pk, upload.pk])
+        return self.client.put(url, body, content_type='application/octet-stream', headers={'Upload-Offset': str(offset)})
+
+    def test_resume_and_download(self):
+        upload = self.start(sha256=hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(self.put(upload, 0, self.content[:4]).json()['offset'], 4)
+
+        # A retry of the first chunk is told where to resume.
+        response = self.put(upload, 0, self.content[:4])
+        self.assertEqual((response.status_code, response.json()['offset']), (409, 4))
+
+        status = self.put(upload, 4, self.content[4:]).json()
+        self.assertTrue(status['complete'])
+        self.assertEqual(status['sha256'], hashlib.sha256(self.content).hexdigest())
+
+        url = reverse('download_mri_report', args=[self.visit.participant_id, self.visit.pk])
+        self.assertEqual(b''.join(self.client.get(url).streaming_content), self.content)
+        response = self.client.get(url, headers={'Range': 'bytes=1-3'})
+        self.assertEqual((response.status_code, b''.join(response.streaming_content)), (206, self.content[1:4]))
+        self.assertEqual(self.client.get(url, headers={'Range': 'bytes=99-'}).status_code, 416)
+
+    def test_same_file_is_stored_once(self):
+        self.put(self.start(), 0, self.content)
+        first = Neuroimaging.objects.get(visit=self.visit).mri_report.name
+        self.put(self.start(filename='copy.pdf'), 0, self.content)
+        self.assertEqual(Neuroimaging.objects.get(visit=self.visit).mri_report.name, first)
+
+    def test_claimed_chunk_conflicts_until_its_lease_expires(self):
+        upload = self.start()
+        claim = uploads.claim_chunk(upload, 0)
+        self.assertIsNotNone(claim)
+        self.assertIsNone(uploads.claim_chunk(upload, 0))
+        self.assertEqual(self.put(upload, 0, self.content).status_code, 409)
+
+        with mock.patch('django.utils.timezone.now', return_value=claim + uploads.CHUNK_LEASE * 2):
+            self.assertIsNotNone(uploads.claim_chunk(upload, 0))
+        self.assertFalse(uploads.release_chunk(upload, claim, 4))
+        upload.refresh_from_db()
+        self.assertEqual(upload.received_bytes, 0)
+
+    def test_mismatching_file_is_discarded(self):
+        upload = self.start(sha256='0' * 64)
+        response = self.put(upload, 0, self.content)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ReportUpload.objects.filter(pk=upload.pk).exists())
+        self.assertFalse(Neuroimaging.objects.filter(visit=self.visit).exists())
+
+    def test_chunk_past_the_announced_size(self):
+        upload = self.start()
+        self.assertEqual(self.put(upload, 0, self.content + b'!').status_code, 400)
+
+
+# --- Search ---
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.study = Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1))
+        self.participant = make_participant(self.study, status=Participant.Status.ENROLLED)
+        self.visit = make_visit(self.participant)
+
+    def test_text_search_matches_prefixes(self):
+        Neuroimaging.objects.create(visit=self.visit, mri_key_findings='Mild periventricular white matter hyperintensities')
+        ClinicalAssessment.objects.create(visit=self.visit, ntb_results_summary='Memory deficits noted')
+        [entry] = search.search_text('hyperintens')
+        self.assertEqual(entry.visit, self.visit)
+        self.assertIn('periventricular', entry.snippet)
+        self.assertEqual(search.search_text('memory "OR'), [])  # Every term must match; quotes are not syntax
+        self.assertEqual(search.search_text('!!!'), [])
+
+    def test_index_follows_edits(self):
+        neuroimaging = Neuroimaging.objects.create(visit=self.visit, mri_key_findings='Lacunar infarct')
+        neuroimaging.mri_key_findings = ''
+        neuroimaging.save()
+        self.assertEqual(search.search_text('lacunar'), [])
+        self.assertFalse(SearchEntry.objects.exists())
+
+    def test_text_search_is_scoped_to_the_study(self):
+        other_study = Study.objects.create(name='Other', start_date=datetime.date(2025, 1, 1))
+        other_visit = make_visit(make_participant(other_study))
+        Neuroimaging.objects.create(visit=self.visit, mri_key_findings='Microbleeds')
+        Neuroimaging.objects.create(visit=other_visit, mri_key_findings='Microbleeds')
+        self.assertEqual(len(search.search_text('microbleeds')), 2)
+        with tenancy.use_study(other_study.pk):
+            self.assertEqual([entry.visit_id for entry in search.search_text('microbleeds')], [other_visit.pk])
+
+    def test_participant_search(self):
+        make_participant(self.study)  # Eligible, without visits
+        prefix = self.participant.participant_id[:-1].lower()
+        self.assertEqual(len(search.search_participants(participant_id=prefix)), 2)
+        self.assertEqual(list(search.search_participants(participant_id=prefix, status=Participant.Status.ENROLLED)),
+                         [self.participant])
+        self.assertEqual(list(search.search_participants(visit_type=Visit.VisitType.BASELINE, visit_complete=False)),
+                         [self.participant])
+        self.assertEqual(list(search.search_participants(participant_id='XX-')), [])
+
+
+# --- Participant list ---
+
+@plain_static
+class ParticipantListTests(TestCase):
+    def setUp(self):
+        study = Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1))
+        self.participants = [make_participant(study) for _ in range(5)]
+        self.client.force_login(User.objects.create_user('coordinator'))
+        self.enterContext(mock.patch.object(views, 'PARTICIPANTS_PER_PAGE', 2))
+
+    def page(self, **params):
+        context = self.client.get(reverse('participant_list'), params).context
+        return [participant.pk for participant in context['participants']], context['newer_than'], context['older_than']
+
+    def test_keyset_pages(self):
+        ids = [participant.pk for participant in reversed(self.participants)]
+        self.assertEqual(self.page(), (ids[:2], None, ids[1]))
+        self.assertEqual(self.page(before=ids[1]), (ids[2:4], ids[2], ids[3]))
+        self.assertEqual(self.page(before=ids[3]), (ids[4:], ids[4], None))
+        self.assertEqual(self.page(after=ids[2]), (ids[:2], None, ids[1]))
+        self.assertEqual(self.page(after=ids[4]), (ids[2:4], ids[2], ids[3]))
+        self.assertEqual(self.page(before='x'), self.page())
+
+    def test_progress_annotations(self):
+        participant = self.participants[0]
+        make_visit(participant)
+        Visit.objects.create(participant=participant, visit_type=Visit.VisitType.VISIT1,
+                             visit_date=datetime.date(2025, 8, 1), is_complete=True)
+        progress = Participant.objects.with_progress()
+        annotated = progress.get(pk=participant.pk)
+        self.assertEqual((annotated.visit_count, annotated.complete_visit_count), (2, 1))
+        self.assertEqual(annotated.completion_percent, 50)
+        self.assertEqual(annotated.last_visit_date, datetime.date(2025, 8, 1))
+        empty = progress.get(pk=self.participants[1].pk)
+        self.assertEqual((empty.visit_count, empty.completion_percent, empty.last_wearable_at), (0, None, None))
+
+
+# --- Admin changelists ---
+
+@mock.patch.object(EstimatedCountPaginator, 'exact_count_threshold', 0)
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        self.study = Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1))
+        self.participant = make_participant(self.study)
+        self.add_samples(self.participant, 30)
+
+    def add_samples(self, participant, count):
+        now = timezone.now()
+        WearableDataPoint.objects.bulk_create([
+            WearableDataPoint(participant=participant, timestamp=now - datetime.timedelta(minutes=minute), heart_rate=60)
+            for minute in range(count)
+        ])
+
+    def count(self, queryset):
+        return EstimatedCountPaginator(queryset, 10).count
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def test_counts_exactly_without_statistics(self):
+        self.assertEqual(self.count(WearableDataPoint.objects.all()), 30)
+
+    def test_unfiltered_list_uses_statistics(self):
+        self.analyze()
+        self.add_samples(self.participant, 5)
+        self.assertEqual(self.count(WearableDataPoint.objects.all()), 30)
+        self.assertEqual(self.count(WearableDataPoint.objects.filter(heart_rate=60)), 35)
+
+    def test_study_scope_uses_the_study_share(self):
+        other = make_participant(Study.objects.create(name='Other', start_date=datetime.date(2025, 1, 1)))
+        self.add_samples(other, 10)
+        self.analyze()
+        with tenancy.use_study(self.study.pk):
+            self.assertEqual(self.count(WearableDataPoint.objects.all()), 20)  # 40 rows over 2 studies
+            self.assertEqual(self.count(WearableDataPoint.objects.filter(participant=self.participant)), 30)
+            self.assertEqual(self.count(Answer.objects.all()), 0)  # Scoped through a join: counted
+
+
+# --- Database routing and tuning ---
+
+class ReadReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = routers.ReadReplicaRouter()
+
+    @use_read_replica
+    def read_alias(self, request):
+        return self.router.db_for_read(Participant)
+
+    def test_reads_go_to_the_replica_inside_decorated_views(self):
+        with mock.patch.dict(settings.DATABASES, {routers.REPLICA_ALIAS: settings.DATABASES['default']}):
+            self.assertEqual(self.read_alias(None), routers.REPLICA_ALIAS)
+        self.assertIsNone(self.router.db_for_read(Participant))
+        self.assertEqual(self.router.db_for_write(Participant), 'default')
+        self.assertFalse(self.router.allow_migrate(routers.REPLICA_ALIAS, 'study'))
+
+    def test_without_a_replica_reads_stay_on_default(self):
+        self.assertIsNone(self.read_alias(None))
+
+    def test_sqlite_connection_settings(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite profile')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -64000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+
+# --- Static files ---
+
+class StaticFilesTests(SimpleTestCase):
+    hashed_name = 'study/app.0123456789ab.js'
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = root.name
+        os.makedirs(os.path.join(self.root, 'study'))
+        with open(os.path.join(self.root, self.hashed_name), 'wb') as f:
+            f.write(b'console.log("tile");\n' * 200)
+        with open(os.path.join(self.root, 'logo.png'), 'wb') as f:
+            f.write(random.Random(0).randbytes(2000))
+        storage = CompressedManifestStaticFilesStorage(location=self.root)
+        self.assertEqual(storage.compress(self.hashed_name), self.hashed_name + '.gz')
+        self.assertIsNone(storage.compress('logo.png'))  # gzip would not pay off
+
+        self.enterContext(override_settings(STATIC_ROOT=self.root, STATIC_URL='static/'))
+        self.enterContext(mock.patch.object(staticfiles_storage, 'hashed_files', {'study/app.js': self.hashed_name}, create=True))
+        self.middleware = StaticFilesMiddleware(lambda request: HttpResponse('app'))
+
+    def get(self, path, **headers):
+        return self.middleware(RequestFactory().get(path, headers=headers))
+
+    def test_serves_precompressed_copy(self):
+        response = self.get('/static/' + self.hashed_name, accept_encoding='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b'console.log("tile");\n' * 200)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+
+        response = self.get('/static/' + self.hashed_name)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Content-Type'], 'text/javascript')
+
+    def test_unhashed_files_are_revalidated(self):
+        response = self.get('/static/logo.png', accept_encoding='gzip')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        self.assertFalse(response.has_header('Vary'))
+        response = self.get('/static/logo.png', if_modified_since=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_other_requests_fall_through(self):
+        self.assertEqual(self.get('/static/missing.js').content, b'app')
+        self.assertEqual(self.middleware(RequestFactory().post('/static/logo.png')).content, b'app')
+
+
+# --- Visit dashboard fragments ---
+
+@plain_static
+class VisitDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.visit = make_visit(make_participant(Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1))))
+        self.url = reverse('visit_dashboard', args=[self.visit.participant_id, self.visit.pk])
+        self.client.force_login(User.objects.create_user('coordinator'))
+
+    def test_creates_a_missing_summary(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertTrue(VisitSummary.objects.filter(visit=self.visit).exists())
+
+    def test_tiles_are_cached_until_their_status_changes(self):
+        self.assertContains(self.client.get(self.url), 'Enter Data', count=3)
+        key = make_template_fragment_key('visit_tile', ['clinical', self.visit.pk, False, None])
+        self.assertIsNotNone(cache.get(key))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ClinicalAssessment.objects.create(visit=self.visit, moca_score=25)
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Enter Data', count=2)
+        self.assertContains(response, 'View/Edit Data', count=1)
+
+
+# --- Wearable export ---
+
+class WearableExportTests(TestCase):
+    def setUp(self):
+        self.participant = make_participant(Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1)))
+        self.start = timezone.make_aware(datetime.datetime(2025, 3, 1, 9))
+        WearableDataPoint.objects.bulk_create([
+            WearableDataPoint(participant=self.participant, timestamp=self.start + datetime.timedelta(minutes=minute),
+                              heart_rate=60 + minute, spo2=97.5)
+            for minute in reversed(range(5))
+        ])
+        self.url = reverse('export_wearable_data', args=[self.participant.pk])
+        self.client.force_login(User.objects.create_user('analyst'))
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        return gzip.decompress(b''.join(response.streaming_content)).decode()
+
+    def test_csv_in_time_order(self):
+        lines = self.export(metrics=['heart_rate', 'spo2']).splitlines()
+        self.assertEqual(lines[0], 'timestamp,heart_rate,spo2')
+        self.assertEqual([line.split(',')[1] for line in lines[1:]], ['60', '61', '62', '63', '64'])
+        self.assertTrue(lines[1].endswith(',97.5'))
+
+    def test_ndjson_within_range(self):
+        text = self.export(
+            format='ndjson', metrics='heart_rate',
+            start='2025-03-01 09:01', end='2025-03-01 09:03',
+        )
+        self.assertEqual([json.loads(line)['heart_rate'] for line in text.splitlines()], [61, 62])
+
+    def test_gzip_stream_compresses_as_it_goes(self):
+        rng = random.Random(0)
+        lines = [f'{rng.getrandbits(128):x}\n' for _ in range(20000)]
+        blocks = list(exports.gzip_stream(lines))
+        self.assertGreater(len(blocks), 2)
+        self.assertEqual(gzip.decompress(b''.join(blocks)).decode(), ''.join(lines))
+
+    @plain_static
+    def test_invalid_range_goes_back_to_the_dashboard(self):
+        response = self.client.get(self.url, {'start': '2025-03-02 00:00', 'end': '2025-03-01 00:00'}, follow=True)
+        self.assertRedirects(response, reverse('wearable_dashboard', args=[self.participant.pk]))
+        self.assertContains(response, 'must be before')
+
+
+# --- Data-quality sweep ---
+
+class ValidationSweepTests(TestCase):
+    def setUp(self):
+        self.study = Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1))
+        self.participant = make_participant(self.study, enrollment_date=datetime.date(2025, 3, 1))
+        self.visit = make_visit(self.participant)  # 2025-02-01, before enrollment
+        self.clinical = ClinicalAssessment.objects.create(visit=self.visit, moca_score=31, tug_test_seconds=Decimal('9.5'))
+        now = timezone.now()
+        WearableDataPoint.objects.bulk_create([
+            WearableDataPoint(participant=self.participant, timestamp=now, heart_rate=300, spo2=97.5),
+            WearableDataPoint(participant=self.participant, timestamp=now, spo2=45.5,
+                              blood_pressure_systolic=80, blood_pressure_diastolic=90),
+            WearableDataPoint(participant=self.participant, timestamp=now),  # Missing readings are not errors
+        ])
+
+    def open_rules(self):
+        return sorted(DataQuery.objects.filter(status=DataQuery.Status.OPEN).values_list('rule', flat=True))
+
+    def test_flags_every_rule(self):
+        totals = validation.run_sweep()
+        expected = ['bp_diastolic_above_systolic', 'heart_rate_range', 'moca_range', 'spo2_range', 'visit_before_enrollment']
+        self.assertEqual(sorted(code for code, count in totals.items() if count), expected)
+        self.assertEqual(self.open_rules(), expected)
+        query = DataQuery.objects.get(rule='spo2_range')
+        self.assertEqual((query.participant, query.visit, query.value), (self.participant, None, 'spo2=45.5'))
+        self.assertEqual(DataQuery.objects.get(rule='moca_range').visit, self.visit)
+
+    def test_chunks_give_the_same_result(self):
+        self.assertEqual(validation.run_sweep(chunk_size=1), validation.run_sweep())
+        self.assertEqual(DataQuery.objects.count(), 5)
+
+    def test_corrected_rows_are_resolved(self):
+        validation.run_sweep(sources=['ClinicalAssessment'])
+        first_seen = DataQuery.objects.get(rule='moca_range').first_seen_at
+        validation.run_sweep(sources=['ClinicalAssessment'])
+        self.assertEqual(DataQuery.objects.get(rule='moca_range').first_seen_at, first_seen)
+
+        self.clinical.moca_score = 28
+        self.clinical.save()
+        validation.run_sweep(sources=['ClinicalAssessment'])
+        query = DataQuery.objects.get(rule='moca_range')
+        self.assertEqual(query.status, DataQuery.Status.RESOLVED)
+        self.assertIsNotNone(query.resolved_at)
+
+    def test_sweep_of_one_study(self):
+        validation.run_sweep(sources=['ClinicalAssessment'])
+        other_study = Study.objects.create(name='Other', start_date=datetime.date(2025, 1, 1))
+        other_visit = make_visit(make_participant(other_study))
+        ClinicalAssessment.objects.create(visit=other_visit, moca_score=-1)
+        self.clinical.moca_score = 28
+        self.clinical.save()
+
+        validation.run_sweep(sources=['ClinicalAssessment'], study_id=other_study.pk)
+        self.assertEqual(
+            set(DataQuery.objects.values_list('visit', 'status')),
+            {(self.visit.pk, DataQuery.Status.OPEN), (other_visit.pk, DataQuery.Status.OPEN)},
+        )
+
+
+# --- Multi-study tenancy ---
+
+@plain_static
+class TenancyTests(TestCase):
+    def setUp(self):
+        self.study = Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1))
+        self.other_study = Study.objects.create(name='Other', start_date=datetime.date(2025, 1, 1))
+        self.participant = make_participant(self.study)
+        self.other = make_participant(self.other_study)
+        self.visit = make_visit(self.participant)
+        self.other_visit = make_visit(self.other)
+        now = timezone.now()
+        WearableDataPoint.objects.bulk_create([
+            WearableDataPoint(participant=participant, timestamp=now, heart_rate=60)
+            for participant in (self.participant, self.other)
+        ])
+
+    def test_owned_rows_copy_the_participant_study(self):
+        self.assertEqual(self.other_visit.study_id, self.other_study.pk)
+        self.assertEqual(
+            set(WearableDataPoint.objects.values_list('participant__study', 'study')),
+            {(self.study.pk, self.study.pk), (self.other_study.pk, self.other_study.pk)},
+        )
+
+    def test_managers_are_scoped_to_the_current_study(self):
+        Neuroimaging.objects.create(visit=self.visit, mri_key_findings='Microbleeds')
+        Neuroimaging.objects.create(visit=self.other_visit, mri_key_findings='Microbleeds')
+        with tenancy.use_study(self.study.pk):
+            self.assertEqual(list(Participant.objects.all()), [self.participant])
+            self.assertEqual(list(Visit.objects.all()), [self.visit])
+            self.assertEqual(WearableDataPoint.objects.get().participant_id, self.participant.pk)
+            self.assertEqual(SearchEntry.objects.get().visit_id, self.visit.pk)  # Scoped through the visit
+            self.assertEqual(Visit._base_manager.count(), 2)
+        self.assertEqual(Visit.objects.count(), 2)
+
+    def test_pages_only_show_the_selected_study(self):
+        self.client.force_login(User.objects.create_user('coordinator'))
+        self.client.post(reverse('select_study'), {'study': self.study.pk})
+        listed = self.client.get(reverse('participant_list')).context['participants']
+        self.assertEqual([participant.pk for participant in listed], [self.participant.pk])
+        self.assertEqual(self.client.get(reverse('participant_detail', args=[self.other.pk])).status_code, 404)
+        other_dashboard = reverse('visit_dashboard', args=[self.other.pk, self.other_visit.pk])
+        self.assertEqual(self.client.get(other_dashboard).status_code, 404)
+
+        self.client.post(reverse('select_study'), {'study': ''})
+        self.assertEqual(self.client.get(reverse('participant_detail', args=[self.other.pk])).status_code, 200)
+
+    def test_single_study_is_selected_automatically(self):
+        with self.assertLogs('study.models', 'WARNING'):
+            self.other.delete()
+        self.other_study.delete()
+        self.client.force_login(User.objects.create_user('coordinator'))
+        self.client.get(reverse('participant_list'))
+        self.assertEqual(self.client.session[tenancy.SESSION_KEY], self.study.pk)
+
+    def test_moving_a_participant_moves_its_rows(self):
+        participant = Participant.objects.get(pk=self.participant.pk)
+        participant.study = self.other_study
+        participant.save()
+        self.assertEqual(Visit._base_manager.get(pk=self.visit.pk).study_id, self.other_study.pk)
+        self.assertEqual(
+            WearableDataPoint._base_manager.get(participant=self.participant).study_id, self.other_study.pk,
+        )
+
+    def test_admin_cannot_change_the_study_of_a_participant(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        url = reverse('admin:study_participant_change', args=[self.participant.pk])
+        self.assertNotIn('study', self.client.get(url).context['adminform'].form.fields)
+
+
+# --- Live wearable stream ---
+
+@mock.patch.object(live.Broker, '_poll', lambda broker: None)  # No poller thread outside a server
+class LiveStreamTests(TestCase):
+    def setUp(self):
+        self.participant = make_participant(Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1)))
+        self.other = make_participant(self.participant.study)
+        self.points = self.add_samples(self.participant, 3)
+        self.enterContext(mock.patch.object(live, 'broker', live.Broker()))
+
+    def add_samples(self, participant, count):
+        now = timezone.now()
+        return WearableDataPoint.objects.bulk_create([
+            WearableDataPoint(participant=participant, timestamp=now + datetime.timedelta(minutes=minute), heart_rate=60)
+            for minute in range(count)
+        ])
+
+    def data(self, message):
+        return json.loads(message.split('data: ', 1)[1])
+
+    async def test_reconnect_catches_up_from_last_event_id(self):
+        events = live.wearable_events(self.participant.pk, last_event_id=self.points[0].pk)
+        self.assertEqual(await anext(events), 'retry: 5000\n\n')
+        message = await anext(events)
+        self.assertTrue(message.startswith(f'id: {self.points[-1].pk}\n'))
+        self.assertEqual([point['id'] for point in self.data(message)['points']], [point.pk for point in self.points[1:]])
+        self.assertEqual(self.data(message)['tiles']['avg_hr_24h'], 60)
+        await events.aclose()
+
+    async def test_broker_events_newer_than_the_page(self):
+        events = live.wearable_events(self.participant.pk)
+        await anext(events)
+        latest = self.points[-1].pk
+        live.broker.publish(self.participant.pk, (latest, 'event: old\n\n'))
+        live.broker.publish(self.participant.pk, (latest + 1, 'event: new\n\n'))
+        self.assertEqual(await asyncio.wait_for(anext(events), 1), 'event: new\n\n')
+        with mock.patch.object(live, 'KEEPALIVE', 0.01):
+            self.assertEqual(await asyncio.wait_for(anext(events), 1), ': keep-alive\n\n')
+        await events.aclose()
+        self.assertFalse(live.broker.watched({self.participant.pk}))
+
+    async def test_publish_stored_sends_new_samples_of_watched_participants(self):
+        loop, queue = live.broker.subscribe(self.participant.pk)
+        since = await sync_to_async(live.publish_stored)({self.participant.pk}, None)
+        self.assertEqual(since, self.points[-1].pk)
+
+        new = await sync_to_async(self.add_samples)(self.participant, 2)
+        await sync_to_async(self.add_samples)(self.other, 1)
+        since = await sync_to_async(live.publish_stored)({self.participant.pk}, since)
+        event_id, message = await asyncio.wait_for(queue.get(), 1)
+        self.assertEqual(event_id, new[-1].pk)
+        self.assertEqual([point['id'] for point in self.data(message)['points']], [point.pk for point in new])
+
+        self.assertEqual(await sync_to_async(live.publish_stored)({self.participant.pk}, since), since)
+        self.assertTrue(queue.empty())
+
+
+# --- Outcome trajectories ---
+
+class OutcomeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.study = Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1))
+
+    def assess(self, participant, visit_type, moca_score, **fields):
+        return ClinicalAssessment.objects.create(visit=make_visit(participant, visit_type), moca_score=moca_score, **fields)
+
+    def test_trajectory_changes_from_baseline(self):
+        participant = make_participant(self.study)
+        self.assess(participant, Visit.VisitType.BASELINE, 20, tug_test_seconds=Decimal('10.00'))
+        self.assess(participant, Visit.VisitType.VISIT2, 25, tug_test_seconds=Decimal('8.00'))
+
+        trajectory = outcomes.build_trajectory(participant)
+        self.assertEqual(trajectory['visits'], outcomes.VISIT_LABELS)
+        clinical, biomarkers = trajectory['groups']
+        moca, walk, tug = clinical['outcomes']
+        self.assertEqual(moca['cells'], [(20.0, None, None), (None, None, None), (25.0, 5.0, 25.0), (None, None, None)])
+        self.assertEqual(tug['cells'][2], (8.0, -2.0, -20.0))
+        self.assertEqual(walk['cells'], [(None, None, None)] * 4)
+        self.assertEqual(biomarkers['outcomes'][0]['cells'], [(None, None, None)] * 4)
+
+    def test_trajectory_is_cached_until_data_changes(self):
+        participant = make_participant(self.study)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assess(participant, Visit.VisitType.BASELINE, 20)
+        first = outcomes.participant_trajectory(Participant.objects.select_related('study').get(pk=participant.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assess(participant, Visit.VisitType.EXIT, 22)
+        with mock.patch.object(outcomes, 'build_trajectory', wraps=outcomes.build_trajectory) as build:
+            second = outcomes.participant_trajectory(Participant.objects.select_related('study').get(pk=participant.pk))
+            outcomes.participant_trajectory(Participant.objects.select_related('study').get(pk=participant.pk))
+        build.assert_called_once()
+        self.assertEqual(first['groups'][0]['outcomes'][0]['cells'][3], (None, None, None))
+        self.assertEqual(second['groups'][0]['outcomes'][0]['cells'][3], (22.0, 2.0, 10.0))
+
+    def test_change_from_baseline_per_arm(self):
+        for arm, baseline, follow_up in [('Intervention', 20, 24), ('Intervention', 22, 28), ('Control', 21, 20), (None, 19, 19)]:
+            participant = make_participant(self.study, assigned_group_name=arm)
+            self.assess(participant, Visit.VisitType.BASELINE, baseline)
+            self.assess(participant, Visit.VisitType.VISIT1, follow_up)
+        # A follow-up without a baseline is not paired.
+        self.assess(make_participant(self.study, assigned_group_name='Control'), Visit.VisitType.VISIT1, 30)
+
+        table = outcomes.build_change_from_baseline(self.study)
+        self.assertEqual(table['arms'], ['Control', 'Intervention', 'Not randomized'])
+        clinical, biomarkers = table['groups']
+        self.assertEqual([(row['outcome'], row['visit']) for row in clinical['rows']], [('MoCA score', outcomes.VISIT_LABELS[1])])
+        control, intervention, not_randomized = clinical['rows'][0]['cells']
+        self.assertEqual(control, (1, 21.0, -1.0, None))
+        self.assertEqual(intervention[:3], (2, 21.0, 5.0))
+        self.assertAlmostEqual(intervention[3], 1.4142135, places=6)
+        self.assertEqual(not_randomized, (1, 19.0, 0.0, None))
+        self.assertEqual(biomarkers['rows'], [])
+
+
+# --- Daily wearable features ---
+
+class WearableFeatureTests(TestCase):
+    def test_day_features(self):
+        minutes = np.arange(0, 24 * 60, dtype=np.float64)
+        hr = 60 + 10 * np.cos(2 * np.pi * minutes / (24 * 60))
+        hrv = np.where(minutes < 6 * 60, 40.0, np.nan)
+        hrv[0] = 80.0
+        steps = np.where((minutes >= 600) & (minutes <= 660), 100.0, np.nan)
+        steps[minutes == 900] = 50.0  # A single stepping sample is no bout
+        spo2 = np.full(len(minutes), 97.0)
+        spo2[[200, 201, 900]] = 90.0
+        spo2[1000] = 30.0  # Implausible, ignored
+
+        features = features_module.day_features(minutes, {'heart_rate': hr, 'hrv': hrv, 'spo2': spo2, 'steps_count': steps})
+        self.assertEqual(features['samples'], 24 * 60)
+        self.assertAlmostEqual(features['resting_heart_rate'], np.percentile(hr, 10))
+        self.assertEqual(features['night_hrv'], 40.0)
+        self.assertEqual(features['total_steps'], 61 * 100 + 50)
+        self.assertEqual((features['step_bouts'], features['active_minutes']), (1, 60.0))
+        self.assertEqual(features['desaturation_events'], 2)
+        self.assertAlmostEqual(features['circadian_amplitude'], 10.0)
+
+    def test_sparse_day_has_no_estimates(self):
+        minutes = np.array([600.0, 601.0])
+        empty = np.full(2, np.nan)
+        features = features_module.day_features(
+            minutes, {'heart_rate': np.array([70.0, 72.0]), 'hrv': empty, 'spo2': empty, 'steps_count': empty},
+        )
+        self.assertEqual(features, {
+            'samples': 2, 'resting_heart_rate': None, 'night_hrv': None, 'total_steps': None, 'step_bouts': 0,
+            'active_minutes': 0.0, 'desaturation_events': 0, 'circadian_amplitude': None,
+        })
+
+    def test_runs_only_cover_days_with_new_samples(self):
+        participant = make_participant(Study.objects.create(name='Trial', start_date=datetime.date(2025, 1, 1)))
+
+        def add(day, hour, steps):
+            WearableDataPoint.objects.create(
+                participant=participant, heart_rate=60, steps_count=steps,
+                timestamp=timezone.make_aware(datetime.datetime.combine(day, datetime.time(hour))),
+            )
+
+        first, second, third = (datetime.date(2025, 3, day) for day in (1, 2, 3))
+        add(first, 9, 100)
+        add(second, 9, 200)
+        self.assertEqual(features_module.run_extraction().days_processed, 2)
+        self.assertEqual(features_module.run_extraction().days_processed, 0)
+
+        add(second, 12, 50)
+        add(third, 9, 300)
+        self.assertEqual(features_module.run_extraction().days_processed, 2)
+        self.assertEqual(
+            list(WearableDailyFeatures.objects.order_by('day').values_list('day', 'samples', 'total_steps')),
+            [(first, 1, 100), (second, 2, 250), (third, 1, 300)],
+        )
+        self.assertEqual(features_module.run_extraction(full=True).days_processed, 3)
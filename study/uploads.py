@@ -0,0 +1,191 @@
+# study/uploads.py
+
+import hashlib
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .models import ReportUpload
+
+# Size of the blocks copied between the request, the disk and the response.
+# Nothing larger than this is ever held in memory.
+BLOCK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# A claimed chunk that has not finished after this long (its request died
+# without releasing it) can be claimed by a retry.
+CHUNK_LEASE = timedelta(minutes=5)
+
+
+class HashMismatch(Exception):
+    """The assembled file does not have the announced size or hash."""
+
+
+# --- Receiving chunks ---
+
+def partial_path(upload):
+    return os.path.join(settings.UPLOAD_PARTIAL_DIR, f'{upload.id}.part')
+
+
+def claim_chunk(upload, offset):
+    """
+    Reserves the chunk at `offset` for the calling request before it touches
+    the partial file. Returns the claim, or None when the upload has moved
+    past `offset` or another request is writing there.
+    """
+    claim = timezone.now()
+    claimed = ReportUpload.objects.filter(
+        Q(chunk_started_at__isnull=True) | Q(chunk_started_at__lt=claim - CHUNK_LEASE),
+        pk=upload.pk, received_bytes=offset, completed_at__isnull=True,
+    ).update(chunk_started_at=claim)
+    return claim if claimed else None
+
+
+def release_chunk(upload, claim, received_bytes):
+    """Records the bytes now held and frees the upload. False if the claim had expired and been taken over."""
+    return bool(ReportUpload.objects.filter(pk=upload.pk, chunk_started_at=claim).update(
+        received_bytes=received_bytes, chunk_started_at=None,
+    ))
+
+
+def write_chunk(upload, stream, offset, length):
+    """
+    Copies `length` bytes from `stream` into the partial file at `offset` and
+    returns how many bytes actually arrived. A dropped connection leaves a
+    shorter, still valid prefix that the client can resume from. Only call
+    it with a claim on the chunk.
+    """
+    os.makedirs(settings.UPLOAD_PARTIAL_DIR, exist_ok=True)
+    path = partial_path(upload)
+    written = 0
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+        f.seek(offset)
+        f.truncate()  # Drop any tail left behind by an interrupted chunk.
+        while written < length:
+            block = stream.read(min(BLOCK_SIZE, length - written))
+            if not block:
+                break
+            f.write(block)
+            written += len(block)
+    return written
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def finish_upload(upload):
+    """
+    Verifies the assembled file's size, and its hash when the client
+    announced one, then moves it into content-addressed storage.
+
+    Files are stored as mri_reports/sha256/<hash>/<filename>, so a report that
+    was already uploaded (for any visit) is reused instead of stored twice.
+    Returns (storage name, sha256).
+    """
+    path = partial_path(upload)
+    size = os.path.getsize(path)
+    if size != upload.total_size:
+        os.remove(path)
+        raise HashMismatch(f"{size} bytes instead of {upload.total_size}")
+    sha256 = file_sha256(path)
+    if upload.expected_sha256 and upload.expected_sha256.lower() != sha256:
+        os.remove(path)
+        raise HashMismatch(f"sha256 {sha256}")
+
+    directory = f'mri_reports/sha256/{sha256}'
+    existing = default_storage.listdir(directory)[1] if default_storage.exists(directory) else []
+    if existing:
+        os.remove(path)
+        return f'{directory}/{existing[0]}', sha256
+
+    name = f'{directory}/{get_valid_filename(upload.filename)}'
+    os.makedirs(os.path.dirname(default_storage.path(name)), exist_ok=True)
+    os.replace(path, default_storage.path(name))
+    return name, sha256
+
+
+# --- Serving files ---
+
+def parse_range(header, size):
+    """
+    Returns (start, end) for a single 'bytes=' range, None when there is no
+    usable header, and raises ValueError when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:  # Suffix range, e.g. 'bytes=-500'
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def iter_file_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            block = f.read(min(BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def serve_file(request, field_file):
+    """
+    Streams a stored file without reading it into memory, honouring single
+    Range requests. When SENDFILE_HEADER is configured the web server sends
+    the file instead.
+    """
+    filename = os.path.basename(field_file.name)
+    disposition = f'attachment; filename="{filename}"'
+
+    if settings.SENDFILE_HEADER:
+        response = HttpResponse(content_type='application/octet-stream')
+        if settings.SENDFILE_HEADER == 'X-Accel-Redirect':
+            response['X-Accel-Redirect'] = settings.SENDFILE_URL_PREFIX + field_file.name
+        else:
+            response[settings.SENDFILE_HEADER] = field_file.path
+        response['Content-Disposition'] = disposition
+        return response
+
+    size = field_file.size
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(open(field_file.path, 'rb'), as_attachment=True, filename=filename)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            iter_file_range(field_file.path, start, end - start + 1),
+            status=206,
+            content_type='application/octet-stream',
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+        response['Content-Disposition'] = disposition
+    response['Accept-Ranges'] = 'bytes'
+    return response
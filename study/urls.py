@@ -4,9 +4,18 @@ from . import views
 urlpatterns = [
     # Core pages
     path('', views.dashboard, name='dashboard'),
+    path('study/select/', views.select_study, name='select_study'),
+    path('study/<int:study_id>/report/', views.study_report, name='study_report'),
+    path('study/<int:study_id>/outcomes/', views.change_from_baseline, name='change_from_baseline'),
+    path('participants/', views.participant_list, name='participant_list'),
+    path('visits/upcoming/', views.upcoming_visits, name='upcoming_visits'),
+    path('search/', views.search, name='search'),
+    path('import/biomarkers/', views.import_biomarkers, name='import_biomarkers'),
     path('participant/add/', views.add_participant, name='add_participant'),
     path('participant/<int:participant_id>/', views.participant_detail, name='participant_detail'),
     path('participant/<int:participant_id>/create-visit/', views.create_visit, name='create_visit'),
+    path('participant/<int:participant_id>/randomize/', views.randomize_participant, name='randomize_participant'),
+    path('participant/<int:participant_id>/trajectory/', views.participant_trajectory, name='participant_trajectory'),
 
     # Visit and Assessment URLs
     path('participant/<int:participant_id>/visit/<int:visit_id>/', views.visit_dashboard, name='visit_dashboard'),
@@ -16,8 +25,19 @@ urlpatterns = [
     path('participant/<int:participant_id>/visit/<int:visit_id>/assign-questionnaire/', views.assign_questionnaire, name='assign_questionnaire'),
     path('participant/<int:participant_id>/visit/<int:visit_id>/assessment/<int:assessment_id>/', views.take_questionnaire, name='take_questionnaire'),
     
+    # Chunked, resumable MRI report uploads and range-aware downloads.
+    path('participant/<int:participant_id>/visit/<int:visit_id>/neuroimaging/uploads/', views.start_report_upload, name='start_report_upload'),
+    path('participant/<int:participant_id>/visit/<int:visit_id>/neuroimaging/uploads/<uuid:upload_id>/', views.report_upload_chunk, name='report_upload_chunk'),
+    path('participant/<int:participant_id>/visit/<int:visit_id>/neuroimaging/report/', views.download_mri_report, name='download_mri_report'),
+
     # The generic data entry URL is now last, to act as a catch-all.
     path('participant/<int:participant_id>/visit/<int:visit_id>/<slug:category_slug>/', views.visit_data_entry, name='visit_data_entry'),
     path('participant/<int:participant_id>/wearables/', views.wearable_dashboard, name='wearable_dashboard'),
+    path('participant/<int:participant_id>/wearables/export/', views.export_wearable_data, name='export_wearable_data'),
+    path('participant/<int:participant_id>/wearables/stream/', views.wearable_stream, name='wearable_stream'),
+
+    # Offline questionnaire capture: definitions for the client and batched submissions.
+    path('api/questionnaires/', views.questionnaire_definitions, name='questionnaire_definitions'),
+    path('api/questionnaires/sync/', views.sync_questionnaires, name='sync_questionnaires'),
 
 ]
\ No newline at end of file
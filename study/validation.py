@@ -0,0 +1,225 @@
+# study/validation.py
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+import numpy as np
+from django.db import connections
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import (
+    BiologicalSample,
+    ClinicalAssessment,
+    DataQuery,
+    StudyOwnedModel,
+    Visit,
+    WearableDataPoint,
+    WearableDataPointQuerySet,
+)
+
+# A rule flags the rows of a chunk for which `check(columns)` is True.
+# `columns` maps each column of the source to a NumPy array (NaN/NaT when
+# missing); comparisons with NaN are False, so missing values never fail.
+Rule = namedtuple('Rule', ['code', 'description', 'fields', 'check'])
+
+# Where a source reads its rows from. `columns` are values_list() lookups;
+# the first three must be the row id, its participant id and its visit id.
+Source = namedtuple('Source', ['name', 'model', 'columns', 'scaled', 'rules'])
+
+# Rows read per query, and per task handed to a worker process.
+CHUNK_SIZE = 100_000
+
+
+def _outside(name):
+    low, high = WearableDataPointQuerySet.PLAUSIBLE_RANGES[name]
+    return lambda c: (c[name] < low) | (c[name] > high)
+
+
+def _negative(name):
+    return lambda c: c[name] < 0
+
+
+SOURCES = [
+    Source(
+        'ClinicalAssessment', ClinicalAssessment,
+        ['id', 'visit__participant_id', 'visit_id', 'moca_score', 'tug_test_seconds', 'six_minute_walk_test_meters'],
+        {},
+        [
+            Rule('moca_range', "MoCA score outside 0-30", ['moca_score'],
+                 lambda c: (c['moca_score'] < 0) | (c['moca_score'] > 30)),
+            Rule('tug_not_positive', "Timed up-and-go time must be positive", ['tug_test_seconds'],
+                 lambda c: c['tug_test_seconds'] <= 0),
+            Rule('walk_negative', "6-minute walk distance is negative", ['six_minute_walk_test_meters'],
+                 _negative('six_minute_walk_test_meters')),
+        ],
+    ),
+    Source(
+        'BiologicalSample', BiologicalSample,
+        ['id', 'visit__participant_id', 'visit_id', 'gfap', 'nfl', 'abeta40_42_ratio', 'ptau217'],
+        {},
+        [
+            Rule(f'{name}_negative', f"{label} concentration is negative", [name], _negative(name))
+            for name, label in [('gfap', 'GFAP'), ('nfl', 'NfL'), ('abeta40_42_ratio', 'Abeta40/42 ratio'), ('ptau217', 'pTau217')]
+        ],
+    ),
+    Source(
+        'Visit', Visit,
+        ['id', 'participant_id', 'id', 'visit_date', 'participant__enrollment_date'],
+        {},
+        [
+            Rule('visit_before_enrollment', "Visit is dated before the participant's enrollment",
+                 ['visit_date', 'participant__enrollment_date'],
+                 lambda c: c['visit_date'] < c['participant__enrollment_date']),
+        ],
+    ),
+    Source(
+        'WearableDataPoint', WearableDataPoint,
+        ['id', 'participant_id', None, 'heart_rate', 'spo2', 'respiratory_rate',
+         'blood_pressure_systolic', 'blood_pressure_diastolic'],
+        WearableDataPointQuerySet.SCALED_FIELDS,
+        [
+            Rule('heart_rate_range', "Heart rate outside the plausible range", ['heart_rate'], _outside('heart_rate')),
+            Rule('spo2_range', "SpO2 outside the plausible range", ['spo2'], _outside('spo2')),
+            Rule('respiratory_rate_range', "Respiratory rate outside the plausible range", ['respiratory_rate'],
+                 _outside('respiratory_rate')),
+            Rule('bp_diastolic_above_systolic', "Diastolic pressure is not below systolic",
+                 ['blood_pressure_systolic', 'blood_pressure_diastolic'],
+                 lambda c: c['blood_pressure_diastolic'] >= c['blood_pressure_systolic']),
+        ],
+    ),
+]
+SOURCES_BY_NAME = {source.name: source for source in SOURCES}
+
+DATE_COLUMNS = {'visit_date', 'participant__enrollment_date'}
+
+
+# --- Reading chunks ---
+
+def _queryset(source, study_id):
+    qs = source.model.objects.all()
+    if study_id:
+        # Visits and wearable samples carry their own study column; visit
+        # records reach it through the visit rather than the participant.
+        lookup = 'study_id' if issubclass(source.model, StudyOwnedModel) else 'visit__study_id'
+        qs = qs.filter(**{lookup: study_id})
+    return qs
+
+
+def _read_chunk(source, study_id, start_id, end_id):
+    """Reads rows with start_id <= id < end_id straight from the cursor into NumPy arrays."""
+    lookups = list(dict.fromkeys(column for column in source.columns if column is not None))
+    qs = _queryset(source, study_id).filter(id__gte=start_id, id__lt=end_id).order_by()
+    sql, params = qs.values_list(*lookups).query.get_compiler(qs.db).as_sql()
+    with connections[qs.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    values = list(zip(*rows)) if rows else [()] * len(lookups)
+    by_lookup = dict(zip(lookups, values))
+
+    columns = {
+        'id': np.array(by_lookup['id'], dtype=np.int64),
+        'participant_id': np.array(by_lookup[source.columns[1]], dtype=np.int64),
+        'visit_id': np.array(by_lookup[source.columns[2]], dtype=np.int64) if source.columns[2] else None,
+    }
+    for name in source.columns[3:]:
+        if name in DATE_COLUMNS:
+            columns[name] = np.array(by_lookup[name], dtype='datetime64[D]')
+        else:
+            columns[name] = np.array(by_lookup[name], dtype=np.float64)
+            if name in source.scaled:
+                columns[name] /= source.scaled[name]
+    return columns
+
+
+# --- Checking ---
+
+def _format_value(columns, fields, index):
+    return ', '.join(f"{name}={columns[name][index]}" for name in fields)
+
+
+def check_chunk(source_name, study_id, start_id, end_id, seen_at):
+    """
+    Applies every rule of a source to one id range and upserts a DataQuery
+    per failing row. Returns {rule code: rows flagged}. Runs in worker processes.
+    """
+    source = SOURCES_BY_NAME[source_name]
+    columns = _read_chunk(source, study_id, start_id, end_id)
+    queries, counts = [], {}
+    with np.errstate(invalid='ignore'):
+        for rule in source.rules:
+            failing = np.flatnonzero(rule.check(columns))
+            counts[rule.code] = len(failing)
+            for index in failing:
+                queries.append(DataQuery(
+                    rule=rule.code,
+                    model_name=source.name,
+                    object_id=int(columns['id'][index]),
+                    participant_id=int(columns['participant_id'][index]),
+                    visit_id=int(columns['visit_id'][index]) if columns['visit_id'] is not None else None,
+                    description=rule.description,
+                    value=_format_value(columns, rule.fields, index),
+                    status=DataQuery.Status.OPEN,
+                    first_seen_at=seen_at,
+                    last_seen_at=seen_at,
+                ))
+    DataQuery.objects.bulk_create(
+        queries,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['rule', 'model_name', 'object_id'],
+        update_fields=['description', 'value', 'status', 'last_seen_at', 'resolved_at'],
+    )
+    return counts
+
+
+def _id_ranges(source, study_id, chunk_size):
+    bounds = _queryset(source, study_id).aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is None:
+        return []
+    return [(start, start + chunk_size) for start in range(bounds['low'], bounds['high'] + 1, chunk_size)]
+
+
+def _init_worker():
+    # Needed with the 'spawn' start method; a no-op for forked workers.
+    django.setup()
+
+
+def run_sweep(sources=None, study_id=None, workers=1, chunk_size=CHUNK_SIZE):
+    """
+    Checks every row of `sources` (default: all) and records discrepancies as
+    DataQuery rows. Id ranges are spread over `workers` processes. Open
+    queries that were not seen again are resolved. Returns {rule code: rows flagged}.
+    """
+    sources = [SOURCES_BY_NAME[name] for name in sources] if sources else SOURCES
+    seen_at = timezone.now()
+    tasks = [
+        (source.name, study_id, start, end, seen_at)
+        for source in sources
+        for start, end in _id_ranges(source, study_id, chunk_size)
+    ]
+
+    totals = {rule.code: 0 for source in sources for rule in source.rules}
+    if workers > 1 and len(tasks) > 1:
+        # Forked workers must not share the parent's database connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            results = pool.map(check_chunk, *zip(*tasks))
+            for counts in results:
+                for code, count in counts.items():
+                    totals[code] += count
+    else:
+        for task in tasks:
+            for code, count in check_chunk(*task).items():
+                totals[code] += count
+
+    stale = DataQuery.objects.filter(
+        model_name__in=[source.name for source in sources],
+        status=DataQuery.Status.OPEN,
+        last_seen_at__lt=seen_at,
+    )
+    if study_id:
+        stale = stale.filter(participant__study_id=study_id)
+    stale.update(status=DataQuery.Status.RESOLVED, resolved_at=timezone.now())
+    return totals
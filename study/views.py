@@ -1,16 +1,24 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, require_http_methods
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.db import transaction
 from django.utils import timezone
-from django.db.models import Avg, Sum
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+import csv
 import json
+import numpy as np
 
 # Corrected imports for our new models
 from .models import (
+    Study,
     Participant,
+    RandomizationScheme,
     Visit,
     VisitAssessment,
     QuestionnaireTemplate,
@@ -20,23 +28,153 @@ from .models import (
     ClinicalAssessment,
     BiologicalSample,
     Neuroimaging,
-    WearableDataPoint
+    WearableDataPoint,
+    ReportUpload,
+    VisitSummary,
+    WearableDataPointQuerySet
 )
+from . import uploads
 from .forms import (
     ParticipantCreationForm,
     QuestionnaireForm,
     ClinicalAssessmentForm,
     BiologicalSampleForm,
-    NeuroimagingForm
+    NeuroimagingForm,
+    SearchForm,
+    BiomarkerImportForm,
+    WearableExportForm
 )
+from . import biomarker_import
+from . import exports
+from . import live
+from . import outcomes
+from . import audit
+from . import search as study_search
+from . import sync
+from . import randomization
+from . import reports
+from . import scheduling
+from . import tenancy
+from .routers import use_read_replica
+from .summaries import live_summaries, refresh_visit_summaries
 
 # --- Participant and Dashboard Views ---
 
 @login_required
+@use_read_replica
 def dashboard(request):
     recent_participants = Participant.objects.order_by('-id')[:10]
     return render(request, 'study/dashboard.html', {'participants': recent_participants})
 
+@login_required
+@require_POST
+def select_study(request):
+    """Switches the study every page is scoped to; an empty choice shows all studies."""
+    study_id = request.POST.get('study', '')
+    if study_id.isdigit():
+        request.session[tenancy.SESSION_KEY] = get_object_or_404(Study, pk=study_id).pk
+    else:
+        request.session.pop(tenancy.SESSION_KEY, None)
+    return redirect('dashboard')
+
+PARTICIPANTS_PER_PAGE = 25
+
+@login_required
+@use_read_replica
+def participant_list(request):
+    """
+    Browses the whole cohort, newest first, with keyset pagination on id:
+    `?before=<id>` pages towards older participants and `?after=<id>` back
+    towards newer ones, so every page is an index range scan.
+    """
+    participants = Participant.objects.with_progress()
+    before, after = request.GET.get('before'), request.GET.get('after')
+    if after and after.isdigit():
+        page = list(participants.filter(id__gt=after).order_by('id')[:PARTICIPANTS_PER_PAGE + 1])
+        has_newer = len(page) > PARTICIPANTS_PER_PAGE
+        page = page[:PARTICIPANTS_PER_PAGE][::-1]
+        has_older = True
+    else:
+        if before and before.isdigit():
+            participants = participants.filter(id__lt=before)
+        page = list(participants.order_by('-id')[:PARTICIPANTS_PER_PAGE + 1])
+        has_older = len(page) > PARTICIPANTS_PER_PAGE
+        page = page[:PARTICIPANTS_PER_PAGE]
+        has_newer = bool(before and before.isdigit())
+    context = {
+        'participants': page,
+        'newer_than': page[0].id if page and has_newer else None,
+        'older_than': page[-1].id if page and has_older else None,
+    }
+    return render(request, 'study/participant_list.html', context)
+
+@login_required
+@use_read_replica
+def upcoming_visits(request):
+    """Worklist of protocol visits that are due soon or overdue."""
+    try:
+        days = int(request.GET.get('days', 14))
+    except ValueError:
+        days = 14
+    days = min(max(days, 1), 365)  # Larger values overflow the date arithmetic.
+    context = {
+        'days': days,
+        'upcoming': scheduling.upcoming_visits(days=days)[:200],
+        'overdue': scheduling.overdue_visits()[:200],
+    }
+    return render(request, 'study/upcoming_visits.html', context)
+
+@login_required
+@use_read_replica
+def search(request):
+    """Structured participant search plus full-text search over visit findings."""
+    form = SearchForm(request.GET or None)
+    participants, findings = None, None
+    if form.is_valid():
+        data = form.cleaned_data
+        if form.has_structured_filters():
+            participants = study_search.search_participants(
+                participant_id=data['participant_id'],
+                status=data['status'],
+                arm=data['arm'],
+                visit_type=data['visit_type'],
+                visit_complete=data['visit_complete'],
+            )
+        if data['q']:
+            findings = study_search.search_text(data['q'])
+    context = {
+        'form': form,
+        'participants': participants,
+        'findings': findings,
+    }
+    return render(request, 'study/search.html', context)
+
+@login_required
+@use_read_replica
+def study_report(request, study_id):
+    """CONSORT flow, visit attendance and recruitment for one study, as a page or CSV (?format=csv)."""
+    study = get_object_or_404(Study, pk=study_id)
+    if request.study_id is not None and study.pk != request.study_id:
+        raise Http404("The report belongs to another study.")
+    report = reports.consort_report(study)
+    if request.GET.get('format') == 'csv':
+        response = HttpResponse(reports.consort_csv(report), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="consort_study_{study.pk}.csv"'
+        return response
+    return render(request, 'study/study_report.html', {'study': study, 'report': report})
+
+@login_required
+@use_read_replica
+def change_from_baseline(request, study_id):
+    """Per-arm change from baseline of every outcome at every follow-up visit."""
+    study = get_object_or_404(Study, pk=study_id)
+    if request.study_id is not None and study.pk != request.study_id:
+        raise Http404("The table belongs to another study.")
+    return render(request, 'study/change_from_baseline.html', {
+        'study': study,
+        'table': outcomes.change_from_baseline(study),
+    })
+
 @login_required
 def add_participant(request):
     if request.method == 'POST':
@@ -59,20 +197,45 @@ def add_participant(request):
 @login_required
 def participant_detail(request, participant_id):
     participant = get_object_or_404(Participant, pk=participant_id)
-    visits = Visit.objects.filter(participant=participant).order_by('visit_date')
+    # The denormalized summaries carry each visit's category status without extra
+    # joins. A visit whose summary is missing is computed from its data tables.
+    visits = list(participant.visits.select_related('summary').order_by('visit_date', 'pk'))
+    live = {summary.visit_id: summary for summary in live_summaries(
+        visit.pk for visit in visits if not hasattr(visit, 'summary')
+    )}
+    visits = [live.get(visit.pk) or visit.summary for visit in visits]
     existing_visit_types = [v.visit_type for v in visits]
     all_possible_visits = Visit.VisitType.choices
     creatable_visits = [
         (code, label) for code, label in all_possible_visits
         if code not in existing_visit_types
     ]
+    can_randomize = (
+        not participant.assigned_group_name
+        and participant.status in (Participant.Status.ELIGIBLE, Participant.Status.ENROLLED)
+        and RandomizationScheme.objects.filter(study_id=participant.study_id).exists()
+    )
     context = {
         'participant': participant,
         'visits': visits,
         'creatable_visits': creatable_visits,
+        'can_randomize': can_randomize,
     }
     return render(request, 'study/participant_detail.html', context)
 
+@login_required
+@require_POST
+def randomize_participant(request, participant_id):
+    """Allocates the participant to an arm with the study's randomization scheme."""
+    participant = get_object_or_404(Participant, pk=participant_id)
+    try:
+        arm = randomization.allocate(participant)
+    except randomization.RandomizationError as e:
+        messages.error(request, str(e))
+    else:
+        messages.success(request, f"{participant.participant_id} was randomized to {arm}.")
+    return redirect('participant_detail', participant_id=participant.id)
+
 @login_required
 @require_POST
 def create_visit(request, participant_id):
@@ -87,7 +250,7 @@ def create_visit(request, participant_id):
         Visit.objects.create(
             participant=participant,
             visit_type=visit_type_to_create,
-            visit_date=timezone.now().date()
+            visit_date=scheduling.target_date(participant, visit_type_to_create)
         )
         messages.success(request, f"Successfully created the visit.")
     return redirect('participant_detail', participant_id=participant.id)
@@ -98,36 +261,21 @@ def create_visit(request, participant_id):
 @login_required
 def visit_dashboard(request, participant_id, visit_id):
     """Displays a dashboard with tiles for each data entry category for a visit."""
-    participant = get_object_or_404(Participant, pk=participant_id)
-    visit = get_object_or_404(Visit, pk=visit_id, participant=participant)
-    
-    # --- NEW LOGIC: Fetch the status for each category ---
-    # We use try/except blocks in case the record hasn't been created yet.
-    try:
-        clinical_assessment = visit.clinical_assessment
-    except ClinicalAssessment.DoesNotExist:
-        clinical_assessment = None
-        
-    try:
-        biological_sample = visit.biological_sample
-    except BiologicalSample.DoesNotExist:
-        biological_sample = None
-        
+    visit = get_object_or_404(
+        Visit.objects.select_related('participant', 'summary'), pk=visit_id, participant_id=participant_id
+    )
+    # The tiles only need each category's status, which VisitSummary already
+    # holds; the template caches every tile until that status changes.
     try:
-        neuroimaging = visit.neuroimaging
-    except Neuroimaging.DoesNotExist:
-        neuroimaging = None
-
-    # For questionnaires, we check if any have been completed for this visit.
-    questionnaires_status = visit.assessments.filter(completed_at__isnull=False).order_by('-completed_at').first()
+        summary = visit.summary
+    except VisitSummary.DoesNotExist:
+        refresh_visit_summaries([visit.id])
+        summary = VisitSummary.objects.get(visit=visit)
 
     context = {
-        'participant': participant,
+        'participant': visit.participant,
         'visit': visit,
-        'clinical_assessment': clinical_assessment,
-        'biological_sample': biological_sample,
-        'neuroimaging': neuroimaging,
-        'questionnaires_status': questionnaires_status,
+        'summary': summary,
     }
     return render(request, 'study/visit_dashboard.html', context)
 
@@ -144,11 +292,13 @@ def visit_data_entry(request, participant_id, visit_id, category_slug):
         messages.error(request, "Invalid data category specified.")
         return redirect('visit_dashboard', participant_id=participant_id, visit_id=visit_id)
     Model, Form = category_map[category_slug]
-    instance = Model.objects.get_or_create(visit=visit)[0]
+    # Only saving the form creates the row; viewing an empty category writes nothing.
+    instance = Model.objects.filter(visit=visit).first() or Model(visit=visit)
     if request.method == 'POST':
         form = Form(request.POST, request.FILES, instance=instance)
         if form.is_valid():
-            form.save()
+            with audit.batch():
+                form.save()
             messages.success(request, f"{category_slug.replace('-', ' ').title()} data saved successfully.")
             return redirect('visit_dashboard', participant_id=participant_id, visit_id=visit_id)
     else:
@@ -157,6 +307,8 @@ def visit_data_entry(request, participant_id, visit_id, category_slug):
         'participant': participant,
         'visit': visit,
         'form': form,
+        'instance': instance,
+        'category_slug': category_slug,
         'category_name': category_slug.replace('-', ' ').title(),
     }
     return render(request, 'study/visit_data_entry.html', context)
@@ -165,7 +317,7 @@ def visit_data_entry(request, participant_id, visit_id, category_slug):
 def visit_questionnaires(request, participant_id, visit_id):
     participant = get_object_or_404(Participant, pk=participant_id)
     visit = get_object_or_404(Visit, pk=visit_id, participant=participant)
-    assessments = VisitAssessment.objects.filter(visit=visit)
+    assessments = VisitAssessment.objects.for_list().filter(visit=visit)
     assigned_template_ids = assessments.values_list('questionnaire_template_id', flat=True)
     assignable_questionnaires = QuestionnaireTemplate.objects.exclude(id__in=assigned_template_ids)
     context = {
@@ -190,35 +342,48 @@ def assign_questionnaire(request, participant_id, visit_id):
             questionnaire_template=questionnaire_template
         )
         messages.success(request, f"Assigned '{questionnaire_template.name}' to this visit.")
-    return redirect('visit_questionnaires', participant_id=visit.participant.id, visit_id=visit.id)
+    return redirect('visit_questionnaires', participant_id=visit.participant_id, visit_id=visit.id)
 
 @login_required
 def take_questionnaire(request, participant_id, visit_id, assessment_id):
     """Displays and processes the form for a specific questionnaire assessment."""
-    assessment = get_object_or_404(VisitAssessment, pk=assessment_id, visit_id=visit_id)
-    questions = assessment.questionnaire_template.questions.all()
+    assessment = get_object_or_404(VisitAssessment.objects.for_list(), pk=assessment_id, visit_id=visit_id)
+    questions = assessment.questionnaire_template.questions.prefetch_related('choices')
 
     if request.method == 'POST':
         # This part for saving the form remains the same
         form = QuestionnaireForm(request.POST, questions=questions)
         if form.is_valid():
             total_score = 0
-            with transaction.atomic():
-                assessment.answers.all().delete() # Clear old answers before saving new ones
+            # The form already checked every choice belongs to its question, so
+            # resolve them from the prefetched choices instead of one query each.
+            choices = {choice.id: choice for question in questions for choice in question.choices.all()}
+            # Answers are updated in place, so the audit log records which
+            # choices changed instead of a delete and re-create of every answer.
+            with audit.batch():
+                existing = {answer.question_id: answer for answer in assessment.answers.all()}
+                to_create, to_update = [], []
                 for question in questions:
                     choice_id = form.cleaned_data[f'question_{question.id}']
-                    selected_choice = get_object_or_404(Choice, pk=choice_id)
-                    Answer.objects.create(
-                        visit_assessment=assessment,
-                        question=question,
-                        selected_choice=selected_choice
-                    )
+                    selected_choice = choices[int(choice_id)]
                     total_score += selected_choice.value
-                
+                    answer = existing.pop(question.id, None)
+                    if answer is None:
+                        to_create.append(Answer(visit_assessment=assessment, question=question, selected_choice=selected_choice))
+                    elif answer.selected_choice_id != selected_choice.id:
+                        answer.selected_choice = selected_choice
+                        to_update.append(answer)
+                Answer.objects.bulk_create(to_create)
+                Answer.objects.bulk_update(to_update, ['selected_choice'])
+                audit.record_bulk(to_create, created=True)
+                audit.record_bulk(to_update, created=False)
+                for answer in existing.values():  # Questions no longer in the template
+                    answer.delete()
+
                 assessment.total_score = total_score
                 assessment.completed_at = timezone.now() # Update the completion time
                 assessment.save()
-            
+
             messages.success(request, f"Assessment answers have been updated successfully.")
             return redirect('visit_questionnaires', participant_id=participant_id, visit_id=visit_id)
     else:
@@ -226,7 +391,7 @@ def take_questionnaire(request, participant_id, visit_id, assessment_id):
         initial_data = {}
         if assessment.completed_at:
             for answer in assessment.answers.all():
-                initial_data[f'question_{answer.question.id}'] = answer.selected_choice.id
+                initial_data[f'question_{answer.question_id}'] = answer.selected_choice_id
         
         # Pass the initial_data to the form
         form = QuestionnaireForm(questions=questions, initial=initial_data)
@@ -240,7 +405,22 @@ def take_questionnaire(request, participant_id, visit_id, assessment_id):
     }
     return render(request, 'study/take_questionnaire.html', context)
 
+def _plausible_mask(values, field):
+    # NaN (no reading) compares False on both sides.
+    low, high = WearableDataPointQuerySet.PLAUSIBLE_RANGES[field]
+    return (values >= low) & (values <= high)
+
+@login_required
+@use_read_replica
+def participant_trajectory(request, participant_id):
+    participant = get_object_or_404(Participant.objects.select_related('study'), pk=participant_id)
+    return render(request, 'study/participant_trajectory.html', {
+        'participant': participant,
+        'trajectory': outcomes.participant_trajectory(participant),
+    })
+
 @login_required
+@use_read_replica
 def wearable_dashboard(request, participant_id):
     participant = get_object_or_404(Participant, pk=participant_id)
 
@@ -252,30 +432,237 @@ def wearable_dashboard(request, participant_id):
     ).order_by('timestamp')
 
     # --- Calculate Summaries for the Tiles ---
-    latest_bp = WearableDataPoint.objects.filter(participant=participant).exclude(blood_pressure_systolic__isnull=True).order_by('-timestamp').first()
-    latest_spo2 = wearable_data_last_24h.exclude(spo2__isnull=True).last()
-    avg_hr_last_24h = wearable_data_last_24h.aggregate(avg_hr=Avg('heart_rate'))
-    today_start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    steps_today = WearableDataPoint.objects.filter(participant=participant, timestamp__gte=today_start).aggregate(total_steps=Sum('steps_count'))
+    # The same values are pushed by wearable_stream as new samples arrive.
+    tiles = WearableDataPoint.objects.filter(participant=participant).tiles()
 
     # --- Prepare data for the charts ---
-    hr_labels = [data.timestamp.strftime('%H:%M') for data in wearable_data_last_24h if data.heart_rate]
-    hr_data = [data.heart_rate for data in wearable_data_last_24h if data.heart_rate]
-    
-    spo2_labels = [data.timestamp.strftime('%H:%M') for data in wearable_data_last_24h if data.spo2]
-    # --- THIS IS THE CORRECTED LINE ---
-    # We convert the Decimal 'data.spo2' into a float
-    spo2_data = [float(data.spo2) for data in wearable_data_last_24h if data.spo2]
+    # Read the series as NumPy arrays instead of building a model instance per sample.
+    series = wearable_data_last_24h.as_arrays('heart_rate', 'spo2')
+    # Full minutes ('YYYY-MM-DDTHH:MM', UTC), so live updates can drop samples
+    # older than 24 hours; the charts label them with the time only.
+    times = np.datetime_as_string(series['timestamp'], unit='m')
+    hr = series['heart_rate']
+    has_hr = _plausible_mask(hr, 'heart_rate')
+    hr_times = times[has_hr].tolist()
+    hr_data = hr[has_hr].astype(int).tolist()
+
+    spo2 = series['spo2']
+    has_spo2 = _plausible_mask(spo2, 'spo2')
+    spo2_times = times[has_spo2].tolist()
+    spo2_data = spo2[has_spo2].tolist()
 
     context = {
         'participant': participant,
-        'latest_bp': latest_bp,
-        'latest_spo2': latest_spo2,
-        'avg_hr_last_24h': avg_hr_last_24h.get('avg_hr'),
-        'steps_today': steps_today.get('total_steps'),
-        'hr_labels': json.dumps(hr_labels),
-        'hr_data': json.dumps(hr_data),
-        'spo2_labels': json.dumps(spo2_labels),
-        'spo2_data': json.dumps(spo2_data),
+        'tiles': tiles,
+        'export_form': WearableExportForm(),
+        'chart_data': {
+            'hr_times': hr_times,
+            'hr_data': hr_data,
+            'spo2_times': spo2_times,
+            'spo2_data': spo2_data,
+            'plausible_ranges': WearableDataPointQuerySet.PLAUSIBLE_RANGES,
+            'stream_url': reverse('wearable_stream', args=[participant.id]),
+            # Only an ASGI server can hold the stream open without tying up a worker.
+            'live_updates': isinstance(request, ASGIRequest),
+        },
+    }
+    return render(request, 'study/wearable_dashboard.html', context)
+
+@login_required
+async def wearable_stream(request, participant_id):
+    """
+    Server-sent events with the participant's new wearable samples and tile
+    values, pushed as they are ingested (see study/live.py). Needs the ASGI
+    application; under WSGI the stream would hold a worker per open page, so
+    it answers 204 No Content, which tells EventSource not to reconnect.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    participant = await aget_object_or_404(Participant, pk=participant_id)
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    response = StreamingHttpResponse(
+        live.wearable_events(participant.id, int(last_event_id) if last_event_id.isdigit() else None),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+    return response
+
+@login_required
+def export_wearable_data(request, participant_id):
+    """Streams the participant's wearable history as a gzip-compressed CSV or NDJSON file."""
+    participant = get_object_or_404(Participant, pk=participant_id)
+    form = WearableExportForm(request.GET)
+    if not form.is_valid():
+        for error in form.errors.values():
+            messages.error(request, error.as_text())
+        return redirect('wearable_dashboard', participant_id=participant.id)
+    data = form.cleaned_data
+    fmt = data['format']
+    response = StreamingHttpResponse(
+        exports.export_wearable_data(participant, fmt, data['start'], data['end'], data['metrics']),
+        content_type='application/gzip',
+    )
+    filename = f"{participant.participant_id}_wearables.{fmt}.gz"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+# --- Batch Import Views ---
+
+@login_required
+def import_biomarkers(request):
+    """Imports a lab spreadsheet of biomarker results for many visits at once."""
+    results = None
+    if request.method == 'POST':
+        form = BiomarkerImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            dry_run = form.cleaned_data['dry_run']
+            try:
+                rows = biomarker_import.read_rows(form.cleaned_data['file'].file)
+            except (UnicodeDecodeError, csv.Error) as e:
+                form.add_error('file', f"The file could not be read as a UTF-8 CSV ({e}). Save it as \"CSV UTF-8\" and try again.")
+            else:
+                results = biomarker_import.import_biomarkers(rows, dry_run=dry_run)
+                errors = sum(result.action == 'error' for result in results)
+                changed = sum(result.action in ('create', 'update') for result in results)
+                if errors:
+                    messages.error(request, f"{errors} row(s) have errors. Nothing was saved.")
+                elif dry_run:
+                    messages.info(request, f"Dry run: {changed} of {len(results)} row(s) would change.")
+                else:
+                    messages.success(request, f"Imported {len(results)} row(s); {changed} changed.")
+    else:
+        form = BiomarkerImportForm()
+    return render(request, 'study/import_biomarkers.html', {'form': form, 'results': results})
+
+
+# --- Chunked MRI Report Upload Views ---
+
+def _upload_status(upload):
+    return {
+        'upload_id': str(upload.id),
+        'offset': upload.received_bytes,
+        'total_size': upload.total_size,
+        'complete': upload.completed_at is not None,
+        'sha256': upload.sha256,
     }
-    return render(request, 'study/wearable_dashboard.html', context)
\ No newline at end of file
+
+@login_required
+@require_POST
+def start_report_upload(request, participant_id, visit_id):
+    """Opens a resumable upload. The client then PUTs chunks to the returned upload."""
+    visit = get_object_or_404(Visit, pk=visit_id, participant_id=participant_id)
+    try:
+        total_size = int(request.POST['total_size'])
+    except (KeyError, ValueError):
+        return JsonResponse({'error': "total_size is required."}, status=400)
+    filename = request.POST.get('filename', '').strip()
+    if not filename or total_size <= 0:
+        return JsonResponse({'error': "A filename and a positive total_size are required."}, status=400)
+
+    upload = ReportUpload.objects.create(
+        visit=visit,
+        filename=filename[:255],
+        total_size=total_size,
+        expected_sha256=request.POST.get('sha256', '').strip()[:64],
+    )
+    status = _upload_status(upload)
+    status['chunk_size'] = settings.UPLOAD_CHUNK_SIZE
+    return JsonResponse(status, status=201)
+
+@login_required
+@require_http_methods(['GET', 'PUT'])
+def report_upload_chunk(request, participant_id, visit_id, upload_id):
+    """
+    GET reports how many bytes the server holds, so an interrupted client knows
+    where to resume. PUT appends the request body at the `Upload-Offset` header.
+    """
+    upload = get_object_or_404(ReportUpload, pk=upload_id, visit_id=visit_id, visit__participant_id=participant_id)
+    if request.method == 'GET' or upload.completed_at:
+        return JsonResponse(_upload_status(upload))
+
+    try:
+        offset = int(request.headers['Upload-Offset'])
+        length = int(request.headers.get('Content-Length') or 0)
+    except (KeyError, ValueError):
+        return JsonResponse({'error': "Upload-Offset and Content-Length headers are required."}, status=400)
+    if offset != upload.received_bytes:
+        return JsonResponse(_upload_status(upload), status=409)
+    if offset + length > upload.total_size:
+        return JsonResponse({'error': "Chunk extends past the announced file size."}, status=400)
+
+    # The offset is claimed with a conditional UPDATE before the file is
+    # touched, so a retried or concurrent PUT at the same offset gets a 409
+    # instead of writing into the same part of the file. No transaction is
+    # held open while the body arrives over the network.
+    claim = uploads.claim_chunk(upload, offset)
+    if claim is None:
+        upload.refresh_from_db()
+        return JsonResponse(_upload_status(upload), status=409)
+    written = 0
+    try:
+        written = uploads.write_chunk(upload, request, offset, length)
+    finally:
+        released = uploads.release_chunk(upload, claim, offset + written)
+    upload.refresh_from_db()
+    if not released:
+        return JsonResponse(_upload_status(upload), status=409)
+
+    if upload.received_bytes == upload.total_size:
+        try:
+            name, sha256 = uploads.finish_upload(upload)
+        except uploads.HashMismatch as e:
+            upload.delete()
+            return JsonResponse({'error': f"The assembled file does not match ({e}). Upload it again."}, status=400)
+        with transaction.atomic():
+            neuroimaging = Neuroimaging.objects.get_or_create(visit=upload.visit)[0]
+            neuroimaging.mri_report.name = name
+            neuroimaging.save()
+            upload.sha256 = sha256
+            upload.completed_at = timezone.now()
+            upload.save(update_fields=['sha256', 'completed_at'])
+    return JsonResponse(_upload_status(upload))
+
+@login_required
+def download_mri_report(request, participant_id, visit_id):
+    neuroimaging = get_object_or_404(Neuroimaging, visit_id=visit_id, visit__participant_id=participant_id)
+    if not neuroimaging.mri_report:
+        raise Http404("No MRI report has been uploaded for this visit.")
+    return uploads.serve_file(request, neuroimaging.mri_report)
+
+
+# --- Offline Questionnaire Sync API ---
+
+@login_required
+@require_http_methods(['GET'])
+def questionnaire_definitions(request):
+    """
+    All questionnaires for an offline client to render. The ETag is the
+    document version, so clients refresh their copy with a conditional GET.
+    """
+    definitions = sync.questionnaire_definitions()
+    etag = f'"{definitions["version"]}"'
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    response = JsonResponse(definitions)
+    response['ETag'] = etag
+    return response
+
+@login_required
+@require_POST
+def sync_questionnaires(request):
+    """
+    Accepts {"assessments": [...]} completed offline and answers with one
+    result per item, in the same order (see sync.sync_assessments).
+    """
+    try:
+        items = json.loads(request.body)['assessments']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': "Send a JSON object with an 'assessments' list."}, status=400)
+    if not isinstance(items, list):
+        return JsonResponse({'error': "'assessments' must be a list."}, status=400)
+    if len(items) > sync.MAX_BATCH_SIZE:
+        return JsonResponse({'error': f"Send at most {sync.MAX_BATCH_SIZE} assessments per request."}, status=413)
+    results = sync.sync_assessments(items)
+    return JsonResponse({'results': [result.as_dict() for result in results]})